@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+import array
+import numpy as np
+
+'''Compact graph storage for the sampling loop. Both backends here hold a fixed set of nodes 0..n-1 in preallocated arrays and offer the handful of networkx.Graph methods the sampler actually uses (add_edge, remove_edge, has_edge, neighbors, degree, number_of_edges, number_of_nodes, nodes, edges, clear), so the bridge index, the shortest-path engine and the sampler itself run on either. They also offer edge_array(), the edges as one int64 array, which the state codec uses rather than building a tuple per edge. Edge weights aren't stored at all: they come from the weight function (normally the sampler's DistanceTable). networkx only comes in when converting with to_networkx().
+
+BitsetGraph packs the adjacency matrix 8 edges to the byte, which suits small inputs. CSRGraph keeps every node's neighbours in a block of one shared array, CSR-style, growing a node's block by moving it to one twice the size and recycling freed blocks through free lists, which suits large sparse ones. Measured with graphmcmc.benchmark at 1000 nodes, CSRGraph takes about 3500 steps a second at mean degree 4 and 1000 at 16, against 1800 and 300 on networkx; at mean degree 2, where nearly all the time goes on repairing shortest paths, it's about level (1060 against 1140).'''
+
+BITSET_NODES = 256#'array' picks the bitset up to here; past it, scanning the n^2/8 bytes of the matrix for the state codec's edge_array() costs more than walking CSR's blocks
+
+
+class ArrayGraph(object):
+    '''What both backends share: the node set, degree array and edge count, plus the conversions.'''
+
+    def __init__(self, n, weight):
+        self.n = n
+        self.weight = weight#weight(u, v) for any pair of nodes
+        self.deg = np.zeros(n, dtype=np.int32)
+        self.edge_count = 0
+
+    def number_of_nodes(self):
+        return self.n
+
+    def number_of_edges(self):
+        return self.edge_count
+
+    def nodes(self):
+        return list(range(self.n))
+
+    def degree(self, node):
+        return self.deg.item(node)
+
+    def edges(self):
+        '''Every edge once, as (smaller, larger).'''
+        u, v = self.edge_array().T
+        return list(zip(u.tolist(), v.tolist()))
+
+    def __contains__(self, node):
+        return 0 <= node < self.n
+
+    def __len__(self):
+        return self.n
+
+    def to_networkx(self):
+        '''A networkx.Graph copy with a 'weight' on every edge.'''
+        import networkx as nx
+        graph = nx.Graph()
+        graph.add_nodes_from(range(self.n))
+        for u, v in self.edges():
+            graph.add_edge(u, v, weight=self.weight(u, v))
+        return graph
+
+    def add_edges_from(self, edges):
+        for u, v in edges:
+            self.add_edge(u, v)
+
+
+class BitsetGraph(ArrayGraph):
+    '''Adjacency as an n x ceil(n/8) bit-packed uint8 matrix; bit v of row u is set when u-v is an edge. Unpacked neighbour lists are cached per node until an edit touches that node, since the path and bridge searches ask for the same rows over and over.'''
+
+    def __init__(self, n, weight):
+        ArrayGraph.__init__(self, n, weight)
+        self.bits = np.zeros((n, (n + 7) // 8), dtype=np.uint8)
+        self.rows = {}#node: its neighbour list, while unchanged
+
+    def has_edge(self, u, v):
+        return bool((self.bits.item(u, v >> 3) >> (v & 7)) & 1)
+
+    def add_edge(self, u, v, weight=None):
+        '''Adds u-v if it isn't there already. weight is accepted for networkx compatibility and ignored.'''
+        if u == v or self.has_edge(u, v):
+            return
+        self.bits[u, v >> 3] |= 1 << (v & 7)
+        self.bits[v, u >> 3] |= 1 << (u & 7)
+        self.rows.pop(u, None)
+        self.rows.pop(v, None)
+        self.deg[u] += 1
+        self.deg[v] += 1
+        self.edge_count += 1
+
+    def remove_edge(self, u, v):
+        if not self.has_edge(u, v):
+            raise KeyError('The edge {}-{} is not in the graph'.format(u, v))
+        self.bits[u, v >> 3] &= ~(1 << (v & 7)) & 0xff
+        self.bits[v, u >> 3] &= ~(1 << (u & 7)) & 0xff
+        self.rows.pop(u, None)
+        self.rows.pop(v, None)
+        self.deg[u] -= 1
+        self.deg[v] -= 1
+        self.edge_count -= 1
+
+    def neighbors(self, node):
+        row = self.rows.get(node)
+        if row is None:
+            row = np.flatnonzero(np.unpackbits(self.bits[node], bitorder='little')[:self.n]).tolist()
+            self.rows[node] = row
+        return list(row)
+
+    def edge_array(self):
+        '''Every edge once, as the rows (smaller, larger) of an m x 2 int64 array, in order. Only the bytes with a bit set get unpacked, so this costs n^2/8 byte checks plus the edges rather than n^2.'''
+        width = self.bits.shape[1]
+        at = np.flatnonzero(self.bits)
+        found, bits = np.nonzero(np.unpackbits(self.bits.ravel()[at][:, None], axis=1, bitorder='little'))
+        at = at[found]
+        u = at // width
+        v = (at - u * width) * 8 + bits
+        upper = u < v
+        return np.column_stack((u[upper], v[upper]))
+
+    def clear(self):
+        self.bits[:] = 0
+        self.rows = {}
+        self.deg[:] = 0
+        self.edge_count = 0
+
+
+class CSRGraph(ArrayGraph):
+    '''Neighbour lists in blocks of one int32 array: node u's neighbours are nbr[start[u]:start[u] + deg[u]], out of a block of cap[u] slots. A full block moves to a fresh one of twice the size, and the old block goes on the free list for its size so another node can reuse it. The arrays are the standard library's array.array rather than NumPy's: the sampler reads them an element or a short slice at a time, which array.array hands back as plain ints and lists without NumPy's overhead on every call, and edge_array() still views them as NumPy arrays without copying.'''
+
+    def __init__(self, n, weight, capacity=4):
+        ArrayGraph.__init__(self, n, weight)
+        self.capacity = capacity
+        self.clear()
+
+    def clear(self):
+        n, capacity = self.n, self.capacity
+        self.nbr = array.array('i', [-1]) * max(n * capacity, 1)
+        self.start = array.array('q', range(0, n * capacity, capacity))
+        self.cap = array.array('i', [capacity]) * n
+        self.deg = array.array('i', [0]) * n
+        self.top = n * capacity#first slot no block owns yet
+        self.free = {}#block size: list of free block starts
+        self.edge_count = 0
+
+    def degree(self, node):
+        return self.deg[node]
+
+    def has_edge(self, u, v):
+        deg = self.deg
+        if deg[u] > deg[v]:
+            u, v = v, u#scan the shorter list
+        start = self.start[u]
+        return v in self.nbr[start:start + deg[u]]
+
+    def add_edge(self, u, v, weight=None):
+        '''Adds u-v if it isn't there already. weight is accepted for networkx compatibility and ignored.'''
+        if u == v or self.has_edge(u, v):
+            return
+        self._append(u, v)
+        self._append(v, u)
+        self.edge_count += 1
+
+    def remove_edge(self, u, v):
+        if not self.has_edge(u, v):
+            raise KeyError('The edge {}-{} is not in the graph'.format(u, v))
+        self._discard(u, v)
+        self._discard(v, u)
+        self.edge_count -= 1
+
+    def neighbors(self, node):
+        start = self.start[node]
+        return self.nbr[start:start + self.deg[node]].tolist()
+
+    def edge_array(self):
+        '''Every edge once, as the rows (smaller, larger) of an m x 2 int64 array, gathered from every block at once.'''
+        deg = np.frombuffer(self.deg, dtype=np.intc).astype(np.int64)
+        u = np.repeat(np.arange(self.n, dtype=np.int64), deg)
+        offsets = np.arange(len(u), dtype=np.int64) - np.repeat(np.cumsum(deg) - deg, deg)
+        slots = np.repeat(np.frombuffer(self.start, dtype=np.longlong), deg) + offsets
+        v = np.frombuffer(self.nbr, dtype=np.intc)[slots].astype(np.int64)
+        upper = u < v
+        return np.column_stack((u[upper], v[upper]))
+
+    def _append(self, u, v):
+        d = self.deg[u]
+        if d == self.cap[u]:
+            self._grow(u)
+        self.nbr[self.start[u] + d] = v
+        self.deg[u] = d + 1
+
+    def _discard(self, u, v):
+        start = self.start[u]
+        last = self.deg[u] - 1
+        at = self.nbr[start:start + last + 1].index(v)
+        self.nbr[start + at] = self.nbr[start + last]#swap the last neighbour into the hole
+        self.nbr[start + last] = -1
+        self.deg[u] = last
+
+    def _grow(self, u):
+        old_start, old_cap = self.start[u], self.cap[u]
+        new_cap = old_cap * 2
+        spare = self.free.get(new_cap)
+        if spare:
+            new_start = spare.pop()
+        else:
+            new_start = self.top
+            self.top += new_cap
+            if self.top > len(self.nbr):#out of room: double the backing array
+                self.nbr.extend(array.array('i', [-1]) * (max(2 * len(self.nbr), self.top) - len(self.nbr)))
+        self.nbr[new_start:new_start + old_cap] = self.nbr[old_start:old_start + old_cap]
+        self.nbr[old_start:old_start + old_cap] = array.array('i', [-1]) * old_cap
+        self.free.setdefault(old_cap, []).append(old_start)
+        self.start[u] = new_start
+        self.cap[u] = new_cap
+
+
+def make_backend(kind, n, weight):
+    '''Builds an empty graph on n nodes. kind is 'bitset', 'csr', or 'array' to pick between them by size.'''
+    if kind == 'array':
+        kind = 'bitset' if n <= BITSET_NODES else 'csr'
+    if kind == 'bitset':
+        return BitsetGraph(n, weight)
+    if kind == 'csr':
+        return CSRGraph(n, weight)
+    raise ValueError("Unknown graph backend '{}'".format(kind))
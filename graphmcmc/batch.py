@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+import networkx as nx
+import numpy as np
+from graphmcmc.distances import pairwise
+from graphmcmc.sampler import GraphMCMCSampler
+
+'''Many small chains advanced in lockstep as NumPy arrays. For graphs of a handful of nodes a GraphMCMCSampler spends nearly all its time in Python bookkeeping, so a sweep over thousands of (r, T) settings is thousands of times that overhead. BatchSampler keeps K chains as one stacked K x n x n adjacency array instead: each step draws all K add/cut decisions, edge choices and acceptance rolls in one call to the random number generator, weighs all K proposals with array operations, and adds every chain's observables to its own running sums. The proposals and acceptance rule are exactly those of a GraphMCMCSampler with the default AddCutKernel, so each chain has the same distribution as an ordinary one; only the bookkeeping is batched.'''
+
+
+class BatchSampler(object):
+    '''n_chains independent chains on the nodes in infile (or the given list of points), started from the line graph as make_graph() does. r and T may be numbers or anything that broadcasts to one value per chain, for sweeping parameters; n_chains defaults to however many that makes. seed works as in graphmcmc.parallel, and self.seed is the entropy to pass back to rerun the batch. The work per step is O(K n^4) array operations, which is cheap for the few-node graphs this is meant for and grows quickly past a dozen or so nodes; more than 64 nodes aren't supported.'''
+
+    def __init__(self, n_chains=None, nodes=None, infile=None, r=0.0, T=1.0, seed=None):
+        if nodes is None:
+            loader = GraphMCMCSampler()
+            loader.read_file(infile)
+            nodes = loader.coords
+        self.coords = np.array(nodes, dtype=np.float64)
+        if self.coords.ndim == 1:
+            self.coords = self.coords.reshape(len(self.coords), -1)
+        self.n = len(self.coords)
+        if self.n > 64:
+            raise ValueError('BatchSampler keeps each node\'s neighbours in a 64-bit mask, so it takes at most 64 nodes, not {}'.format(self.n))
+        self.Nmin = self.n - 1
+        self.Nmax = self.n * (self.n - 1) / 2
+        self.weights = pairwise(self.coords)
+        self.pairs = np.triu_indices(self.n, 1)#pair k is (pairs[0][k], pairs[1][k]), numbered as StateCodec numbers them
+        shape = np.broadcast(np.asarray(r), np.asarray(T)).shape if n_chains is None else (n_chains,)
+        self.n_chains = int(np.prod(shape))
+        self.r = np.broadcast_to(np.asarray(r, dtype=np.float64), shape).reshape(-1).copy()
+        self.T = np.broadcast_to(np.asarray(T, dtype=np.float64), shape).reshape(-1).copy()
+        master = np.random.SeedSequence(seed)
+        self.seed = master.entropy
+        self.rng = np.random.default_rng(master)
+        self.make_graph()
+
+    def make_graph(self):
+        '''Puts every chain back on the line graph 0-1-...-(n-1) and resets the running sums, which count the starting state, as GraphMCMCSampler.make_graph() does.'''
+        K, n = self.n_chains, self.n
+        self.adjacency = np.zeros((K, n, n), dtype=bool)
+        line = np.arange(n - 1)
+        self.adjacency[:, line, line + 1] = True
+        self.adjacency[:, line + 1, line] = True
+        self.edge_count = np.full(K, n - 1, dtype=np.int64)
+        self.theta, self.longest = self._energy(self.adjacency)
+        self.nonbridges = self._nonbridges(self.adjacency)#K x pairs: which edges each chain could cut
+        self.zero_degree_sum = np.zeros(K, dtype=np.int64)
+        self.edge_sum = np.zeros(K, dtype=np.int64)
+        self.long_short_sum = np.zeros(K, dtype=np.float64)
+        self.steps = 0
+        self._record()
+
+    def step(self):
+        '''One Metropolis-Hastings step of every chain.'''
+        K, Nmin, Nmax = self.n_chains, self.Nmin, self.Nmax
+        u, v = self.pairs
+        edges = self.edge_count
+        prob_add = (Nmax - edges) / (Nmax - Nmin)
+        dice = self.rng.random((3, K))#add or cut, which edge, accept or not
+        add = dice[0] < prob_add
+        #an addition is uniform over the missing edges and a cut uniform over the non-bridges, as in propose_new()
+        candidates = np.where(add[:, None], ~self.adjacency[:, u, v], self.nonbridges)
+        counts = candidates.sum(axis=1)
+        choice = np.minimum((dice[1] * counts).astype(np.int64), counts - 1)
+        pair = np.argmax(np.cumsum(candidates, axis=1) > choice[:, None], axis=1)
+        chains = np.arange(K)
+        proposed = self.adjacency.copy()
+        proposed[chains, u[pair], v[pair]] = add
+        proposed[chains, v[pair], u[pair]] = add
+        theta, longest = self._energy(proposed)
+        nonbridges = self._nonbridges(proposed)
+        #q(j|i) and q(i|j) as GraphMCMCSampler.move_q() has them
+        q_forward = np.where(add, prob_add, 1.0 - prob_add) / counts
+        q_reverse = np.where(add,
+                             (1.0 - (Nmax - (edges + 1)) / (Nmax - Nmin)) / np.maximum(nonbridges.sum(axis=1), 1),
+                             ((Nmax - (edges - 1)) / (Nmax - Nmin)) / (Nmax - (edges - 1)))
+        with np.errstate(over='ignore'):
+            ratio = np.exp((theta - self.theta) / self.T) * q_reverse / q_forward#pi_j q(i|j) / (pi_i q(j|i))
+        accept = dice[2] < np.minimum(ratio, 1.0)
+        self.adjacency[accept] = proposed[accept]
+        self.nonbridges[accept] = nonbridges[accept]
+        self.theta = np.where(accept, theta, self.theta)
+        self.longest = np.where(accept, longest, self.longest)
+        self.edge_count = edges + np.where(accept, np.where(add, 1, -1), 0)
+        self.steps += 1
+        self._record()
+
+    def run(self, nsteps):
+        '''Takes nsteps steps of every chain and returns get_stats(nsteps).'''
+        for i in range(nsteps):
+            self.step()
+        return self.get_stats(nsteps)
+
+    def get_stats(self, nsteps):
+        '''A K x 3 array: for each chain, [expected degree of vertex 0, expected edge count, expected longest shortest path] over nsteps recorded states, as GraphMCMCSampler.get_stats() gives them.'''
+        return np.column_stack([self.zero_degree_sum, self.edge_sum, self.long_short_sum]) / float(nsteps)
+
+    def edges(self, chain):
+        '''The edges of one chain's current graph, as sorted (smaller, larger) pairs.'''
+        u, v = self.pairs
+        present = self.adjacency[chain, u, v]
+        return list(zip(u[present].tolist(), v[present].tolist()))
+
+    def to_networkx(self, chain):
+        '''A networkx.Graph copy of one chain's current graph, with weights.'''
+        graph = nx.Graph()
+        graph.add_nodes_from(range(self.n))
+        for u, v in self.edges(chain):
+            graph.add_edge(u, v, weight=self.weights.item(u, v))
+        return graph
+
+    def _record(self):
+        self.zero_degree_sum += self.adjacency[:, 0].sum(axis=1)
+        self.edge_sum += self.edge_count
+        self.long_short_sum += self.longest
+
+    def _energy(self, adjacency):
+        '''theta and the longest shortest path out of node 0 for each of a stack of graphs, by Bellman-Ford relaxation of all of them at once.'''
+        weighted = np.where(adjacency, self.weights, np.inf)
+        distance = np.full(adjacency.shape[:2], np.inf)
+        distance[:, 0] = 0.0
+        for i in range(self.n - 1):
+            before = distance.copy()
+            for node in range(self.n):#relax every edge out of each node in turn, using what this sweep has already found
+                np.minimum(distance, distance[:, node, None] + weighted[:, node], out=distance)
+            if (distance == before).all():
+                break
+        u, v = self.pairs
+        weight_sum = adjacency[:, u, v].dot(self.weights[u, v])
+        return self.r * weight_sum + distance.sum(axis=1), distance.max(axis=1)
+
+    def _nonbridges(self, adjacency):
+        '''Which edges of each of a stack of graphs are not bridges, as a K x pairs boolean array. u-v is a non-bridge when v can still be reached from u with u-v cut, which we find for every edge at once by spreading out from u, with each node's neighbours held as the bits of one uint64.'''
+        u, v = self.pairs
+        n, each = self.n, np.arange(len(u))
+        bit = np.uint64(1) << np.arange(n, dtype=np.uint64)
+        neighbours = (adjacency * bit).sum(axis=2, dtype=np.uint64)#K x n
+        without = np.full((len(u), n), ~np.uint64(0))#pairs x n: masks that cut each edge out
+        without[each, u] = ~bit[v]
+        without[each, v] = ~bit[u]
+        cut = neighbours[:, None, :] & without#K x pairs x n: each graph's neighbours with each edge cut
+        reach = np.broadcast_to(bit[u], cut.shape[:2]).copy()
+        zero = np.uint64(0)
+        for i in range(n - 1):
+            before = reach.copy()
+            for node in range(n):#each sweep takes in the neighbours of everything reached so far, including earlier in the sweep
+                reach |= np.where(reach & bit[node] != zero, cut[:, :, node], zero)
+            if (reach == before).all():
+                break
+        return adjacency[:, u, v] & ((reach & bit[v]) != 0)
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+import json
+import platform
+import random
+import timeit
+import tracemalloc
+import click
+import networkx as nx
+import numpy as np
+import graphmcmc
+from graphmcmc.bridges import BridgeIndex
+from graphmcmc.sampler import GraphMCMCSampler
+
+'''Throughput benchmarks, for catching regressions. Each case is a chain on n random points in the unit square, grown to a given mean degree, on a given backend; for each one we time a whole step() and then each phase of it on its own, and measure the peak memory Python allocated while building the chain and taking its first steps. Results are plain dicts that save as JSON, so runs of two revisions on the same machine can be lined up with compare(). Run it as python -m graphmcmc.benchmark.'''
+
+NODES = (10, 100, 1000, 10000)
+DEGREES = (2, 4, 16)#mean degree, 2 * edges / n; 2 is n edges, one more than the starting line graph, and anything past n - 1 is the complete graph
+PHASES = ('step', 'propose_new', 'get_q', 'get_bridges', 'delta_theta', 'record_state')
+MIN_TIME = 0.2#seconds to spend timing each phase
+POOL = 64#proposals drawn up front for the phases that weigh one
+
+
+def synthetic(n, degree, backend='networkx', seed=0):
+    '''A fresh GraphMCMCSampler on n random points in the unit square, with its graph grown from the line graph to mean degree degree by adding random edges.'''
+    rng = random.Random(seed)
+    sampler = GraphMCMCSampler(seed=seed, backend=backend)
+    sampler.set_nodes([(rng.random(), rng.random()) for i in range(n)])
+    sampler.make_graph()
+    target = min(int(round(degree * n / 2)), int(sampler.Nmax))
+    graph = sampler.graph
+    edges = n - 1
+    while edges < target:
+        u, v = rng.randrange(n), rng.randrange(n)
+        if u != v and not graph.has_edge(u, v):
+            graph.add_edge(u, v, weight=sampler.distances(u, v))#the indices see the edge count change and rebuild once, when next asked
+            edges += 1
+    return sampler
+
+
+def bench_case(n, degree, backend='networkx', seed=0, min_time=MIN_TIME):
+    '''Benchmarks one case. Returns a dict with the case's parameters, its starting edge count, peak_bytes (the peak of Python allocations while building the chain and taking 10 steps), steps_per_sec, and phases, which maps each phase to its calls, total seconds and seconds per call.'''
+    tracemalloc.start()
+    try:
+        sampler = synthetic(n, degree, backend, seed)
+        edges = sampler.graph.number_of_edges()
+        for i in range(10):
+            sampler.step()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    moves = []
+    for i in range(POOL):
+        sampler.propose_new()
+        moves.append(sampler.proposal)
+        sampler.update(False)
+    energy = sampler._energy(sampler.graph)
+    cycle = _cycle(moves)
+
+    def propose_new():
+        sampler.propose_new()
+        sampler.update(False)
+
+    def get_q():
+        move = next(cycle)
+        sampler.move_q(move)
+        sampler.move_q(move, reverse=True)
+
+    def get_bridges():
+        BridgeIndex(sampler.graph).bridges()#what graphmcmc.get_bridges() does: one DFS from scratch
+
+    def delta_theta():
+        energy.delta_theta(next(cycle))#what the acceptance step asks of theta
+
+    timings = {'propose_new': propose_new,
+               'get_q': get_q,
+               'get_bridges': get_bridges,
+               'delta_theta': delta_theta,
+               'record_state': sampler.record_state,
+               'step': sampler.step}#last, since it moves the chain on
+    phases = {}
+    for phase in PHASES[1:] + PHASES[:1]:
+        calls, seconds = _time(timings[phase], min_time)
+        phases[phase] = {'calls': calls, 'seconds': seconds, 'per_call': seconds / calls}
+    return {'nodes': n,
+            'degree': degree,
+            'backend': backend,
+            'edges': edges,
+            'peak_bytes': peak,
+            'steps_per_sec': 1.0 / phases['step']['per_call'],
+            'phases': phases}
+
+
+def run_suite(nodes=NODES, degrees=DEGREES, backends=('networkx',), seed=0, min_time=MIN_TIME, progress=None):
+    '''Benchmarks every combination of node count, mean degree and backend (degrees past n - 1 all come to the complete graph, so only the first of them is run). progress, if given, is called with each case's result as it's finished. Returns a dict with the results and enough about the machine and the software to tell whether two runs are comparable.'''
+    results = []
+    for backend in backends:
+        for n in nodes:
+            done = set()
+            for degree in degrees:
+                if min(degree, n - 1) in done:
+                    continue
+                done.add(min(degree, n - 1))
+                result = bench_case(n, degree, backend, seed, min_time)
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+    return {'graphmcmc': graphmcmc.__version__,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'networkx': nx.__version__,
+            'machine': platform.platform(),
+            'processor': platform.processor(),
+            'seed': seed,
+            'min_time': min_time,
+            'results': results}
+
+
+def compare(before, after):
+    '''Lines up two run_suite() results case by case. Returns one (nodes, degree, backend, phase, seconds per call before, seconds per call after, after / before) tuple per phase of every case both of them ran, so a ratio above 1 is a slowdown.'''
+    earlier = dict((_case(result), result) for result in before['results'])
+    rows = []
+    for result in after['results']:
+        old = earlier.get(_case(result))
+        if old is None:
+            continue
+        for phase in PHASES:
+            if phase in old['phases'] and phase in result['phases']:
+                was, now = old['phases'][phase]['per_call'], result['phases'][phase]['per_call']
+                rows.append(_case(result) + (phase, was, now, now / was))
+    return rows
+
+
+def _case(result):
+    return (result['nodes'], result['degree'], result['backend'])
+
+
+def _cycle(items):
+    while True:
+        for item in items:
+            yield item
+
+
+def _time(function, min_time):
+    '''(calls, seconds) for calling function repeatedly, in growing batches, until at least min_time has gone by.'''
+    calls, seconds, batch = 0, 0.0, 1
+    while seconds < min_time:
+        seconds += timeit.timeit(function, number=batch)
+        calls += batch
+        batch *= 2
+    return calls, seconds
+
+
+@click.command()
+@click.option('--nodes', '-n', type=int, multiple=True, help='Node counts to run (default: 10, 100, 1000 and 10000).')
+@click.option('--degree', '-d', type=float, multiple=True, help='Mean degrees to grow each graph to (default: 2, 4 and 16).')
+@click.option('--backend', '-b', multiple=True, help='Graph backends to run (default: networkx).')
+@click.option('--seed', type=int, default=0, help='Seed for the points, the graphs and the chains.')
+@click.option('--min-time', type=float, default=MIN_TIME, help='Seconds to time each phase for.')
+@click.option('--output', '-o', type=click.Path(), help='Save the results here as JSON.')
+@click.option('--compare', 'baseline', type=click.Path(exists=True), help='A saved JSON result to compare this run against.')
+def main(nodes, degree, backend, seed, min_time, output, baseline):
+    """Time step() and each of its phases on synthetic graphs"""
+    def progress(result):
+        click.echo('{nodes:>6} nodes  degree {degree:<5g} {backend:<9} {edges:>8} edges  {steps_per_sec:>10.1f} steps/s  peak {peak_bytes:>11,} B'.format(**result))
+    suite = run_suite(nodes or NODES, degree or DEGREES, backend or ('networkx',), seed, min_time, progress)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(suite, f, indent=2, sort_keys=True)
+    if baseline:
+        with open(baseline) as f:
+            before = json.load(f)
+        for n, d, b, phase, was, now, ratio in compare(before, suite):
+            click.echo('{:>6} {:<5g} {:<9} {:<13} {:>12.3g}s {:>12.3g}s  x{:.2f}'.format(n, d, b, phase, was, now, ratio))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from graphmcmc.edgesets import IndexedSet
+
+'''A dynamic bridge index. We keep a rooted spanning forest of the graph, and for every tree edge a count of the non-tree edges whose tree path runs over it (its "cover"). A tree edge is a bridge exactly when its cover is 0, and non-tree edges are never bridges, so both questions the Hastings ratio asks are O(1) lookups. The non-bridges are also kept in an IndexedSet, so a uniformly random one is O(1) to draw. Adding an edge or removing a non-tree edge only touches the tree path between its endpoints. Removing a tree edge that isn't a bridge swaps a non-tree edge across the gap into the tree in its place, which costs the smaller of the two sides it cuts the tree into plus the tree paths of the edges across. When that would come to more than V + E, as it does when many long paths cross the gap, and when removing a bridge splits the graph, we rebuild the forest in O(V + E) instead.'''
+
+
+class BridgeIndex(object):
+    '''Tracks which edges of a graph are bridges as edges are added and removed. The graph must offer neighbors(node), nodes() and number_of_edges(), which networkx.Graph does.'''
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.rebuild()
+
+    def rebuild(self):
+        '''Recompute the spanning forest and every cover count from scratch with an iterative DFS. In a DFS tree every non-tree edge joins a node to one of its ancestors, so the covers come out of a single bottom-up pass over the visit order. Nodes and neighbours are visited in sorted order, so the result depends only on the edge set and not on the order the graph happens to list things in.'''
+        graph = self.graph
+        adjacency = dict((node, sorted(graph.neighbors(node))) for node in graph.nodes())
+        self.parent = {}
+        self.children = dict((node, set()) for node in adjacency)
+        self.depth = {}
+        self.cover = {}
+        self.nontree = set()
+        self.across = dict((node, set()) for node in adjacency)#each node's non-tree neighbours
+        self.cuttable = IndexedSet()#every edge that isn't a bridge
+        order = []
+        for root in sorted(adjacency):
+            if root in self.parent:
+                continue
+            self.parent[root] = None
+            self.depth[root] = 0
+            stack = [(root, iter(adjacency[root]))]
+            order.append(root)
+            while stack:
+                node, children = stack[-1]
+                for child in children:
+                    if child not in self.parent:
+                        self.parent[child] = node
+                        self.children[node].add(child)
+                        self.depth[child] = self.depth[node] + 1
+                        order.append(child)
+                        stack.append((child, iter(adjacency[child])))
+                        break
+                else:
+                    stack.pop()
+        diff = dict.fromkeys(order, 0)
+        for node in order:
+            for other in adjacency[node]:
+                if self.parent[node] == other or self.parent[other] == node:
+                    continue
+                if self.depth[other] < self.depth[node]:#count each back edge once, from its lower end
+                    self._link(node, other)
+                    self.cuttable.add(_key(node, other))
+                    diff[node] += 1
+                    diff[other] -= 1
+        self.bridge_count = 0
+        for node in reversed(order):#children come after their parents in DFS order
+            if self.parent[node] is None:
+                continue
+            self.cover[node] = diff[node]
+            diff[self.parent[node]] += diff[node]
+            if diff[node] == 0:
+                self.bridge_count += 1
+            else:
+                self.cuttable.add(_key(node, self.parent[node]))
+        self.edge_count = graph.number_of_edges()
+
+    def restore(self, parent, cuttable):
+        '''Put the index back the way it was saved: parent maps every node to its parent in the spanning forest (None for roots), and cuttable lists the non-bridges in the order they were held. Used by graphmcmc.checkpoint, since which non-bridge random_nonbridge() draws depends on both.'''
+        graph = self.graph
+        self.parent = dict(parent)
+        self.children = dict((node, set()) for node in self.parent)
+        for node, up in self.parent.items():
+            if up is not None:
+                self.children[up].add(node)
+        self.depth = {}
+        for node in self.parent:
+            path = []
+            while node not in self.depth and self.parent[node] is not None:
+                path.append(node)
+                node = self.parent[node]
+            depth = self.depth.setdefault(node, 0)
+            for node in reversed(path):
+                depth += 1
+                self.depth[node] = depth
+        self.cover = dict((node, 0) for node in self.parent if self.parent[node] is not None)
+        self.nontree = set()
+        self.across = dict((node, set()) for node in self.parent)
+        for u, v in graph.edges():
+            if self.parent[u] != v and self.parent[v] != u:
+                self._link(u, v)
+                for node in self._path(u, v):
+                    self.cover[node] += 1
+        self.bridge_count = sum(1 for node in self.cover if self.cover[node] == 0)
+        self.cuttable = IndexedSet(cuttable)
+        self.edge_count = graph.number_of_edges()
+
+    def is_bridge(self, idx1, idx2):
+        '''Returns True if the edge idx1-idx2 is a tree edge nobody else covers.'''
+        if self.parent.get(idx1) == idx2:
+            return self.cover[idx1] == 0
+        if self.parent.get(idx2) == idx1:
+            return self.cover[idx2] == 0
+        return False
+
+    def nonbridge_count(self):
+        '''The number of edges we could cut without disconnecting anything.'''
+        return self.edge_count - self.bridge_count
+
+    def random_nonbridge(self, rng):
+        '''A uniformly random edge we could cut, as (smaller, larger); there must be one.'''
+        return self.cuttable.choice(rng)
+
+    def bridges(self):
+        '''Lists the current bridges as (child, parent) pairs.'''
+        return [(node, self.parent[node]) for node in self.cover if self.cover[node] == 0]
+
+    def insert(self, idx1, idx2):
+        '''Update the index after the edge idx1-idx2 has been added to the graph.'''
+        self.edge_count += 1
+        if idx1 not in self.parent or idx2 not in self.parent:
+            self.rebuild()#a brand-new node; happens while building a graph, not while sampling
+            return
+        path = self._path(idx1, idx2)
+        if path is None:
+            self.rebuild()#the edge joins two components, so the forest itself changes
+            return
+        self._link(idx1, idx2)
+        self.cuttable.add(_key(idx1, idx2))
+        for node in path:
+            if self.cover[node] == 0:
+                self.bridge_count -= 1
+                self.cuttable.add(_key(node, self.parent[node]))
+            self.cover[node] += 1
+
+    def delete(self, idx1, idx2):
+        '''Update the index after the edge idx1-idx2 has been removed from the graph.'''
+        self.edge_count -= 1
+        key = _key(idx1, idx2)
+        if key not in self.nontree:
+            if not self._replace(idx1 if self.parent.get(idx1) == idx2 else idx2):
+                self.rebuild()#a bridge went away, splitting its tree in two
+            return
+        self._unlink(idx1, idx2)
+        self.cuttable.remove(key)
+        for node in self._path(idx1, idx2):
+            self.cover[node] -= 1
+            if self.cover[node] == 0:
+                self.bridge_count += 1
+                self.cuttable.remove(_key(node, self.parent[node]))
+
+    def nonbridge_count_after_insert(self, idx1, idx2):
+        '''How many non-bridge edges the graph would have if we added idx1-idx2, without changing anything. Every bridge on the tree path between them, plus the new edge itself, would stop being a bridge.'''
+        path = self._path(idx1, idx2)
+        if path is None:
+            return self.nonbridge_count()#joining two components only adds a bridge
+        freed = 0
+        for node in path:
+            if self.cover[node] == 0:
+                freed += 1
+        return self.nonbridge_count() + freed + 1
+
+    def _replace(self, child):
+        '''Swap the tree edge from child up to its parent, which has just been removed from the graph, for a non-tree edge joining the two sides that leaves, keeping the covers, the bridge count and cuttable up to date as we go. The edges across are exactly the ones whose tree paths ran over the removed edge, so it had one if its cover wasn't 0; otherwise it was a bridge, and we return False and change nothing. The least edge across goes into the tree, so the choice depends only on the edge set and the forest, and the smaller side is re-rooted at its end of it and hung from the other. Depths are only compared within a tree, so the larger side keeps its own even if it loses its root. The tree paths of the edges across are walked twice, so once they add up to more than rebuild() would cost we stop and rebuild instead, whatever state we've left things in.'''
+        parent, cover = self.parent, self.cover
+        up = parent[child]
+        if cover[child] == 0:
+            return False
+        side = self._smaller_side(child, up)
+        across = sorted((u, w) for u in side for w in self.across[u] if w not in side)
+        budget = len(parent) + self.edge_count - len(side) - len(across)
+        was_bridge = {}#whether each tree edge whose cover changes was a bridge beforehand, by key
+        for u, w in across:
+            path = self._path(u, w)
+            budget -= len(path)
+            if budget < 0:
+                self.rebuild()
+                return True
+            for node in path:
+                key = _key(node, parent[node])
+                if key not in was_bridge:
+                    was_bridge[key] = cover[node] == 0
+                cover[node] -= 1
+        del was_bridge[_key(child, up)]
+        del cover[child]
+        self.cuttable.remove(_key(child, up))
+        self.children[up].remove(child)
+        parent[child] = None
+        low, high = across[0]#low is on the smaller side
+        self._unlink(low, high)
+        carried, above, node = 0, high, low
+        while node is not None:#turn the path from low to the top of its side upside down
+            up = parent[node]
+            if up is not None:
+                self.children[up].remove(node)
+            parent[node] = above
+            self.children[above].add(node)
+            carried, cover[node] = cover.get(node), carried
+            above, node = node, up
+        depth = self.depth
+        depth[low] = depth[high] + 1
+        stack = [low]
+        while stack:
+            node = stack.pop()
+            for below in self.children[node]:
+                depth[below] = depth[node] + 1
+                stack.append(below)
+        new = _key(low, high)
+        for u, w in across[1:]:
+            path = self._path(u, w)
+            budget -= len(path)
+            if budget < 0:
+                self.rebuild()
+                return True
+            for node in path:
+                key = _key(node, parent[node])
+                if key != new and key not in was_bridge:
+                    was_bridge[key] = cover[node] == 0
+                cover[node] += 1
+        for key, bridge in was_bridge.items():
+            node = key[0] if parent[key[0]] == key[1] else key[1]
+            if bridge and cover[node] > 0:
+                self.bridge_count -= 1
+                self.cuttable.add(key)
+            elif not bridge and cover[node] == 0:
+                self.bridge_count += 1
+                self.cuttable.remove(key)
+        if cover[low] == 0:#was a non-tree edge, so cuttable until now
+            self.bridge_count += 1
+            self.cuttable.remove(new)
+        return True
+
+    def _smaller_side(self, child, up):
+        '''The nodes on the smaller side of the gap cutting child from up leaves in their tree: child's subtree, or the rest of the tree. The two are walked in step, so this costs about the smaller one's size plus the climb to the root.'''
+        top = up
+        while self.parent[top] is not None:
+            top = self.parent[top]
+        below, rest = [child], [top]
+        i = j = 0
+        children = self.children
+        while True:
+            if i == len(below):
+                return set(below)
+            below.extend(children[below[i]])
+            i += 1
+            if j == len(rest):
+                return set(rest)
+            rest.extend(node for node in children[rest[j]] if node != child)
+            j += 1
+
+    def _link(self, idx1, idx2):
+        self.nontree.add(_key(idx1, idx2))
+        self.across[idx1].add(idx2)
+        self.across[idx2].add(idx1)
+
+    def _unlink(self, idx1, idx2):
+        self.nontree.remove(_key(idx1, idx2))
+        self.across[idx1].remove(idx2)
+        self.across[idx2].remove(idx1)
+
+    def _path(self, idx1, idx2):
+        '''The tree edges (named by their lower node) between idx1 and idx2, or None if they are in different trees.'''
+        path = []
+        depth = self.depth
+        parent = self.parent
+        while depth[idx1] > depth[idx2]:
+            path.append(idx1)
+            idx1 = parent[idx1]
+            if idx1 is None:
+                return None#a root can sit deeper than another tree's nodes; see _replace()
+        while depth[idx2] > depth[idx1]:
+            path.append(idx2)
+            idx2 = parent[idx2]
+            if idx2 is None:
+                return None
+        while idx1 != idx2:
+            if parent[idx1] is None:
+                return None
+            path.append(idx1)
+            path.append(idx2)
+            idx1 = parent[idx1]
+            idx2 = parent[idx2]
+        return path
+
+
+def _key(idx1, idx2):
+    '''Order-free key for an undirected edge.'''
+    return (idx1, idx2) if idx1 <= idx2 else (idx2, idx1)
+
+
+def bridge_index(graph):
+    '''Returns the BridgeIndex attached to graph, building it if there isn't one yet, or if the graph has been edited behind its back (e.g. add_edge() called directly). The index lives on the graph object itself, so it goes away with the graph.'''
+    index = getattr(graph, '_bridge_index', None)
+    if index is None:
+        index = graph._bridge_index = BridgeIndex(graph)
+    elif index.edge_count != graph.number_of_edges() or len(index.parent) != graph.number_of_nodes():
+        index.rebuild()
+    return index
+
+
+def forget(graph):
+    '''Drop the index attached to graph; used when a graph is rebuilt wholesale.'''
+    graph.__dict__.pop('_bridge_index', None)
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+import itertools
+import numpy as np
+
+'''Restricting the edges a chain may add to a candidate set of nearby pairs. With all n(n-1)/2 pairs in play, nearly every proposed addition on a big input is a long edge that theta's weight term throws straight back out; with candidates, propose_new() only adds edges from the set, and Nmax and the q terms count the set instead of every pair. The sets are found with a uniform grid over the coordinates, with cells as wide as the search radius, so a point is only compared with the points in its own cell and the ones next to it: either every pair within a radius, or each node's k nearest neighbours (found by doubling a radius until each node has k inside it), which graphmcmc.kernels.LocalKernel also draws from. The pairs of the line graph make_graph() starts from are always included, so the candidate graph is connected and the chain can still reach every connected graph on it.'''
+
+
+class CandidateEdges(object):
+    '''A fixed set of pairs (u, v), u < v, on nodes 0..n-1, held as two sorted int64 arrays, first and second, for drawing from uniformly in O(1) without a Python object per pair.'''
+
+    def __init__(self, n, first, second):
+        self.n = n
+        self.first = np.asarray(first, dtype=np.int64)
+        self.second = np.asarray(second, dtype=np.int64)
+        self._numbers = self.first * n + self.second#sorted, since the pairs are
+        self._offsets = None#where each node's partners start in _partners, once neighbours() is asked
+        self._partners = None
+
+    def __len__(self):
+        return len(self.first)
+
+    def __iter__(self):
+        return zip(self.first.tolist(), self.second.tolist())
+
+    def __contains__(self, pair):
+        return self._place(pair) is not None
+
+    def __getitem__(self, place):
+        '''The pair at place in the sorted order.'''
+        return self.first.item(place), self.second.item(place)
+
+    def index(self, pair):
+        '''Where pair is in the sorted order (ValueError if it isn't a candidate).'''
+        place = self._place(pair)
+        if place is None:
+            raise ValueError('{} is not a candidate pair'.format(pair))
+        return place
+
+    def _place(self, pair):
+        u, v = pair
+        number = min(u, v) * self.n + max(u, v)
+        place = int(np.searchsorted(self._numbers, number))
+        return place if place < len(self._numbers) and self._numbers.item(place) == number else None
+
+    def random(self, rng):
+        '''A uniformly random candidate pair, drawn with rng (random.Random-like).'''
+        i = rng.randrange(len(self.first))
+        return self.first.item(i), self.second.item(i)
+
+    def neighbours(self, node):
+        '''The nodes node is paired with, as an int64 array; the first call builds the lookup for every node at once.'''
+        if self._partners is None:
+            ends = np.concatenate((self.first, self.second))
+            order = np.argsort(ends, kind='stable')
+            self._partners = np.concatenate((self.second, self.first))[order]
+            self._offsets = np.searchsorted(ends[order], np.arange(self.n + 1))
+        return self._partners[self._offsets[node]:self._offsets[node + 1]]
+
+
+def candidate_edges(coords, neighbours=None, radius=None):
+    '''The CandidateEdges for the points in coords (an N x d array): each node's neighbours nearest neighbours, or every pair within radius of each other, or both together, along with the line 0-1-2-...-(N-1).'''
+    if neighbours is None and radius is None:
+        raise ValueError('candidate edges need neighbours, a radius or both')
+    coords = _as_points(coords)
+    n = len(coords)
+    firsts = [np.arange(n - 1, dtype=np.int64)]#the starting line graph
+    seconds = [np.arange(1, n, dtype=np.int64)]
+    if neighbours is not None:
+        first, second = nearest_pairs(coords, neighbours)
+        firsts.append(first)
+        seconds.append(second)
+    if radius is not None:
+        first, second = radius_pairs(coords, radius)
+        firsts.append(first)
+        seconds.append(second)
+    numbers = np.unique(np.concatenate(firsts) * n + np.concatenate(seconds))
+    return CandidateEdges(n, numbers // n, numbers % n)
+
+
+def radius_pairs(coords, radius):
+    '''Every pair of points no further apart than radius, as two int64 arrays (first, second) with first < second.'''
+    coords = _as_points(coords)
+    if radius <= 0 or len(coords) < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    i, j, distance = _near(coords, np.arange(len(coords)), radius)
+    keep = i < j
+    return i[keep], j[keep]
+
+
+def nearest_pairs(coords, k):
+    '''Each point paired with its k nearest neighbours, as two int64 arrays (first, second) with first < second and no pair twice.'''
+    table = nearest_neighbours(coords, k)
+    n, k = table.shape
+    if k == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    first, second = np.repeat(np.arange(n, dtype=np.int64), k), table.ravel()
+    numbers = np.unique(np.minimum(first, second) * n + np.maximum(first, second))
+    return numbers // n, numbers % n
+
+
+def nearest_neighbours(coords, k):
+    '''Each point's k nearest neighbours (or all N - 1 others, if that's fewer), nearest first, as an N x k int64 array.'''
+    coords = _as_points(coords)
+    n = len(coords)
+    k = max(min(k, n - 1), 0)
+    table = np.empty((n, k), dtype=np.int64)
+    if k == 0:
+        return table
+    span = float((coords.max(axis=0) - coords.min(axis=0)).max())
+    radius = span * (k / n) ** (1.0 / coords.shape[1]) if span > 0 else 1.0#a cell of this width holds k points, if they're spread evenly over their box, and the ball a few times that
+    pending = np.arange(n)
+    while len(pending):
+        i, j, distance = _near(coords, pending, radius)
+        order = np.argsort(distance, kind='stable')
+        order = order[np.argsort(i[order], kind='stable')]#by node, and nearest first within each
+        i, j = i[order], j[order]
+        counts = np.bincount(i, minlength=n)[pending]
+        starts = np.searchsorted(i, pending)
+        rank = np.arange(len(i)) - np.repeat(starts, counts)
+        done = counts >= k#everything within radius is there, so the k nearest of those are the k nearest of all
+        keep = np.repeat(done, counts) & (rank < k)
+        table[pending[done]] = j[keep].reshape(-1, k)
+        pending = pending[~done]
+        radius *= 2
+    return table
+
+
+def _as_points(coords):
+    coords = np.asarray(coords, dtype=np.float64)
+    return coords.reshape(len(coords), -1) if coords.ndim == 1 else coords
+
+
+def _near(coords, queries, radius):
+    '''(i, j, distance) for every query point i and every other point j within radius of it, through a grid of cells radius wide.'''
+    dim = coords.shape[1]
+    cells = np.floor((coords - coords.min(axis=0)) / radius).astype(np.int64) + 1#a spare cell on each side, so no neighbour wraps round
+    strides = np.cumprod(np.concatenate(([1], cells.max(axis=0)[:-1] + 2)))
+    keys = cells.dot(strides)
+    order = np.argsort(keys, kind='stable')
+    ordered = keys[order]
+    found_i, found_j = [], []
+    for offset in itertools.product((-1, 0, 1), repeat=dim):
+        targets = keys[queries] + np.dot(offset, strides)
+        start = np.searchsorted(ordered, targets, side='left')
+        counts = np.searchsorted(ordered, targets, side='right') - start
+        total = int(counts.sum())
+        if not total:
+            continue
+        within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)#place of each match in its cell
+        found_i.append(np.repeat(queries, counts))
+        found_j.append(order[np.repeat(start, counts) + within])
+    if not found_i:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    i, j = np.concatenate(found_i), np.concatenate(found_j)
+    difference = coords[i] - coords[j]
+    distance = np.sqrt((difference * difference).sum(axis=1))
+    keep = (i != j) & (distance <= radius)
+    return i[keep], j[keep], distance[keep]
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+import binascii
+import os
+import numpy as np
+from graphmcmc.bridges import bridge_index
+from graphmcmc.candidates import CandidateEdges
+from graphmcmc.edgesets import edge_sets
+from graphmcmc.histogram import SpillingHistogram, read_records, write_records
+from graphmcmc.sampler import GraphMCMCSampler
+from graphmcmc.states import StateCodec
+
+'''Saving a chain part way through and picking it up again. A checkpoint is three files. The snapshot at path is a small .npz holding the current edge set, the random number generator's state, the running sums, the energy totals, the shortest-path tree, and the order of every set a proposal is drawn from (the non-edges of a dense graph are drawn by rank, not order, so they're worked out again from the edges); it's rewritten whole each time, through a temporary file and an atomic rename. The nodes, and the candidate edges if the chain is restricted to them, never change, so they go to a file beside it written once, with the log. The states histogram goes to that log, written in full the first time and after that only appended to, with the counts recorded since the previous checkpoint. The snapshot names the log and says how many bytes of it are good, so a crash at any point leaves the last complete checkpoint readable, and resuming continues the chain exactly as if it had never stopped. The heavy hitters summary, if there is one, isn't saved.'''
+
+VERSION = 7
+
+
+def save(sampler, path):
+    '''Checkpoint sampler to path. The first save to a path (or the first after make_graph()) writes the whole histogram to a new log; later ones append what's been recorded since.'''
+    fresh = sampler.pending is None or sampler.checkpoint_path != path
+    if fresh:
+        log = '{}.states-{}'.format(os.path.basename(path), binascii.hexlify(os.urandom(4)).decode())
+        records = _all_records(sampler)
+        with open(os.path.join(os.path.dirname(path), _nodes_file(log)), 'wb') as f:
+            np.savez(f,
+                     coords=sampler.coords,
+                     candidates=np.array([sampler.candidates.first, sampler.candidates.second] if sampler.candidates is not None else [[], []], dtype=np.int64))
+            f.flush()
+            os.fsync(f.fileno())
+    else:
+        log = sampler.checkpoint_log
+        records = ((key, entry[0], entry[1]) for key, entry in sorted(sampler.pending.items()))
+    log_path = os.path.join(os.path.dirname(path), log)
+    with open(log_path, 'wb' if fresh else 'ab') as f:
+        write_records(f, records)
+        f.flush()
+        os.fsync(f.fileno())
+        log_length = f.tell()
+    rng_version, rng_state, gauss = sampler.rng.getstate()
+    drawn = {}#what propose_new() draws from, in the order it's held, and the energy totals and shortest paths, for each graph
+    n = len(sampler.nodes)
+    for which, graph in enumerate(sampler.graphs()):
+        index, sets, energy = bridge_index(graph), edge_sets(graph), sampler._energy(graph)
+        paths = energy.paths
+        drawn['totals{}'.format(which)] = np.array([energy.weight_sum, paths.total], dtype=np.float64)
+        drawn['dist{}'.format(which)] = np.array([paths.dist.get(node, np.inf) for node in range(n)], dtype=np.float64)
+        drawn['tree{}'.format(which)] = np.array([-1 if paths.parent.get(node) is None else paths.parent[node] for node in range(n)], dtype=np.int64)
+        drawn['parent{}'.format(which)] = np.array([-1 if index.parent[node] is None else index.parent[node] for node in range(n)], dtype=np.int64)
+        drawn['cuttable{}'.format(which)] = _numbers(sampler.codec, index.cuttable)
+        drawn['edges{}'.format(which)] = _numbers(sampler.codec, sets.edges)
+        drawn['dense{}'.format(which)] = np.int64(sets.missing is not None)
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        np.savez(f,
+                 version=np.int64(VERSION),
+                 edges=sampler.codec.pair_array(sampler.graph.edges()),
+                 rng_state=np.array(rng_state, dtype=np.uint32),
+                 ints=np.array([rng_version, sampler.zero_degree_sum, sampler.edge_sum, sampler.steps, log_length, sampler.codec.masked, sampler.keep_states, sampler.mirror, sampler.samples, sampler.candidates is not None, -1 if sampler.codec.keep is None else sampler.codec.keep], dtype=np.int64),
+                 floats=np.array([sampler.r, sampler.T, sampler.long_short_sum, float('nan') if gauss is None else gauss], dtype=np.float64),
+                 backend=np.array(sampler.backend),
+                 log=np.array(log),
+                 **drawn)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+    if fresh and sampler.checkpoint_path is not None and sampler.checkpoint_log != log:
+        for old in (sampler.checkpoint_log, _nodes_file(sampler.checkpoint_log)):
+            old = os.path.join(os.path.dirname(sampler.checkpoint_path), old)
+            if os.path.exists(old):
+                os.remove(old)
+    sampler.checkpoint_path = path
+    sampler.checkpoint_log = log
+    sampler.pending = {}
+
+
+def resume(path, state_budget=None, kernel=None):
+    '''A GraphMCMCSampler in exactly the state the checkpoint at path was saved in; its steps attribute says how far the chain had got. Give state_budget to keep the histogram in a SpillingHistogram from here on. The proposal kernel isn't saved, so give kernel to carry on with the one the chain was running (the default AddCutKernel otherwise). Further saves to path carry on the same log.'''
+    with np.load(path) as data:
+        if int(data['version']) != VERSION:
+            raise ValueError('{} is a version {} checkpoint; this is version {}'.format(path, int(data['version']), VERSION))
+        edges = data['edges']
+        rng_state = tuple(data['rng_state'].tolist())
+        ints = data['ints'].tolist()
+        floats = data['floats'].tolist()
+        backend = str(data['backend'])
+        log = str(data['log'])
+        drawn = dict((name, data[name]) for name in data.files if name[-1] in '01')
+    rng_version, zero_degree_sum, edge_sum, steps, log_length, masked, keep_states, mirror, samples, restricted, keep = ints
+    r, T, long_short_sum, gauss = floats
+    with np.load(os.path.join(os.path.dirname(path), _nodes_file(log))) as data:
+        coords = data['coords']
+        candidates = data['candidates']
+    sampler = GraphMCMCSampler(r=r, T=T, backend=backend, keep_states=bool(keep_states), state_budget=state_budget, mirror=bool(mirror), kernel=kernel)
+    sampler.set_nodes(coords)
+    n = len(sampler.nodes)
+    sampler.codec = StateCodec(n, mask_pairs=n * (n - 1) // 2 if masked else -1, keep=None if keep < 0 else keep)
+    if restricted:
+        sampler.restrict(CandidateEdges(n, candidates[0], candidates[1]))
+    for u, v in sampler.codec.unpair(edges):
+        for graph in sampler.graphs():
+            graph.add_edge(u, v, weight=sampler.distances(u, v))
+    sampler.rng.setstate((rng_version, rng_state, None if gauss != gauss else gauss))
+    sampler.zero_degree_sum = zero_degree_sum
+    sampler.edge_sum = edge_sum
+    sampler.long_short_sum = long_short_sum
+    sampler.steps = steps
+    sampler.samples = samples
+    for which, graph in enumerate(sampler.graphs()):
+        energy = sampler._energy(graph)
+        dist = drawn['dist{}'.format(which)].tolist()
+        tree = drawn['tree{}'.format(which)].tolist()
+        energy.paths.restore(dict((node, d) for node, d in enumerate(dist) if d != float('inf')),
+                             dict((node, None if up < 0 else up) for node, up in enumerate(tree) if dist[node] != float('inf')))
+        energy.weight_sum, energy.paths.total = drawn['totals{}'.format(which)].tolist()#the running totals, to the last bit
+        parent = drawn['parent{}'.format(which)].tolist()
+        bridge_index(graph).restore(dict((node, None if up < 0 else up) for node, up in enumerate(parent)),
+                                    sampler.codec.unpair(drawn['cuttable{}'.format(which)]))
+        edge_sets(graph).restore(sampler.codec.unpair(drawn['edges{}'.format(which)]), bool(drawn['dense{}'.format(which)]))
+    log_path = os.path.join(os.path.dirname(path), log)
+    with open(log_path, 'rb') as f:
+        for key, count, extra in read_records(f, log_length):
+            _restore(sampler, key, count, extra)
+    if sampler.keep_states and not isinstance(sampler.states, SpillingHistogram):
+        sampler.codec.trim(sampler.states)#the log has every state that was ever among the most visited
+    with open(log_path, 'r+b') as f:
+        f.truncate(log_length)#anything past the snapshot's mark is from a save that never finished
+    sampler.checkpoint_path = path
+    sampler.checkpoint_log = log
+    sampler.pending = {}
+    return sampler
+
+
+def _nodes_file(log):
+    '''The name of the file of nodes and candidates that goes with the log called log.'''
+    base, tag = log.rsplit('.states-', 1)
+    return '{}.nodes-{}.npz'.format(base, tag)
+
+
+def _numbers(codec, pairs):
+    '''The edge numbers of pairs, in the order given.'''
+    return np.array([codec.pair(u, v) for u, v in pairs], dtype=np.int64)
+
+
+def _all_records(sampler):
+    '''The whole histogram as sorted (key, count, extra) records.'''
+    if not sampler.keep_states:
+        return []
+    if isinstance(sampler.states, SpillingHistogram):
+        return sampler.states.records()
+    edges = sampler.codec.edges
+    return ((key, sampler.states[key], edges.get(key)) for key in sorted(sampler.states))
+
+
+def _restore(sampler, key, count, extra):
+    '''Adds one log record back into the sampler's histogram.'''
+    states = sampler.states
+    if isinstance(states, SpillingHistogram):
+        states.add(key, count)
+        if extra is not None and key not in states.extra:
+            states.extra[key] = extra
+        return
+    states[key] = states.get(key, 0) + count
+    if extra is not None and key not in sampler.codec.edges:
+        sampler.codec.edges[key] = extra
@@ -2,13 +2,73 @@
 
 import click
 
+'''The graphmcmc console command. Only click is imported up front; NumPy, networkx and the sampler are imported inside the commands that use them, so "graphmcmc --help" and a mistyped option come back before any of them load, which matters when a scheduler launches thousands of short jobs.'''
 
-@click.command()
-def main(args=None):
-    """Console script for graphmcmc"""
-    click.echo("Replace this message by putting your code into "
-               "graphmcmc.cli.main")
-    click.echo("See click documentation at http://click.pocoo.org/")
+QUANTITIES = ('degree0', 'edges', 'longest')#get_stats() order, as diagnostics.QUANTITIES has it
+FORMATS = ('text', 'json', 'csv')
+
+
+@click.group()
+def main():
+    """Markov chain Monte Carlo over connected graphs on a fixed set of points"""
+
+
+@main.command()
+@click.argument('infile', type=click.Path(exists=True, dir_okay=False))
+@click.option('--steps', '-n', type=click.IntRange(min=0), default=10000, show_default=True, help='Steps per chain.')
+@click.option('-r', type=float, default=0.0, show_default=True, help='Weight of the total edge weight in theta.')
+@click.option('-T', 'T', type=float, default=1.0, show_default=True, help='Temperature.')
+@click.option('--seed', type=click.IntRange(min=0), help='Master seed; the output gives it back, so a run can be repeated.')
+@click.option('--chains', '-c', type=click.IntRange(min=1), default=1, show_default=True, help='Independent chains to run and pool.')
+@click.option('--workers', '-w', type=click.IntRange(min=1), help='Processes to run the chains in (default: one per core, or 1 for a single chain).')
+@click.option('--backend', '-b', type=click.Choice(('networkx', 'array', 'bitset', 'csr')), default='networkx', show_default=True, help='How each chain stores its graph.')
+@click.option('--neighbours', '-k', type=click.IntRange(min=1), help='Only add edges between each node and its this many nearest neighbours.')
+@click.option('--radius', type=click.FloatRange(min=0, min_open=True), help='Only add edges between nodes at most this far apart (with --neighbours, either will do).')
+@click.option('--kernel', type=click.Choice(('add-cut', 'rewire', 'local')), default='add-cut', show_default=True, help='How moves are proposed: add or cut an edge, also move edges\' ends about (rewire), or favour adding edges to near neighbours (local).')
+@click.option('--format', '-f', 'output_format', type=click.Choice(FORMATS), default='text', show_default=True, help='How to print the results.')
+@click.option('--output', '-o', type=click.File('w'), default='-', help='Write the results here instead of to standard output.')
+def run(infile, steps, r, T, seed, chains, workers, backend, neighbours, radius, kernel, output_format, output):
+    """Run chains over the points in INFILE (one comma-separated point per line) and report the expected degree of node 0, edge count and longest shortest path from node 0"""
+    from graphmcmc.kernels import make_kernel
+    from graphmcmc.parallel import run_chains
+    if workers is None and chains == 1:
+        workers = 1#no pool for a single chain
+    result = run_chains(chains, steps, workers=workers, infile=infile, r=r, T=T, seed=seed, backend=backend, neighbours=neighbours, radius=radius, kernel=make_kernel(kernel))
+    summary = {'infile': infile,
+               'steps': steps,
+               'chains': chains,
+               'r': r,
+               'T': T,
+               'backend': backend,
+               'neighbours': neighbours,
+               'radius': radius,
+               'kernel': kernel,
+               'seed': result['seed'],
+               'samples': result['samples'],
+               'stats': dict(zip(QUANTITIES, result['stats'])),
+               'stderr': dict(zip(QUANTITIES, [None if error != error else error for error in result['stderr']]))}#JSON has no nan
+    click.echo(_format(summary, output_format), file=output, nl=False)
+
+
+def _format(summary, output_format):
+    '''A run's summary as text, JSON or CSV.'''
+    if output_format == 'json':
+        import json
+        return json.dumps(summary, indent=2, sort_keys=True) + '\n'
+    if output_format == 'csv':
+        lines = ['quantity,mean,stderr']
+        for quantity in QUANTITIES:
+            error = summary['stderr'][quantity]
+            lines.append('{},{!r},{}'.format(quantity, summary['stats'][quantity], '' if error is None else repr(error)))
+        return '\n'.join(lines) + '\n'
+    stats, stderr = summary['stats'], summary['stderr']
+    lines = ['{chains} chain(s) of {steps} steps over {infile}, r = {r}, T = {T}, seed {seed}'.format(**summary)]
+    for label, quantity in (('expected degree of vertex 0', 'degree0'),
+                            ('expected number of edges', 'edges'),
+                            ('expected longest shortest path from 0', 'longest')):
+        error = '' if stderr[quantity] is None else ' +/- {:.4g}'.format(stderr[quantity])
+        lines.append('{:<38} {:.6g}{}'.format(label + ':', stats[quantity], error))
+    return '\n'.join(lines) + '\n'
 
 
 if __name__ == "__main__":
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+import math
+import warnings
+
+'''Convergence diagnostics, worked out as the chain runs. A ChainMonitor watches the quantities get_stats() averages (degree of node 0, edge count, longest shortest path), one state at a time, keeping Welford running means and variances, over the whole chain and over each of a fixed number of batches of it, from which the batch-means effective sample size and the split-R-hat of Gelman et al. come out at any point. run_until() steps one or more chains until every quantity has enough effective samples and their halves (across all the chains) agree, or gives up at max_steps and says so.'''
+
+QUANTITIES = ('degree0', 'edges', 'longest')#in get_stats() order
+BATCHES = 32#a monitor keeps between BATCHES and 2 * BATCHES full batches
+TARGET_ESS = 400
+MAX_RHAT = 1.01
+MAX_STEPS = 10 ** 6
+MIN_STEPS = 1000#batch means need batches longer than the chain's memory, so don't trust them on short runs
+CHECK_EVERY = 1000
+FLAT = 1e-12#variances this small, relative to the mean squared, are rounding error in a quantity that never changed
+
+
+class Welford(object):
+    '''Running mean and variance of a stream of equal-length tuples, by Welford's method, which doesn't lose precision the way summing squares does.'''
+
+    def __init__(self, width):
+        self.n = 0
+        self.mean = [0.0] * width
+        self.m2 = [0.0] * width#sum of squared deviations from the running mean
+
+    def add(self, values):
+        self.n += 1
+        n, mean, m2 = self.n, self.mean, self.m2
+        for i, x in enumerate(values):
+            delta = x - mean[i]
+            mean[i] += delta / n
+            m2[i] += delta * (x - mean[i])
+
+    def variance(self):
+        '''The sample variance of each entry (nan before there are two samples).'''
+        return [m / (self.n - 1) if self.n > 1 else float('nan') for m in self.m2]
+
+
+class ChainMonitor(object):
+    '''Watches one chain's quantities (width of them per sample): a Welford over every sample, plus the means and sums of squared deviations of consecutive batches of them, and how many times the chain moved to a new state in each. Batches start one sample long and double in length, two merging into one, whenever there get to be 2 * batches of them, so the memory stays fixed however long the chain runs.'''
+
+    def __init__(self, width=len(QUANTITIES), batches=BATCHES):
+        self.width = width
+        self.target = batches
+        self.reset()
+
+    def reset(self):
+        self.welford = Welford(self.width)
+        self.size = 1#samples per batch
+        self.batches = []#(means, sums of squared deviations, moves) of each full batch
+        self._batch = Welford(self.width)
+        self._moves = 0
+
+    @property
+    def samples(self):
+        return self.welford.n
+
+    def add(self, values, moved=False):
+        '''Adds one sample; moved says whether the chain got to it by moving to a new state.'''
+        self.welford.add(values)
+        self._batch.add(values)
+        self._moves += moved
+        if self._batch.n == self.size:
+            self.batches.append((self._batch.mean, self._batch.m2, self._moves))
+            self._batch = Welford(self.width)
+            self._moves = 0
+            if len(self.batches) == 2 * self.target:
+                batches, size = self.batches, self.size
+                self.batches = [_combine(batches[k], size, batches[k + 1], size) for k in range(0, len(batches), 2)]
+                self.size *= 2
+
+    def mean(self):
+        return list(self.welford.mean)
+
+    def variance(self):
+        return self.welford.variance()
+
+    def ess(self):
+        '''The batch-means effective sample size of each quantity: the samples so far, scaled down by how much more the batch means vary than independent samples would. A quantity that hasn't varied at all counts every sample if the chain has moved in both halves of its batches, and is nan (not converged) otherwise, since a chain that's stuck doesn't vary either.'''
+        count = len(self.batches)
+        n = self.samples
+        if count < 2:
+            return [float('nan')] * self.width
+        ess = []
+        for i, variance in enumerate(self.variance()):
+            means = [batch[0][i] for batch in self.batches]
+            centre = sum(means) / count
+            spread = self.size * sum((mean - centre) ** 2 for mean in means) / (count - 1)#the asymptotic variance, estimated
+            if variance <= FLAT * (1.0 + centre * centre):
+                ess.append(float(n) if self.moved() else float('nan'))
+            elif spread <= 0:
+                ess.append(float(n))
+            else:
+                ess.append(n * variance / spread)
+        return ess
+
+    def halves(self):
+        '''(samples, means, variances, moves) for the first and the second half of the full batches, as split-R-hat wants them; None before there are two full batches.'''
+        half = len(self.batches) // 2
+        if half == 0:
+            return None
+        return [_pool(self.batches[:half], self.size), _pool(self.batches[-half:], self.size)]
+
+    def moved(self):
+        '''Whether the chain has moved to a new state in each half of its full batches.'''
+        halves = self.halves()
+        return halves is not None and all(half[3] > 0 for half in halves)
+
+
+def split_rhat(monitors):
+    '''The split-R-hat of each quantity over the given monitors' chains, each cut into two halves: close to 1 when every half looks like a sample from the same distribution, and larger when the chains haven't mixed yet. nan until every chain has two full batches; the chains should have the same number of samples. A quantity that never varies is 1 if every half moved to a new state at least once, and nan (not converged) if one was stuck.'''
+    sequences = []
+    for monitor in monitors:
+        halves = monitor.halves()
+        if halves is None:
+            return [float('nan')] * monitors[0].width
+        sequences.extend(halves)
+    n = min(sequence[0] for sequence in sequences)
+    rhat = []
+    for i in range(monitors[0].width):
+        means = [sequence[1][i] for sequence in sequences]
+        within = sum(sequence[2][i] for sequence in sequences) / len(sequences)
+        centre = sum(means) / len(means)
+        between = n * sum((mean - centre) ** 2 for mean in means) / (len(means) - 1)
+        if within <= FLAT * (1.0 + centre * centre):
+            if between > FLAT * (1.0 + centre * centre):
+                rhat.append(float('inf'))#each half is stuck at its own value
+            else:
+                rhat.append(1.0 if all(sequence[3] > 0 for sequence in sequences) else float('nan'))
+            continue
+        rhat.append(math.sqrt(((n - 1) / n * within + between / n) / within))
+    return rhat
+
+
+def summary(monitors):
+    '''Where the monitored chains have got to, as a dict: the samples per chain, and for each quantity (in QUANTITIES order) the pooled mean, the mean within-chain variance, the total effective sample size, the Monte Carlo standard error of the mean and the split-R-hat.'''
+    width = monitors[0].width
+    chains = len(monitors)
+    mean = [sum(monitor.mean()[i] for monitor in monitors) / chains for i in range(width)]
+    variance = [sum(monitor.variance()[i] for monitor in monitors) / chains for i in range(width)]
+    ess = [sum(monitor.ess()[i] for monitor in monitors) for i in range(width)]
+    stderr = [math.sqrt(variance[i] / ess[i]) if ess[i] > 0 else float('nan') for i in range(width)]
+    return {'samples': [monitor.samples for monitor in monitors],
+            'mean': mean,
+            'variance': variance,
+            'ess': ess,
+            'stderr': stderr,
+            'rhat': split_rhat(monitors)}
+
+
+def converged(report, target_ess=TARGET_ESS, max_rhat=MAX_RHAT):
+    '''Whether a summary() meets the targets: at least target_ess effective samples and a split-R-hat of at most max_rhat for every quantity. nan counts as not there yet.'''
+    return all(ess >= target_ess for ess in report['ess']) and all(rhat <= max_rhat for rhat in report['rhat'])
+
+
+def run_until(samplers, target_ess=TARGET_ESS, max_steps=MAX_STEPS, max_rhat=MAX_RHAT, min_steps=MIN_STEPS, check_every=CHECK_EVERY):
+    '''Steps every sampler in turn, check_every steps at a time, until the states they visit from here on meet converged(target_ess, max_rhat) (and each has taken min_steps), or until each has taken max_steps. A sampler without a monitor gets a fresh ChainMonitor. Returns the final summary(), with the steps each sampler took and whether they converged; if they didn't, also warns with a RuntimeWarning.'''
+    for sampler in samplers:
+        if sampler.monitor is None:
+            sampler.monitor = ChainMonitor()
+    monitors = [sampler.monitor for sampler in samplers]
+    steps = 0
+    done = False
+    while steps < max_steps and not done:
+        block = min(check_every, max_steps - steps)
+        for sampler in samplers:
+            for i in range(block):
+                sampler.step()
+        steps += block
+        report = summary(monitors)
+        done = steps >= min_steps and converged(report, target_ess, max_rhat)
+    report = summary(monitors)
+    report['steps'] = steps
+    report['converged'] = done
+    if not done:
+        warnings.warn('No convergence after {} steps per chain: effective sample sizes {}, split-R-hat {}'.format(
+            steps, ', '.join('{:.0f}'.format(ess) for ess in report['ess']), ', '.join('{:.3f}'.format(rhat) for rhat in report['rhat'])), RuntimeWarning)
+    return report
+
+
+def _combine(first, count1, second, count2):
+    '''Two batches' (means, sums of squared deviations, moves) as one, by the pairwise update of Chan et al., which is to merging what Welford's method is to adding one sample.'''
+    total = count1 + count2
+    means, m2 = [], []
+    for mean1, mean2, m21, m22 in zip(first[0], second[0], first[1], second[1]):
+        delta = mean2 - mean1
+        means.append(mean1 + delta * count2 / total)
+        m2.append(m21 + m22 + delta * delta * count1 * count2 / total)
+    return means, m2, first[2] + second[2]
+
+
+def _pool(batches, size):
+    '''(samples, means, variances, moves) of the samples in a run of batches of size samples each.'''
+    pooled, samples = batches[0], size
+    for batch in batches[1:]:
+        pooled = _combine(pooled, samples, batch, size)
+        samples += size
+    variances = [m2 / (samples - 1) if samples > 1 else 0.0 for m2 in pooled[1]]
+    return samples, pooled[0], variances, pooled[2]
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+import numpy as np
+
+'''Edge weights straight from a NumPy array of node coordinates. For small inputs we work out every pairwise distance once, up front, into a dense float64 matrix; when an N x N matrix would be too big we fill a bounded cache as pairs are asked for instead. Any number of dimensions works.'''
+
+DENSE_BYTES = 1 << 28#largest dense matrix we'll build: 256 MB, i.e. about 5,800 nodes
+CACHE_SIZE = 1 << 20#most pairs the lazy cache will hold before it starts over
+BLOCK_BYTES = 1 << 24#size of each temporary array pairwise() makes: 16 MB, whatever the number of nodes or dimensions
+
+
+class DistanceTable(object):
+    '''Callable as table(idx1, idx2), returning the Euclidean distance between two nodes as a Python float.'''
+
+    def __init__(self, coords, dense_bytes=DENSE_BYTES, cache_size=CACHE_SIZE):
+        coords = np.asarray(coords, dtype=np.float64)
+        if coords.ndim == 1:
+            coords = coords.reshape(len(coords), -1)
+        self.coords = coords
+        self.cache_size = cache_size
+        count = len(coords)
+        self.dense = count * count * 8 <= dense_bytes
+        if self.dense:
+            self.matrix = pairwise(coords)
+        else:
+            self.matrix = None
+            self._cache = {}
+
+    def __call__(self, idx1, idx2):
+        if self.dense:
+            return self.matrix.item(idx1, idx2)#item() hands back a Python float without an array scalar in between
+        key = (idx1, idx2) if idx1 < idx2 else (idx2, idx1)
+        found = self._cache.get(key)
+        if found is None:
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()#cheaper than tracking recency, and chains revisit the same few edges anyway
+            diff = self.coords[idx1] - self.coords[idx2]
+            found = self._cache[key] = float(np.sqrt((diff * diff).sum()))#same arithmetic as pairwise(), so both paths agree to the bit
+        return found
+
+    def __len__(self):
+        return len(self.coords)
+
+
+def pairwise(coords, block_bytes=BLOCK_BYTES):
+    '''The full matrix of Euclidean distances between the rows of coords, built a block at a time so the temporary differences stay within block_bytes: as many whole rows as fit, or part of one row if a whole one doesn't.'''
+    count = len(coords)
+    matrix = np.empty((count, count), dtype=np.float64)
+    point_bytes = max(1, coords.shape[1] * 8)
+    rows = max(1, block_bytes // (point_bytes * max(1, count)))
+    cols = count if rows > 1 else max(1, block_bytes // point_bytes)
+    for start in range(0, count, rows):
+        for col in range(0, count, cols):
+            diff = coords[start:start+rows, np.newaxis, :] - coords[np.newaxis, col:col+cols, :]
+            np.sqrt((diff * diff).sum(axis=2), out=matrix[start:start+rows, col:col+cols])
+    return matrix
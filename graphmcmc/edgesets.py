@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from bisect import bisect_right
+import numpy as np
+
+'''Sets we can draw from uniformly in O(1). An IndexedSet keeps its items in a list plus a dict from each item to its place in the list; removing an item moves the last one into its hole, so adding, removing and picking a random item are all O(1). A RankedSet does the same in O(log size) for items numbered 0..size-1, but draws the k-th smallest for a uniformly random k, so what it draws depends only on what's in it. EdgeSets keeps a graph's edges in an IndexedSet and, once the graph is dense, its non-edges in a RankedSet, so propose_new() can draw an edge to add quickly at any density, and a checkpoint needn't save the non-edges. (The non-bridges, for cutting, are kept by the BridgeIndex.) A graph with a graphmcmc.candidates.CandidateEdges attached as _candidates only counts those pairs as possible edges, and draws its missing ones from among them.'''
+
+DENSE = 0.75#past this fraction of all possible edges we keep the non-edges explicitly...
+SPARSE = 0.5#...and below this we go back to drawing random pairs until one is missing
+
+
+class IndexedSet(object):
+    '''A set of hashable items with O(1) add, remove and uniform random choice.'''
+
+    def __init__(self, items=()):
+        self.items = []
+        self.index = {}
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item):
+        return item in self.index
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def add(self, item):
+        if item not in self.index:
+            self.index[item] = len(self.items)
+            self.items.append(item)
+
+    def remove(self, item):
+        '''Removes item, which must be there (KeyError if not).'''
+        place = self.index.pop(item)
+        last = self.items.pop()
+        if place < len(self.items):#it wasn't the last one: fill its hole with the last
+            self.items[place] = last
+            self.index[last] = place
+
+    def discard(self, item):
+        if item in self.index:
+            self.remove(item)
+
+    def choice(self, rng):
+        '''A uniformly random item, drawn with rng (random.Random-like).'''
+        return self.items[rng.randrange(len(self.items))]
+
+
+class RankedSet(object):
+    '''A set of items, each numbered from 0 to size - 1 by place(item) and got back by item(place), with O(log size) add, remove and uniform random choice, kept as a Fenwick tree over the places. The random choice is the item at a uniformly random rank, so unlike an IndexedSet's it doesn't depend on the order items came and went: a RankedSet rebuilt from the same items draws the same ones from the same random numbers. It costs 9 bytes per place, whatever it holds.'''
+
+    def __init__(self, size, place, item, items=()):
+        self.size = size
+        self.place = place
+        self.item = item
+        self.present = bytearray(size)
+        for thing in items:
+            self.present[place(thing)] = 1
+        self.count = sum(self.present)
+        counts = np.zeros(size + 1, dtype=np.int64)
+        counts[1:] = np.cumsum(np.frombuffer(bytes(self.present), dtype=np.uint8))
+        places = np.arange(1, size + 1)
+        self.tree = np.zeros(size + 1, dtype=np.int64)#tree[i] counts the places i - (i & -i) to i - 1
+        self.tree[1:] = counts[places] - counts[places - (places & -places)]
+        self.top = 1 << size.bit_length() if size else 0
+
+    def __contains__(self, thing):
+        return self.present[self.place(thing)] == 1
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        '''The items, in order of place.'''
+        item = self.item
+        return (item(place) for place in np.flatnonzero(np.frombuffer(bytes(self.present), dtype=np.uint8)).tolist())
+
+    def add(self, thing):
+        place = self.place(thing)
+        if not self.present[place]:
+            self.present[place] = 1
+            self.count += 1
+            self._shift(place, 1)
+
+    def remove(self, thing):
+        '''Removes thing, which must be there (KeyError if not).'''
+        place = self.place(thing)
+        if not self.present[place]:
+            raise KeyError(thing)
+        self.present[place] = 0
+        self.count -= 1
+        self._shift(place, -1)
+
+    def discard(self, thing):
+        if thing in self:
+            self.remove(thing)
+
+    def choice(self, rng):
+        '''A uniformly random item, drawn with rng (random.Random-like): the one at a random rank.'''
+        rank = rng.randrange(self.count)
+        tree, size = self.tree, self.size
+        place, step = 0, self.top
+        while step:
+            if place + step <= size and tree.item(place + step) <= rank:
+                place += step
+                rank -= tree.item(place)
+            step >>= 1
+        return self.item(place)
+
+    def _shift(self, place, amount):
+        tree, size = self.tree, self.size
+        place += 1
+        while place <= size:
+            tree[place] += amount
+            place += place & -place
+
+
+class EdgeSets(object):
+    '''The edges of a graph on nodes 0..n-1 as an IndexedSet of (smaller, larger) pairs, plus its non-edges as a RankedSet while more than DENSE of all possible edges are there. While the graph is sparser than that, a random pair of nodes is missing at least a quarter of the time, so drawing pairs until one is missing is quick and needs no memory; above it we draw from the kept non-edges instead, which cost at most a quarter of all pairs to keep. With candidates, the possible edges are just the candidate pairs, and the random pairs are drawn from them.'''
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.retries = 0#pairs random_missing() has drawn and thrown back, for graphmcmc.profiling
+        self.rebuild()
+
+    def rebuild(self):
+        self.n = self.graph.number_of_nodes()
+        self.candidates = getattr(self.graph, '_candidates', None)
+        self.pairs = self.n * (self.n - 1) // 2 if self.candidates is None else len(self.candidates)
+        self.edges = IndexedSet(sorted(_key(u, v) for u, v in self.graph.edges()))
+        self.missing = None
+        self._check_density()
+
+    def restore(self, edges, dense):
+        '''Put the sets back as saved, with the edges in the same order, so random draws from them come out the same; dense says whether we were keeping the non-edges, which are worked out again from the edges. Used by graphmcmc.checkpoint.'''
+        self.edges = IndexedSet(edges)
+        self.missing = self._missing() if dense else None
+
+    def add(self, u, v):
+        '''Note that u-v has been (or is about to be) added to the graph.'''
+        key = _key(u, v)
+        self.edges.add(key)
+        if self.missing is not None:
+            self.missing.discard(key)
+        self._check_density()
+
+    def remove(self, u, v):
+        '''Note that u-v has been (or is about to be) cut from the graph.'''
+        key = _key(u, v)
+        self.edges.discard(key)
+        if self.missing is not None:
+            self.missing.add(key)
+        self._check_density()
+
+    def random_edge(self, rng):
+        '''A uniformly random edge of the graph.'''
+        return self.edges.choice(rng)
+
+    def random_missing(self, rng):
+        '''A uniformly random pair of nodes with no edge between them, from among the candidates if there are any (the graph mustn't have every possible edge).'''
+        if self.missing is not None:
+            return self.missing.choice(rng)
+        if self.candidates is not None:
+            return self._random_candidate(rng)
+        randint = rng.randint
+        edges = self.edges
+        n = self.n
+        u, v = randint(0, n - 1), randint(0, n - 1)
+        retries = 0
+        while(u == v or _key(u, v) in edges):
+            u = randint(0, n - 1)
+            v = randint(0, n - 1)
+            retries += 1
+        self.retries += retries
+        return u, v
+
+    def _random_candidate(self, rng):
+        candidates, edges = self.candidates, self.edges
+        pair = candidates.random(rng)
+        retries = 0
+        while(pair in edges):
+            pair = candidates.random(rng)
+            retries += 1
+        self.retries += retries
+        return pair
+
+    def _check_density(self):
+        if self.missing is None and len(self.edges) > DENSE * self.pairs:
+            self.missing = self._missing()
+        elif self.missing is not None and len(self.edges) < SPARSE * self.pairs:
+            self.missing = None
+
+
+    def _missing(self):
+        '''The non-edges, as a RankedSet over the candidates' places, or over the pair numbers graphmcmc.states uses.'''
+        edges = self.edges
+        if self.candidates is not None:
+            candidates = self.candidates
+            return RankedSet(len(candidates), candidates.index, candidates.__getitem__, (pair for pair in candidates if pair not in edges))
+        n = self.n
+        firsts = [u * (2 * n - u - 1) // 2 for u in range(n)]#the number of each node's first pair
+        def place(pair):
+            return firsts[pair[0]] + pair[1] - pair[0] - 1
+        def item(number):
+            u = bisect_right(firsts, number) - 1
+            return u, number - firsts[u] + u + 1
+        return RankedSet(self.pairs, place, item, ((u, v) for u in range(n) for v in range(u + 1, n) if (u, v) not in edges))
+
+
+def _key(u, v):
+    return (u, v) if u <= v else (v, u)
+
+
+def edge_sets(graph):
+    '''Returns the EdgeSets attached to graph, building them if there aren't any yet, or if the graph has been edited behind their back. Like the bridge index, they live on the graph object itself.'''
+    sets = getattr(graph, '_edge_sets', None)
+    if sets is None:
+        sets = graph._edge_sets = EdgeSets(graph)
+    elif len(sets.edges) != graph.number_of_edges() or sets.n != graph.number_of_nodes():
+        sets.rebuild()
+    return sets
+
+
+def forget(graph):
+    '''Drop the EdgeSets attached to graph; used when a graph is rebuilt wholesale.'''
+    graph.__dict__.pop('_edge_sets', None)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+from collections import namedtuple
+from graphmcmc.paths import ShortestPaths
+
+'''Running-total evaluation of theta = r * (sum of edge weights) + (sum of shortest path lengths from 0). Rather than re-summing the whole graph for the current state and again for the proposal, we keep both sums up to date and ask how much a single move would change them.'''
+
+ADD = 'add'
+CUT = 'cut'
+Move = namedtuple('Move', ['kind', 'u', 'v'])#a proposal: add or cut the edge u-v
+
+
+class Energy(object):
+    '''Keeps theta for one graph as running totals. weight(u, v) reads the weight of an edge in the graph (by default the graph's own weight() if it has one, as the array backends do, or else the 'weight' attribute); edge_weight(u, v) gives the weight an edge would have if we added it, and defaults to weight.'''
+
+    def __init__(self, graph, r=0.0, weight=None, edge_weight=None, source=0):
+        self.graph = graph
+        self.r = r
+        if weight is None:
+            weight = getattr(graph, 'weight', None)#the array backends know their own weights
+        if weight is None:
+            weight = lambda u, v: graph[u][v]['weight']
+        self.weight = weight
+        self.edge_weight = edge_weight if edge_weight is not None else weight
+        self.source = source
+        self.rebuild()
+
+    def rebuild(self):
+        '''Recompute both totals from scratch.'''
+        self.paths = ShortestPaths(self.graph, self.source, self.weight)
+        self.weight_sum = 0.0
+        for edge in self.graph.edges():
+            self.weight_sum += self.weight(edge[0], edge[1])
+        self.edge_count = self.graph.number_of_edges()
+        self.node_count = self.graph.number_of_nodes()
+        self._pending = None
+
+    def theta(self):
+        '''The current value of theta.'''
+        return self.r * self.weight_sum + self.paths.total
+
+    def longest(self):
+        '''The longest of the shortest paths out of the source.'''
+        return self.paths.longest()
+
+    def delta_theta(self, move):
+        '''theta(after the move) - theta(now), without changing anything. The work it does is kept, so apply()ing the same move straight afterwards is free.'''
+        weight, changes = self._evaluate(move)
+        sign = 1 if move.kind == ADD else -1
+        return sign * self.r * weight + self.paths.delta(changes)
+
+    def apply(self, move):
+        '''Fold a move into the totals. Call it right before making the same change to the graph itself.'''
+        weight, changes = self._evaluate(move)
+        self.paths.apply(changes)
+        if move.kind == ADD:
+            self.weight_sum += weight
+            self.edge_count += 1
+        else:
+            self.weight_sum -= weight
+            self.edge_count -= 1
+        self._pending = None
+
+    def _evaluate(self, move):
+        '''Returns (edge weight, shortest-path changes) for a move, reusing the last evaluation if it was for the same move.'''
+        key = (move.kind, min(move.u, move.v), max(move.u, move.v))
+        if self._pending is not None and self._pending[0] == key:
+            return self._pending[1]
+        if move.kind == ADD:
+            weight = self.edge_weight(move.u, move.v)
+            result = (weight, self.paths.propose_insert(move.u, move.v, weight))
+        else:
+            result = (self.weight(move.u, move.v), self.paths.propose_delete(move.u, move.v))
+        self._pending = (key, result)
+        return result
+
+
+def energy_of(graph, edge_weight=None):
+    '''Returns the Energy attached to graph, building it if there isn't one yet or if the graph has been edited without going through Energy.apply(). Like the bridge index, it lives on the graph object itself.'''
+    energy = getattr(graph, '_energy', None)
+    if energy is None:
+        energy = graph._energy = Energy(graph, edge_weight=edge_weight)
+    elif energy.edge_count != graph.number_of_edges() or energy.node_count != graph.number_of_nodes():
+        energy.rebuild()
+    if edge_weight is not None:
+        energy.edge_weight = edge_weight
+    return energy
+
+
+def forget(graph):
+    '''Drop the Energy attached to graph; used when a graph is rebuilt wholesale.'''
+    graph.__dict__.pop('_energy', None)
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+import heapq
+import os
+import shutil
+import struct
+import tempfile
+import weakref
+from operator import itemgetter
+
+'''A states histogram that stays inside a fixed memory budget. Counts pile up in an ordinary dict until it holds budget keys; then the dict is written out, sorted by key, as a run file in a scratch directory and emptied. Reading the histogram merges the runs and the dict on the fly, adding up the counts of keys that turn up in more than one of them, so a chain can record every state it visits for as long as it likes while its memory use stays flat. Keys are the non-negative integer keys from graphmcmc.states.'''
+
+BUDGET = 1 << 20#keys held in memory before a spill
+MAX_RUNS = 64#past this many run files, they're merged into one
+_HEADER = struct.Struct('<HQI')#key length, count, extra length
+
+
+class SpillingHistogram(object):
+    '''Counts keys in memory up to budget of them, spilling sorted runs to files in directory (a fresh temporary directory by default) beyond that. extra holds optional bytes to keep alongside a key, as SpaceSaving.extra does; they're spilled and merged with it. add() and the in-memory dict are cheap; anything that looks a key up or walks the whole histogram reads every run. clear() or close() deletes the run files (and the scratch directory); if neither is called, they go when the histogram is garbage collected, or at exit.'''
+
+    def __init__(self, budget=BUDGET, directory=None):
+        self.budget = budget
+        self.directory = directory
+        self.scratch = False#whether we made directory ourselves, and so may delete it
+        self.counts = {}#the keys since the last spill
+        self.extra = {}
+        self.runs = []#paths of the run files, oldest first
+        self.spills = 0
+        self.length = 0#the number of distinct keys, when known
+        self.cleanup = None#deletes the runs (and scratch directory) if we're dropped before clear()
+
+    def add(self, key, count=1):
+        '''Counts count more visits to key. Returns True if key isn't among those held in memory (so it may be new, and the caller may want to set its extra).'''
+        counts = self.counts
+        if key in counts:
+            counts[key] += count
+            return False
+        if len(counts) >= self.budget:
+            self.spill()#before counting key, so an extra set for it lands with it
+        self.counts[key] = count
+        self.length = None if self.runs else len(self.counts)#it may be in a run already
+        return True
+
+    def spill(self):
+        '''Writes the keys in memory out as a new run, and forgets them.'''
+        if not self.counts:
+            return
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix='graphmcmc-states-')
+            self.scratch = True
+        if self.cleanup is None:
+            self.cleanup = weakref.finalize(self, _remove, self.runs, self.directory if self.scratch else None)
+        path = os.path.join(self.directory, 'run{:06d}.bin'.format(self.spills))
+        self.spills += 1
+        _write_run(path, self._memory())
+        self.runs.append(path)
+        self.counts = {}
+        self.extra = {}
+        if len(self.runs) > MAX_RUNS:
+            self.compact()
+
+    def compact(self):
+        '''Merges every run into one.'''
+        if len(self.runs) < 2:
+            return
+        path = os.path.join(self.directory, 'run{:06d}.bin'.format(self.spills))
+        self.spills += 1
+        _write_run(path, _merge([_read_run(run) for run in self.runs]))
+        for run in self.runs:
+            os.remove(run)
+        self.runs[:] = [path]#in place, as cleanup holds on to the list
+
+    def records(self):
+        '''Every (key, count, extra) in the histogram, in key order, with the counts totalled across runs. extra is None where nothing was kept.'''
+        return _merge([_read_run(run) for run in self.runs] + [self._memory()])
+
+    def items(self):
+        for key, count, extra in self.records():
+            yield key, count
+
+    def keys(self):
+        for key, count, extra in self.records():
+            yield key
+
+    def values(self):
+        for key, count, extra in self.records():
+            yield count
+
+    def __iter__(self):
+        return self.keys()
+
+    def __len__(self):
+        '''The number of distinct keys. Once anything has been spilled, that takes a pass over every run, so the answer is kept until a key that isn't in memory is added.'''
+        if self.length is None:
+            self.length = sum(1 for record in self.records())
+        return self.length
+
+    def get(self, key, default=None):
+        '''The count of key, or default if it hasn't been seen. This reads each run up to where key would be, so it costs O(runs) file reads and up to the whole histogram's size; for many keys, make one pass over records() instead.'''
+        count = self.counts.get(key, 0)
+        for run in self.runs:
+            for found, run_count, extra in _read_run(run):
+                if found >= key:
+                    if found == key:
+                        count += run_count
+                    break
+        return count if count else default
+
+    def __getitem__(self, key):
+        count = self.get(key)
+        if count is None:
+            raise KeyError(key)
+        return count
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def find_extra(self, keys):
+        '''The extra kept for each of the given keys that has one, as a dict; one pass over the runs.'''
+        wanted = set(keys)
+        found = {}
+        for key, count, extra in self.records():
+            if key in wanted and extra is not None:
+                found[key] = extra
+        return found
+
+    def clear(self):
+        '''Empties the histogram and deletes its run files (and the scratch directory, if we made it).'''
+        if self.cleanup is not None:
+            self.cleanup()
+            self.cleanup = None
+        if self.scratch:
+            self.directory = None
+            self.scratch = False
+        self.runs = []
+        self.counts = {}
+        self.extra = {}
+        self.length = 0
+
+    def close(self):
+        '''Deletes the run files and scratch directory now rather than when the histogram is collected. The histogram is left empty.'''
+        self.clear()
+
+    def _memory(self):
+        extra = self.extra
+        return ((key, self.counts[key], extra.get(key)) for key in sorted(self.counts))
+
+
+def write_records(f, records):
+    '''Writes (key, count, extra) records to the binary file f, in the format run files use.'''
+    for key, count, extra in records:
+        packed = key.to_bytes((key.bit_length() + 7) // 8, 'little')
+        extra = b'' if extra is None else extra
+        f.write(_HEADER.pack(len(packed), count, len(extra)))
+        f.write(packed)
+        f.write(extra)
+
+
+def read_records(f, end=None):
+    '''Reads back what write_records() wrote to f, up to byte offset end if one is given.'''
+    while end is None or f.tell() < end:
+        header = f.read(_HEADER.size)
+        if not header:
+            return
+        key_length, count, extra_length = _HEADER.unpack(header)
+        key = int.from_bytes(f.read(key_length), 'little')
+        extra = f.read(extra_length) if extra_length else None
+        yield key, count, extra
+
+
+def _write_run(path, records):
+    with open(path, 'wb') as f:
+        write_records(f, records)
+
+
+def _read_run(path):
+    with open(path, 'rb') as f:
+        for record in read_records(f):
+            yield record
+
+
+def _remove(runs, directory):
+    '''Deletes the run files, and directory with them if it's given.'''
+    for run in runs:
+        try:
+            os.remove(run)
+        except OSError:
+            pass
+    if directory is not None:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _merge(streams):
+    '''k-way merge of key-sorted (key, count, extra) streams, totalling the counts of equal keys and keeping the first extra found.'''
+    current = None
+    for key, count, extra in heapq.merge(*streams, key=itemgetter(0)):
+        if current is not None and current[0] == key:
+            current[1] += count
+            if current[2] is None:
+                current[2] = extra
+            continue
+        if current is not None:
+            yield tuple(current)
+        current = [key, count, extra]
+    if current is not None:
+        yield tuple(current)
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+import math
+from collections import namedtuple
+from graphmcmc.bridges import bridge_index
+from graphmcmc.candidates import nearest_neighbours
+from graphmcmc.edgesets import edge_sets
+from graphmcmc.energy import ADD, CUT, Move
+
+'''Proposal kernels: what a GraphMCMCSampler proposes at each step, and the Hastings term that goes with it. A kernel is any object with two methods. propose(state, rng) returns the move to weigh from the state's current graph (state is the sampler), or None to propose staying where we are. log_q_ratio(state, move) is log q(i|j) - log q(j|i) for that move, where i is the current graph and j the one the move leads to, asked before the move is made. Both are answered from what the sampler already keeps up to date as it goes (the edge count, the bridge index, the edge sets, the candidate set), never by walking the graph, so a kernel costs a step the same whatever its graph looks like. The sampler accepts a move with probability min(1, pi_j q(i|j) / (pi_i q(j|i))).
+
+AddCutKernel is the chain's original proposal and the default. RewireKernel moves an edge's end somewhere else, keeping the edge count, and LocalKernel prefers to add edges between near neighbours; MixtureKernel runs kernels side by side, as RewireKernel needs, since on its own it can't change the edge count. make_kernel() builds them by the names in KERNELS.'''
+
+REWIRE = 'rewire'
+
+
+class Rewire(namedtuple('Rewire', ['kind', 'cut', 'add'])):
+    '''A compound proposal: make the CUT Move cut, then the ADD Move add. kind is REWIRE.'''
+    __slots__ = ()
+
+    @property
+    def parts(self):
+        return (self.cut, self.add)
+
+
+def parts(move):
+    '''The single moves a proposal is made of, in the order they're made: just itself for an ADD or CUT Move, and a compound proposal's parts otherwise.'''
+    return getattr(move, 'parts', (move,))
+
+
+class ProposalKernel(object):
+    '''The kernel interface, for reference and to subclass if you like; a kernel needn't. kinds names the kinds of move it proposes, which have to include the kind of each one's way back.'''
+
+    kinds = ()
+
+    def propose(self, state, rng):
+        raise NotImplementedError
+
+    def log_q_ratio(self, state, move):
+        raise NotImplementedError
+
+
+class AddCutKernel(ProposalKernel):
+    '''Adds an edge or cuts one, adding with probability (Nmax - edges) / (Nmax - Nmin): 1 on a tree and 0 on the complete graph (see GraphMCMCSampler.add_or_cut()). An addition is drawn uniformly from the missing edges (the missing candidates, on a restricted sampler) and a cut uniformly from the non-bridges, so the graph stays connected.'''
+
+    kinds = (ADD, CUT)
+
+    def propose(self, state, rng):
+        graph = state.graph
+        prob_add = ( state.Nmax - graph.number_of_edges() ) / ( state.Nmax - state.Nmin )
+        if rng.random() < prob_add:
+            u, v = edge_sets(graph).random_missing(rng)
+            return Move(ADD, u, v)
+        u, v = bridge_index(graph).random_nonbridge(rng)
+        return Move(CUT, u, v)
+
+    def q(self, state, move, reverse=False):
+        '''q(j|i), the probability of proposing move from the state's current graph i; or with reverse, q(i|j), the probability of proposing the way back from the graph j the move leads to. The edge count and the bridge index give both.'''
+        Nmin, Nmax = state.Nmin, state.Nmax
+        graph = state.graph
+        edges = graph.number_of_edges()
+        if reverse:
+            if move.kind == ADD:#back by cutting the new edge out of j, one of j's non-bridges
+                prob_cut = float(1.0) - ( Nmax - (edges + 1) ) / ( Nmax - Nmin )
+                return prob_cut / bridge_index(graph).nonbridge_count_after_insert(move.u, move.v)
+            prob_add = ( Nmax - (edges - 1) ) / ( Nmax - Nmin )#back by adding the cut edge to j
+            return prob_add / ( Nmax - (edges - 1) )
+        prob_add = ( Nmax - edges ) / ( Nmax - Nmin )
+        if move.kind == ADD:
+            return prob_add / ( Nmax - edges )
+        cuttable = bridge_index(graph).nonbridge_count()
+        return ( (float(1.0) - prob_add) / cuttable ) if cuttable > 0 else 0
+
+    def log_q_ratio(self, state, move):
+        return math.log(self.q(state, move, reverse=True)) - math.log(self.q(state, move))
+
+
+class RewireKernel(ProposalKernel):
+    '''Picks an edge uniformly and one of its ends (the anchor) at random, and proposes moving the other end to a node drawn uniformly from those the anchor isn't joined to (and, on a restricted sampler, is a candidate partner of). A bridge can't be moved without disconnecting the graph, so picking one proposes staying put instead. The way back is the same kind of draw with the same counts -- the edge count doesn't change, and neither does the anchor's degree -- so the kernel is symmetric and log_q_ratio() is 0. The edge count never changes either, so mix it with AddCutKernel in a MixtureKernel rather than running it alone. A replacement end is drawn by rejection, so it takes about n / (non-neighbours of the anchor) tries; cheap on the sparse graphs the chain spends its time in.'''
+
+    kinds = (REWIRE,)
+
+    def propose(self, state, rng):
+        graph = state.graph
+        u, v = edge_sets(graph).random_edge(rng)
+        anchor, end = (u, v) if rng.random() < 0.5 else (v, u)
+        if bridge_index(graph).is_bridge(u, v):
+            return None
+        degree = graph.degree(anchor)
+        if state.candidates is not None:
+            partners = state.candidates.neighbours(anchor)
+            if len(partners) == degree:
+                return None#joined to all of them already
+            other = partners.item(rng.randrange(len(partners)))
+            while graph.has_edge(anchor, other):
+                other = partners.item(rng.randrange(len(partners)))
+        else:
+            n = len(state.nodes)
+            if degree == n - 1:
+                return None
+            other = rng.randrange(n)
+            while other == anchor or graph.has_edge(anchor, other):
+                other = rng.randrange(n)
+        return Rewire(REWIRE, Move(CUT, anchor, end), Move(ADD, anchor, other))
+
+    def log_q_ratio(self, state, move):
+        return 0.0
+
+
+class LocalKernel(AddCutKernel):
+    '''AddCutKernel with a bias towards short edges: with probability local, it instead picks a node uniformly and proposes adding the edge to one of its neighbours nearest neighbours, drawn uniformly (staying put if they're already joined, or if the pair isn't a candidate on a restricted sampler). The rest of the time it proposes just as AddCutKernel does. An addition's q is the sum of the two ways of proposing it, and the local way's share is looked up in the nearest-neighbour table, kept for as long as the sampler keeps its coordinates; so q costs O(neighbours) on top of AddCutKernel's.'''
+
+    def __init__(self, neighbours=8, local=0.5):
+        if not 0 <= local < 1:
+            raise ValueError('local must be at least 0 and less than 1 (or nothing is ever cut), not {}'.format(local))
+        self.neighbours = neighbours
+        self.local = local
+        self._coords = None
+        self._table = None
+
+    def nearest(self, state):
+        '''The state's nearest-neighbour table, an N x neighbours int64 array (see graphmcmc.candidates.nearest_neighbours()).'''
+        if self._coords is not state.coords:
+            self._table = nearest_neighbours(state.coords, self.neighbours)
+            self._coords = state.coords
+        return self._table
+
+    def propose(self, state, rng):
+        table = self.nearest(state)
+        if table.shape[1] == 0 or rng.random() >= self.local:
+            return AddCutKernel.propose(self, state, rng)
+        u = rng.randrange(len(table))
+        v = table.item(u, rng.randrange(table.shape[1]))
+        if state.graph.has_edge(u, v) or (state.candidates is not None and (u, v) not in state.candidates):
+            return None
+        return Move(ADD, min(u, v), max(u, v))
+
+    def q(self, state, move, reverse=False):
+        base = (1 - self.local) * AddCutKernel.q(self, state, move, reverse)
+        if (move.kind == ADD) == reverse:#a cut, either way: only AddCutKernel's draw proposes those
+            return base
+        return base + self.local * self._local_q(state, move.u, move.v)
+
+    def _local_q(self, state, u, v):
+        '''The probability the local draw picks the edge u-v, when it's missing.'''
+        table = self.nearest(state)
+        if table.shape[1] == 0 or (state.candidates is not None and (u, v) not in state.candidates):
+            return 0.0
+        ways = int((table[u] == v).any()) + int((table[v] == u).any())
+        return ways / (len(table) * table.shape[1])
+
+
+class MixtureKernel(ProposalKernel):
+    '''Proposes with one of kernels at each step, chosen with probability proportional to weights (equal, by default). The kernels must propose disjoint kinds of move, so each move, and its way back, comes from one kernel alone; the weights then cancel out of the Hastings term, and log_q_ratio() is that kernel's.'''
+
+    def __init__(self, kernels, weights=None):
+        self.kernels = list(kernels)
+        weights = [1.0] * len(self.kernels) if weights is None else [float(weight) for weight in weights]
+        if len(weights) != len(self.kernels) or not self.kernels or min(weights) <= 0:
+            raise ValueError('a mixture needs a positive weight for each of its kernels')
+        self.owner = {}
+        for kernel in self.kernels:
+            for kind in kernel.kinds:
+                if kind in self.owner:
+                    raise ValueError('more than one kernel proposes {} moves'.format(kind))
+                self.owner[kind] = kernel
+        self.kinds = tuple(self.owner)
+        total = sum(weights)
+        self.cumulative = []
+        running = 0.0
+        for weight in weights:
+            running += weight / total
+            self.cumulative.append(running)
+
+    def propose(self, state, rng):
+        rand = rng.random()
+        for kernel, bound in zip(self.kernels, self.cumulative):
+            if rand < bound:
+                break
+        return kernel.propose(state, rng)
+
+    def log_q_ratio(self, state, move):
+        return self.owner[move.kind].log_q_ratio(state, move)
+
+
+KERNELS = {'add-cut': AddCutKernel,
+           'rewire': lambda: MixtureKernel([AddCutKernel(), RewireKernel()]),
+           'local': LocalKernel}
+
+
+def make_kernel(name):
+    '''A new kernel with its default settings, by its name in KERNELS: 'add-cut' (AddCutKernel), 'rewire' (AddCutKernel and RewireKernel, half the steps each) or 'local' (LocalKernel).'''
+    try:
+        return KERNELS[name]()
+    except KeyError:
+        raise ValueError('no kernel called {!r}; there are {}'.format(name, ', '.join(sorted(KERNELS))))
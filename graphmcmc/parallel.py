@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+import math
+import numpy as np
+from graphmcmc.sampler import GraphMCMCSampler
+from graphmcmc.states import StateCodec
+
+'''Running many independent chains at once. Each chain is a GraphMCMCSampler of its own, seeded from one master seed through NumPy's SeedSequence so the streams are independent and the whole batch can be reproduced. Chains are spread over a process pool and their state counts and running sums are merged into one result.'''
+
+
+def chain_seeds(n_chains, seed=None):
+    '''Returns (master entropy, list of n_chains integer seeds). Passing the entropy back in as seed reproduces the same list.'''
+    master = np.random.SeedSequence(seed)
+    seeds = []
+    for child in master.spawn(n_chains):
+        words = child.generate_state(2, dtype=np.uint32)
+        seeds.append(int(words[0]) << 32 | int(words[1]))
+    return master.entropy, seeds
+
+
+def run_chains(n_chains, nsteps, workers=None, infile=None, nodes=None, r=0.0, T=1.0, seed=None, backend='networkx', neighbours=None, radius=None, kernel=None):
+    '''Runs n_chains independent chains of nsteps steps each, from the nodes in infile (or the given list of points), over a pool of workers processes (all cores by default; workers=1 runs them one after another in this process). backend, neighbours, radius and kernel (a proposal kernel, see graphmcmc.kernels) are handed to each GraphMCMCSampler. Returns a dict with:
+
+    seed -- the master entropy; pass it back as seed to rerun the same chains
+    chains -- one dict per chain with its seed, stats, sums and samples
+    states -- every chain's state counts added together, keyed as in graphmcmc.states
+    codec -- the StateCodec that decodes those keys back to edge lists
+    sums -- the pooled (zero degree, edge, longest shortest) running sums
+    samples -- the pooled number of recorded states
+    stats -- the pooled estimates, in the same order as get_stats()
+    stderr -- the standard error of each estimate across chains'''
+    if nodes is None:
+        loader = GraphMCMCSampler()
+        loader.read_file(infile)
+        nodes = loader.coords#pickles as one buffer, not a tuple per point
+    entropy, seeds = chain_seeds(n_chains, seed)
+    jobs = [(nodes, r, T, chain_seed, nsteps, backend, neighbours, radius, kernel) for chain_seed in seeds]
+    if workers == 1:
+        chains = [_run_chain(job) for job in jobs]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chains = list(pool.map(_run_chain, jobs))
+    merged = merge_chains(chains)
+    merged['seed'] = entropy
+    return merged
+
+
+def merge_chains(chains):
+    '''Pools the per-chain results from _run_chain() into one result (see run_chains()).'''
+    states = {}
+    codec = StateCodec(chains[0]['codec'].n)
+    sums = [0, 0, 0]
+    samples = 0
+    for chain in chains:
+        for key in chain['states']:
+            states[key] = states.get(key, 0) + chain['states'][key]
+        codec.absorb(chain['codec'])
+        for i in range(3):
+            sums[i] += chain['sums'][i]
+        samples += chain['samples']
+    stats = [float(total)/float(samples) for total in sums]
+    stderr = []
+    for i in range(3):
+        if len(chains) < 2:
+            stderr.append(float('nan'))
+            continue
+        values = [chain['stats'][i] for chain in chains]
+        mean = sum(values) / len(values)
+        variance = sum((value - mean)**2 for value in values) / (len(values) - 1)
+        stderr.append(math.sqrt(variance / len(values)))
+    return {'chains': chains, 'states': states, 'codec': codec, 'sums': sums, 'samples': samples, 'stats': stats, 'stderr': stderr}
+
+
+def _run_chain(job):
+    '''Worker: runs one chain from scratch and hands back everything merge_chains() needs. Lives at module level so the process pool can pickle it.'''
+    nodes, r, T, seed, nsteps, backend, neighbours, radius, kernel = job
+    sampler = GraphMCMCSampler(nodes, r=r, T=T, seed=seed, backend=backend, neighbours=neighbours, radius=radius, kernel=kernel)
+    sampler.make_graph()
+    for i in range(nsteps):
+        sampler.step()
+    samples = sampler.samples
+    sums = [sampler.zero_degree_sum, sampler.edge_sum, sampler.long_short_sum]
+    return {'seed': seed, 'states': sampler.states, 'codec': sampler.codec, 'sums': sums, 'samples': samples, 'stats': sampler.get_stats(samples)}
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+import heapq
+
+'''Dynamic single-source shortest paths, in the spirit of Ramalingam and Reps. We keep the distance from the source (node 0) to every reachable node together with the shortest-path tree that produced it. When an edge is added, only nodes that get closer are touched, by a Dijkstra run seeded at the end of the new edge. When a tree edge is removed, only the subtree hanging below it can get further away, so we re-seed that subtree from its unaffected neighbours and run Dijkstra inside it. Either kind of change can be evaluated without committing it, which is what the Metropolis-Hastings step needs. The longest distance comes off a max-heap of the distances, so it's O(log V) amortized to keep up to date rather than O(V) to look up.'''
+
+INF = float('inf')
+
+
+class ShortestPaths(object):
+    '''Keeps dist[node] (shortest weighted distance from source) and the shortest-path tree for a graph that changes one edge at a time. Unreachable nodes are simply absent from dist, as with networkx's single_source_dijkstra_path_length(). By default weights are read from the 'weight' attribute of a networkx graph; pass weight(u, v) to read them from somewhere else.'''
+
+    def __init__(self, graph, source=0, weight=None):
+        self.graph = graph
+        self.source = source
+        if weight is None:
+            weight = lambda u, v: graph[u][v]['weight']
+        self.weight = weight
+        self.rebuild()
+
+    def rebuild(self):
+        '''Run a full Dijkstra from the source and reset the tree.'''
+        self.dist = {}
+        self.parent = {}
+        self.children = {}
+        self.heap = []#(-distance, node) for every distance we've set, some of them since changed
+        self.total = 0.0
+        if self.source in self.graph:
+            changes = self._dijkstra({self.source: (0.0, None)}, lambda node: True)
+            self.apply(changes)
+
+    def restore(self, dist, parent):
+        '''Put the distances and shortest-path tree back as saved: dist maps each reachable node to its distance and parent to its parent in the tree (None for the source). Rebuilding them can settle a tie between two equally short paths the other way, and so differ from the saved ones in the last bits. Used by graphmcmc.checkpoint.'''
+        self.dist = dict(dist)
+        self.parent = dict(parent)
+        self.children = {}
+        for node, up in self.parent.items():
+            if up is not None:
+                self.children.setdefault(up, set()).add(node)
+        self.heap = [(-self.dist[node], node) for node in self.dist]
+        heapq.heapify(self.heap)
+        self.total = sum(self.dist.values())
+
+    def longest(self):
+        '''The longest of the shortest paths out of the source.'''
+        heap, dist = self.heap, self.dist
+        while heap and dist.get(heap[0][1]) != -heap[0][0]:
+            heapq.heappop(heap)#out of date; the node has moved or gone since
+        return -heap[0][0] if heap else 0
+
+    def propose_insert(self, idx1, idx2, weight):
+        '''Work out which distances would change if the edge idx1-idx2 (of the given weight) were added, without changing anything. Returns a dict of node: (new distance, new tree parent) to hand to apply() or delta().'''
+        dist = self.dist
+        seeds = {}
+        d1, d2 = dist.get(idx1, INF), dist.get(idx2, INF)
+        if d1 + weight < d2:
+            seeds[idx2] = (d1 + weight, idx1)
+        elif d2 + weight < d1:
+            seeds[idx1] = (d2 + weight, idx2)
+        if not seeds:
+            return {}#the new edge doesn't shorten anything
+        return self._dijkstra(seeds, lambda node: True, extra=(idx1, idx2, weight))
+
+    def propose_delete(self, idx1, idx2):
+        '''Work out which distances would change if the edge idx1-idx2 were removed, without changing anything. Only the tree below the edge can be affected; if the edge isn't in the tree, nothing is.'''
+        if self.parent.get(idx2) == idx1:
+            top = idx2
+        elif self.parent.get(idx1) == idx2:
+            top = idx1
+        else:
+            return {}
+        affected = set([top])
+        stack = [top]
+        while stack:
+            for child in self.children.get(stack.pop(), ()):
+                affected.add(child)
+                stack.append(child)
+        #seed every affected node from its best neighbour outside the damaged subtree
+        seeds = {}
+        dist = self.dist
+        weight = self.weight
+        for node in affected:
+            best = (INF, None)#stays this way if the node gets cut off from the source
+            for other in self.graph.neighbors(node):
+                if other in affected or other not in dist or _same(node, other, idx1, idx2):
+                    continue
+                cand = dist[other] + weight(node, other)
+                if cand < best[0]:
+                    best = (cand, other)
+            seeds[node] = best
+        return self._dijkstra(seeds, affected.__contains__, skip=(idx1, idx2))
+
+    def delta(self, changes):
+        '''How much the sum of all distances would change under the given proposal.'''
+        dist = self.dist
+        total = 0.0
+        for node in changes:
+            new = changes[node][0]
+            if new == INF:
+                total -= dist.get(node, 0.0)
+            else:
+                total += new - dist.get(node, 0.0)
+        return total
+
+    def apply(self, changes):
+        '''Commit a proposal from propose_insert()/propose_delete().'''
+        dist = self.dist
+        parent = self.parent
+        children = self.children
+        for node in changes:
+            new, new_parent = changes[node]
+            old_parent = parent.get(node)
+            if old_parent is not None:
+                children[old_parent].discard(node)
+            if new == INF:
+                self.total -= dist.pop(node, 0.0)
+                parent.pop(node, None)
+                continue
+            self.total += new - dist.get(node, 0.0)
+            dist[node] = new
+            heapq.heappush(self.heap, (-new, node))
+            parent[node] = new_parent
+            if new_parent is not None:
+                children.setdefault(new_parent, set()).add(node)
+        if len(self.heap) > 2 * len(dist) + 16:#mostly out-of-date entries; start afresh
+            self.heap = [(-dist[node], node) for node in dist]
+            heapq.heapify(self.heap)
+
+    def insert(self, idx1, idx2):
+        '''Update the distances after the edge idx1-idx2 has been added to the graph.'''
+        self.apply(self.propose_insert(idx1, idx2, self.weight(idx1, idx2)))
+
+    def delete(self, idx1, idx2):
+        '''Update the distances after the edge idx1-idx2 has been removed from the graph.'''
+        self.apply(self.propose_delete(idx1, idx2))
+
+    def _dijkstra(self, seeds, allowed, extra=None, skip=None):
+        '''Dijkstra's algorithm starting from several seeded nodes at once, only settling nodes for which allowed(node) is true. Every seed ends up in the result, at distance INF if nothing reached it. extra is an edge (u, v, weight) to treat as present and skip an edge (u, v) to treat as absent. Returns the settled nodes as node: (distance, parent).'''
+        found = {}
+        graph = self.graph
+        weight = self.weight
+        heap = [(seeds[node][0], node) for node in seeds]
+        heapq.heapify(heap)
+        best = dict(seeds)
+        while heap:
+            d, node = heapq.heappop(heap)
+            if node in found or d > best[node][0]:
+                continue
+            found[node] = best[node]
+            if d == INF or node not in graph:
+                continue#nothing to relax out of an unreachable node, or one the graph hasn't got yet
+            for other in graph.neighbors(node):
+                if skip is not None and _same(node, other, skip[0], skip[1]):
+                    continue
+                self._relax(node, other, d + weight(node, other), allowed, found, best, heap)
+            if extra is not None and node in (extra[0], extra[1]):
+                other = extra[1] if node == extra[0] else extra[0]
+                self._relax(node, other, d + extra[2], allowed, found, best, heap)
+        return found
+
+    def _relax(self, node, other, cand, allowed, found, best, heap):
+        '''One Dijkstra relaxation: keep cand if it beats both the settled distance and anything already queued.'''
+        if other in found or not allowed(other):
+            return
+        current = best[other][0] if other in best else self.dist.get(other, INF)
+        if cand < current:
+            best[other] = (cand, node)
+            heapq.heappush(heap, (cand, other))
+
+
+def _same(a, b, idx1, idx2):
+    '''Is a-b the undirected edge idx1-idx2?'''
+    return (a == idx1 and b == idx2) or (a == idx2 and b == idx1)
+
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+import warnings
+import numpy as np
+
+'''Reading node coordinates in bulk. Everything ends up as one contiguous N x d float64 array. Text files (one comma-separated point per line) are read whole and parsed in a single NumPy call, rather than a line and a float at a time. Binary files are memory-mapped rather than read: a .npy file knows its own shape, and a raw file is little-endian float64s, d to a point. PointList puts the array behind the list-of-tuples face the samplers have always shown as nodes, building a tuple only when one is asked for.'''
+
+RAW_SUFFIXES = ('.f64', '.raw')#raw little-endian float64, point after point
+
+
+def load_points(path, dim=None):
+    '''The points in the file at path as an N x d float64 array. A .npy file is memory-mapped with the shape it was saved with (one that doesn't hold float64s is read and converted instead). A file ending in one of RAW_SUFFIXES, or any file if dim is given, is memory-mapped as raw little-endian float64s, dim to a point (2 if not given). Anything else is parsed as text, one comma-separated point per line. Raises ValueError if the file doesn't hold whole points of one dimension.'''
+    if path.endswith('.npy'):
+        coords = np.load(path, mmap_mode='r')
+        if coords.ndim != 2:
+            raise ValueError('{} holds an array of shape {}; points are an N x d array'.format(path, coords.shape))
+        return coords if coords.dtype == np.float64 else coords.astype(np.float64)
+    if dim is not None or path.endswith(RAW_SUFFIXES):
+        dim = 2 if dim is None else dim
+        raw = np.memmap(path, dtype='<f8', mode='r')
+        if len(raw) % dim:
+            raise ValueError('{} holds {} floats, which is not a whole number of {}-dimensional points'.format(path, len(raw), dim))
+        return raw.reshape(-1, dim)
+    with open(path, 'rb') as f:
+        text = f.read()
+    return parse_points(text, path)
+
+
+def parse_points(text, name='input'):
+    '''Points from the bytes of a text file, one comma-separated point per line, as an N x d float64 array.'''
+    text = text.strip()
+    if not text:
+        return np.empty((0, 0), dtype=np.float64)
+    data = np.frombuffer(text, dtype=np.uint8)
+    ends = np.flatnonzero(data == ord('\n'))
+    commas = np.flatnonzero(data == ord(','))
+    per_line = np.diff(np.concatenate(([0], np.searchsorted(commas, ends), [len(commas)])))#commas on each line
+    rows = len(per_line)
+    dim = int(per_line[0]) + 1
+    if (per_line != dim - 1).any():
+        line = int(np.flatnonzero(per_line != dim - 1)[0]) + 1
+        raise ValueError('line {} of {} has a different number of coordinates ({}) from line 1 ({})'.format(line, name, int(per_line[line - 1]) + 1, dim))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', DeprecationWarning)#fromstring() warns when it stops short; the count below says so instead
+        values = np.fromstring(text.replace(b',', b' ').decode('ascii'), dtype=np.float64, sep=' ')#every field parsed in C, in one pass
+    if len(values) != rows * dim:
+        raise ValueError('{} should hold {} points of {} coordinates each, but only {} numbers could be read from it; blank lines and empty or malformed coordinates aren\'t allowed'.format(name, rows, dim, len(values)))
+    return values.reshape(rows, dim)
+
+
+def save_points(path, coords):
+    '''Saves coordinates in the .npy format load_points() memory-maps.'''
+    np.save(path, np.ascontiguousarray(coords, dtype=np.float64))
+
+
+class PointList(object):
+    '''A read-only sequence of points over an N x d coordinate array: len() is the node count and item i is point i as a tuple of floats, made when it's asked for.'''
+
+    def __init__(self, coords=None):
+        self.coords = np.empty((0, 0), dtype=np.float64) if coords is None else coords
+
+    def __len__(self):
+        return len(self.coords)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [tuple(point) for point in self.coords[i].tolist()]
+        return tuple(self.coords[i].tolist())
+
+    def __iter__(self):
+        for point in self.coords.tolist():
+            yield tuple(point)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'PointList({!r})'.format(list(self))
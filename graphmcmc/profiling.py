@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+import json
+from timeit import default_timer
+from graphmcmc.energy import ADD, CUT
+from graphmcmc.histogram import SpillingHistogram
+
+'''Counters and timers for the inside of step(). A sampler with a StepStats attached (GraphMCMCSampler(profile=True), or set sampler.profiler yourself) calls its hooks as it takes each step: begin() before the first of the five phases, phase() as each one finishes, which reads the clock, and end() once the step is done, which counts what happened. The step itself is the same either way, and a sampler without a profiler pays an attribute check per hook. Poll report() at any point, or give run() a profile_to path to have it dumped as JSON at the end.'''
+
+PHASES = ('propose', 'accept', 'update', 'record', 'stats')
+
+
+class StepStats(object):
+    '''What a sampler's steps have been doing: seconds spent in each of PHASES, how many proposals of each kind were made and accepted (and how many were to stay put, which some kernels propose), and how many random pairs propose_new() drew and threw back (already an edge, or a node paired with itself) on the way to an addition. clock is the timer read between phases.'''
+
+    def __init__(self, sampler, clock=default_timer):
+        self.sampler = sampler
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        self.steps = 0
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.proposed = {ADD: 0, CUT: 0}
+        self.accepted = {ADD: 0, CUT: 0}#and any other kinds the sampler's kernel proposes, as they turn up
+        self.stays = 0
+        self.retries = 0
+
+    def begin(self, sampler):
+        '''Called by sampler.step() before it proposes anything.'''
+        sets = self._sets = getattr(sampler.graph, '_edge_sets', None)
+        self._retries = sets.retries if sets is not None else 0
+        self._last = self.clock()
+
+    def phase(self, name):
+        '''Called by step() as it finishes the phase name (one of PHASES), which gets the time since the last phase finished. Steps that aren't recorded skip the last two.'''
+        now = self.clock()
+        self.seconds[name] += now - self._last
+        self._last = now
+
+    def end(self, sampler, kind, forward):
+        '''Called by step() once the step is done, with the kind of move it proposed (None to stay put) and whether it was made.'''
+        self.steps += 1
+        if kind is None:
+            self.stays += 1
+        else:
+            self.proposed[kind] = self.proposed.get(kind, 0) + 1
+            if forward:
+                self.accepted[kind] = self.accepted.get(kind, 0) + 1
+        if kind == ADD:
+            sets = getattr(sampler.graph, '_edge_sets', self._sets)#the draw built them, if they weren't there before
+            self.retries += sets.retries - self._retries
+
+    def acceptance_rate(self, kind=None):
+        '''The fraction of proposals accepted: all of them, or just those of one kind (ADD, CUT or any other the kernel proposes). None before any have been made.'''
+        proposed = sum(self.proposed.values()) if kind is None else self.proposed.get(kind, 0)
+        accepted = sum(self.accepted.values()) if kind is None else self.accepted.get(kind, 0)
+        return accepted / proposed if proposed else None
+
+    def histogram_size(self):
+        '''How many distinct states the sampler is holding counts for. For a SpillingHistogram that's just the ones in memory, since counting those on disk means reading them all; for a sampler keeping only heavy hitters it's the tracked ones.'''
+        sampler = self.sampler
+        if not sampler.keep_states:
+            return len(sampler.hitters) if sampler.hitters is not None else 0
+        if isinstance(sampler.states, SpillingHistogram):
+            return len(sampler.states.counts)
+        return len(sampler.states)
+
+    def report(self):
+        '''Everything above as a plain dict, ready for JSON.'''
+        total = sum(self.seconds.values())
+        rates = dict((kind, self.acceptance_rate(kind)) for kind in self.proposed)
+        rates['all'] = self.acceptance_rate()
+        return {'steps': self.steps,
+                'seconds': dict(self.seconds),
+                'seconds_per_step': total / self.steps if self.steps else None,
+                'steps_per_sec': self.steps / total if total else None,
+                'proposed': dict(self.proposed),
+                'accepted': dict(self.accepted),
+                'acceptance_rate': rates,
+                'stays': self.stays,
+                'retries': self.retries,
+                'retries_per_add': self.retries / self.proposed[ADD] if self.proposed[ADD] else None,
+                'histogram_size': self.histogram_size(),
+                'spilled_runs': len(self.sampler.states.runs) if isinstance(self.sampler.states, SpillingHistogram) else 0}
+
+    def dump(self, path):
+        '''Writes report() to path as JSON.'''
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2, sort_keys=True)
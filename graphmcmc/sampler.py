@@ -0,0 +1,529 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+import networkx as nx
+import math
+import random
+import warnings
+import numpy as np
+from graphmcmc.bridges import bridge_index
+from graphmcmc.bridges import forget as forget_bridges
+from graphmcmc.energy import ADD, CUT, Move, energy_of
+from graphmcmc.energy import forget as forget_energy
+from graphmcmc.distances import DistanceTable
+from graphmcmc.points import PointList, load_points
+from graphmcmc.backends import make_backend
+from graphmcmc.candidates import candidate_edges
+from graphmcmc.edgesets import edge_sets
+from graphmcmc.edgesets import forget as forget_edge_sets
+from graphmcmc.states import StateCodec, SpaceSaving, state_of, top_states
+from graphmcmc.states import forget as forget_state
+from graphmcmc.histogram import SpillingHistogram
+from graphmcmc.kernels import AddCutKernel, parts
+from graphmcmc.profiling import StepStats
+from graphmcmc.trace import TraceWriter
+from graphmcmc import diagnostics
+
+'''The Markov chain itself. Everything one chain needs -- its nodes, graphs, random number generator, parameters, running statistics and state counts -- lives on a GraphMCMCSampler, so a single process can drive as many independent chains as it likes. The functions in graphmcmc.graphmcmc are thin wrappers around one default sampler.'''
+
+CHECKPOINT_EVERY = 100000#steps between checkpoints in run()
+
+
+class CountingGraph(nx.Graph):
+    '''A networkx.Graph that counts its edges as they come and go, so number_of_edges() is O(1) rather than the sum over every node's degree networkx works it out from. The bridge index, energy, edge sets and state key each ask for it on every lookup, to notice edits made behind their backs, and the proposal kernels on every step, so the sampler keeps its graphs in these.'''
+
+    def __init__(self, data=None, **attr):
+        self._edge_count = 0
+        nx.Graph.__init__(self, data, **attr)
+        self._edge_count = nx.Graph.size(self)#however data came in
+
+    def number_of_edges(self, u=None, v=None):
+        if u is None:
+            return self._edge_count
+        return nx.Graph.number_of_edges(self, u, v)
+
+    def size(self, weight=None):
+        if weight is None:
+            return self._edge_count
+        return nx.Graph.size(self, weight)
+
+    def add_edge(self, u, v, *args, **attr):
+        new = not self.has_edge(u, v)
+        nx.Graph.add_edge(self, u, v, *args, **attr)
+        self._edge_count += new
+
+    def add_edges_from(self, ebunch, *args, **attr):
+        ebunch = list(ebunch)
+        new = set(frozenset(edge[:2]) for edge in ebunch if not self.has_edge(edge[0], edge[1]))
+        nx.Graph.add_edges_from(self, ebunch, *args, **attr)
+        self._edge_count += len(new)
+
+    def remove_edge(self, u, v):
+        nx.Graph.remove_edge(self, u, v)
+        self._edge_count -= 1
+
+    def remove_edges_from(self, ebunch):
+        ebunch = list(ebunch)
+        gone = set(frozenset(edge[:2]) for edge in ebunch if self.has_edge(edge[0], edge[1]))
+        nx.Graph.remove_edges_from(self, ebunch)
+        self._edge_count -= len(gone)
+
+    def remove_node(self, n):
+        gone = len(self.adj[n]) if n in self.adj else 0
+        nx.Graph.remove_node(self, n)
+        self._edge_count -= gone
+
+    def remove_nodes_from(self, nodes):
+        nodes = list(nodes)
+        gone = set(frozenset((n, other)) for n in nodes if n in self.adj for other in self.adj[n])
+        nx.Graph.remove_nodes_from(self, nodes)
+        self._edge_count -= len(gone)
+
+    def clear(self):
+        nx.Graph.clear(self)
+        self._edge_count = 0
+
+    def subgraph(self, nbunch):
+        graph = nx.Graph.subgraph(self, nbunch)
+        graph._edge_count = nx.Graph.size(graph)#networkx fills in its adjacency directly
+        return graph
+
+
+class GraphMCMCSampler(object):
+    '''One Metropolis-Hastings chain over connected graphs on a fixed set of nodes. r is the weight of the total edge weight in theta, and T is the temperature. Pass seed for a reproducible chain, or rng to share an existing random.Random-like generator. backend picks how the graphs are stored: 'networkx' (the default) keeps networkx.Graph objects (CountingGraphs, which count their edges), while 'array', 'bitset' or 'csr' use the compact array backends from graphmcmc.backends. Give heavy_hitters a number of slots to also follow the most visited states with a SpaceSaving summary as we go, and set keep_states to False to skip the full states histogram and keep only that summary. Give state_budget a number of states to keep the histogram in a SpillingHistogram, which holds that many in memory and spills the rest to disk.
+
+A proposal is just a Move, weighed against the one current graph and made only if it's accepted. Set mirror to True to also keep prop_graph, a second graph with the pending move already made, as the original module-level interface did; the chain itself is the same either way. Set profile to True to time and count what every step does in a StepStats, kept as profiler (see graphmcmc.profiling). Give trace a path to record every state's observables there as well as in the running sums, with a TraceWriter kept as trace (see graphmcmc.trace); close() it when you're done. Give neighbours (a count) or radius (a distance), or both, to only ever add edges between each node and its nearest neighbours or between nodes within radius of each other, as big inputs want; Nmax and the q terms then count those candidate pairs (kept as candidates) rather than every pair (see graphmcmc.candidates). Give kernel a proposal kernel to propose moves with something other than the original add-or-cut proposal, an AddCutKernel (see graphmcmc.kernels).'''
+
+    def __init__(self, nodes=None, r=0.0, T=1.0, seed=None, rng=None, backend='networkx', heavy_hitters=None, keep_states=True, state_budget=None, mirror=False, profile=False, trace=None, neighbours=None, radius=None, kernel=None):
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.backend = backend
+        self.r = r#this is the weight of the total-path-length in our MCMC 'energy'
+        self.T = T#this is the 'temperature' in our Metropolis-Hastings algorithm
+        self.nodes = PointList()#the points, as tuples, over coords
+        self.coords = None#the same coordinates as nodes, as an N x d float64 array
+        self.distances = None#a DistanceTable over coords; distances(i, j) is the weight of edge i-j
+        self.Nmin = 0
+        self.Nmax = 0
+        self.neighbours = neighbours
+        self.radius = radius
+        self.candidates = None#a CandidateEdges, if we're restricted to one
+        self.mirror = mirror
+        self.graph = CountingGraph()
+        self.prop_graph = CountingGraph() if mirror else None#with mirror, the graph as it would be after the pending move
+        self.states = SpillingHistogram(state_budget) if state_budget else {}#used to track our states, keyed by codec
+        self.codec = None#a StateCodec for our node count; turns graphs into state keys and back
+        self.keep_states = keep_states
+        self.hitters = SpaceSaving(heavy_hitters) if heavy_hitters else None#the approximate most visited states, if asked for
+        self.zero_degree_sum = 0#these three are the running totals behind get_stats()
+        self.edge_sum = 0
+        self.long_short_sum = 0
+        self.samples = 0#states tally()'d into those totals
+        self.kernel = kernel if kernel is not None else AddCutKernel()#what propose_new() asks for a move, and accept_move() for its Hastings term
+        self.proposal = None#the Move we're weighing, while one is pending (None for a proposal to stay put)
+        self.halfway = None#(proposal, change in theta) once a compound proposal's leading parts have been made on graph to weigh it
+        self.steps = 0#steps taken since make_graph()
+        self.pending = None#state counts recorded since the last checkpoint, once checkpointing starts (see graphmcmc.checkpoint)
+        self.checkpoint_path = None
+        self.checkpoint_log = None#the histogram log beside checkpoint_path
+        self.profiler = StepStats(self) if profile else None#None costs step() a check per phase
+        self.trace = TraceWriter(trace) if trace is not None else None#one row per tally(), if we're tracing
+        self.monitor = None#a diagnostics.ChainMonitor, once run_until() (or you) attaches one
+        if nodes is not None:
+            self.set_nodes(nodes)
+
+    def read_file(self, infile, dim=None):
+        '''This reads in the nodes from an input file of specified name and hands them to set_nodes(). The file is one comma-separated point per line, read in bulk, or a binary .npy or raw float64 file (see graphmcmc.points.load_points(), and dim there), which is memory-mapped instead.'''
+        self.set_nodes(load_points(infile, dim))
+
+    def set_nodes(self, points):
+        '''This builds the coordinate array and distance table from a sequence of points (or an N x d array of them, which is used as it is if it's already float64), and the candidate edges if we're restricting to them, and sets the max and min number of edges possible for the graph.'''
+        coords = np.asarray(points, dtype=np.float64)
+        if coords.ndim == 1:
+            coords = coords.reshape(len(coords), -1)
+        self.coords = coords
+        self.nodes.coords = coords#nodes is the same object as before, for anyone holding on to it
+        self.distances = DistanceTable(self.coords)#every edge weight from here on is a table lookup
+        n = len(coords)
+        self.Nmin = (n - 1) #the minimum number of edges is n-1
+        self.Nmax = (n * (n -1))/ 2 #the most edges we can have is n(n-1)/2
+        self.codec = StateCodec(n)
+        self._allocate_graphs()
+        self.restrict(candidate_edges(coords, self.neighbours, self.radius) if self.neighbours is not None or self.radius is not None else None)
+
+    def share_nodes(self, other):
+        '''This makes us use another sampler's nodes, coordinate array and distance table instead of building our own, so an ensemble over one input keeps a single copy of them.'''
+        self.nodes.coords = other.coords
+        self.coords = other.coords
+        self.distances = other.distances
+        self.Nmin = other.Nmin
+        self.Nmax = other.Nmax
+        self.codec = other.codec
+        self.neighbours = other.neighbours
+        self.radius = other.radius
+        self._allocate_graphs()
+        self.restrict(other.candidates)
+
+    def restrict(self, candidates):
+        '''Only ever proposes adding the edges in candidates, a CandidateEdges (or any of them, given None), and sets Nmax to match. Call it before make_graph(); the graph mustn't have an edge outside the candidates.'''
+        self.candidates = candidates
+        n = len(self.nodes)
+        self.Nmax = (n * (n -1))/ 2 if candidates is None else len(candidates)
+        for g in self.graphs():
+            g._candidates = candidates#where edge_sets() looks for them
+            forget_edge_sets(g)
+
+    def _allocate_graphs(self):
+        '''The array backends are sized to the node count, so they get built once we know it.'''
+        if self.backend != 'networkx':
+            self.graph = make_backend(self.backend, len(self.nodes), self.distances)
+            if self.mirror:
+                self.prop_graph = make_backend(self.backend, len(self.nodes), self.distances)
+
+    def graphs(self):
+        '''Our graph, and prop_graph too if we're mirroring.'''
+        return (self.graph, self.prop_graph) if self.mirror else (self.graph,)
+
+    def to_networkx(self, graph=None):
+        '''A networkx.Graph copy of our current graph (or the given one), with weights, whatever backend we're running on.'''
+        graph = self.graph if graph is None else graph
+        if isinstance(graph, nx.Graph):
+            return graph.copy()
+        return graph.to_networkx()
+
+    def make_graph(self):
+        '''This creates our initial graph (and proposal graph, if we're mirroring; the two are identical except when proposing state changes) from the nodes list. Right now this just creates a minimal, linear graph, since that makes an easy starting point. Calling additional times after the first will reset the graph, the proposal graph and the statistics to the initial state.'''
+        self.proposal = None
+        self.halfway = None
+        self.steps = 0
+        self.pending = None#a new chain needs a fresh checkpoint
+        self.checkpoint_path = None
+        self.zero_degree_sum = 0#reset these just in case, when we make a new graph
+        self.edge_sum = 0
+        self.long_short_sum = 0
+        self.samples = 0
+        self.states.clear()
+        if self.hitters is not None:
+            self.hitters = SpaceSaving(self.hitters.capacity)
+        if self.profiler is not None:
+            self.profiler.reset()
+        if self.monitor is not None:
+            self.monitor.reset()
+        for g in self.graphs():
+            g.clear()#in case make_graph is called repeatedly
+            forget_bridges(g)#the old indices describe the old graphs
+            forget_energy(g)
+            forget_state(g)
+            forget_edge_sets(g)
+        for i in range(self.Nmin):#for now, I'm just putting the tuples in a line
+            for g in self.graphs():
+                g.add_edge(i, i+1, weight=self.distances(i, i+1))
+        self.tally()
+        self.record_state()
+
+    def new_edge(self, graph, idx1, idx2):
+        '''This takes two indices on the graph and adds an edge between them, with the weight given by the Euclidean distance between the points corresponding to the given indices. Adding an edge that is already there does nothing.'''
+        if(graph.has_edge(idx1, idx2)):#already there, nothing for the indices to do
+            return
+        index = bridge_index(graph)#before the edge goes in, or the index would think it had been edited behind its back
+        self._energy(graph).apply(Move(ADD, idx1, idx2))
+        state_of(graph, self.codec).toggle(idx1, idx2, True)
+        edge_sets(graph).add(idx1, idx2)
+        graph.add_edge(idx1, idx2, weight=self.distances(idx1, idx2))
+        index.insert(idx1, idx2)
+
+    def cut_edge(self, graph, idx1, idx2):
+        '''This takes two indices on the graph and cuts the edge between them, if that edge exists and is not a bridge.'''
+        if(graph.has_edge(idx1, idx2)):#make sure we only try to remove if it's there
+            index = bridge_index(graph)
+            if not index.is_bridge(idx1, idx2):
+                self._energy(graph).apply(Move(CUT, idx1, idx2))
+                state_of(graph, self.codec).toggle(idx1, idx2, False)
+                edge_sets(graph).remove(idx1, idx2)
+                graph.remove_edge(idx1,idx2)
+                index.delete(idx1, idx2)
+
+    def add_or_cut(self):
+        '''This determines whether we will add an edge or cut an edge at each MCMC step. The probability of adding an edge is inversely proportional to the number of edges. When we have the minimum number of edges in a connected simple graph (N - 1), P(add) is 1, and when we have the maximum number of edges (N * (N - 1)/2), the probability is 0. The exact formula can be found in the documentation.'''
+        #this is 1 when current edge count is minimal, and 0 when current edge count is maximal
+        prob_add = ( self.Nmax - self.graph.number_of_edges() ) / ( self.Nmax - self.Nmin )
+        rand = self.rng.random()#roll the dice
+        if ( rand < prob_add ):
+            return True #1 for add
+        else:
+            return False #0 for subtract
+
+    def propose_new(self):
+        '''This is the meat of the MCMC algorithm. This asks our kernel to propose a modification to the current graph configuration, and leaves it in self.proposal; the graph itself only changes if update() accepts it (prop_graph, if we're mirroring, takes it straight away). The default AddCutKernel either subtracts or adds a qualifying edge, with probability of adding inversely proportional to the amount of edges (0 if we have max number of edges, 1 if we have min number of edges): an addition is drawn uniformly from the missing edges and a cut uniformly from the non-bridges, each in O(1) from sets kept up to date as we go (see graphmcmc.edgesets and graphmcmc.bridges). After this is called, we accept or reject the move with probability (pi_j * q(i|j))/(pi_i * q(j|i)). NOTE: The default proposal distribution will never propose that the next state be unchanged, and so the system will only remain in a given state based on the Metropolis-Hastings algorithms' rejection chance; other kernels may propose staying put, as a proposal of None.'''
+        self.proposal = move = self.kernel.propose(self, self.rng)
+        if self.mirror and move is not None:
+            for part in parts(move):
+                self._make(self.prop_graph, part)
+
+    def move_q(self, move, reverse=False):
+        '''q(j|i), the probability that propose_new() picks move from our current graph i; or with reverse, q(i|j), the probability of proposing the way back from the graph j the move leads to. These are the original add-or-cut proposal's, from AddCutKernel.q(); both come from the current graph and its indices alone.'''
+        return _ADD_CUT.q(self, move, reverse)
+
+    def get_q(self, graph1, graph2):
+        '''This calculates the q(j|i) or q(i|j) term in our MCMC acceptance ratio. See the README for more info. Call with graph first and prop_graph second for q(j|i) (forward) and vice-versa for q(i|j) (reverse); while a proposal is pending, those two are worked out from the move by move_q().'''
+        if self.proposal is not None and self.mirror and self.proposal.kind in (ADD, CUT):
+            if graph1 is self.graph and graph2 is self.prop_graph:
+                return self.move_q(self.proposal)
+            if graph1 is self.prop_graph and graph2 is self.graph:
+                return self.move_q(self.proposal, reverse=True)
+        Nmin, Nmax = self.Nmin, self.Nmax
+        prob_add = ( Nmax - graph1.number_of_edges() ) / ( Nmax - Nmin )#the probability we add an edge
+        if graph2.number_of_edges() > graph1.number_of_edges():
+            #we proposed an addition
+            prob_edge = 1 / ( Nmax - graph1.number_of_edges() )#the probability we pick any one edge
+            return ( prob_add * prob_edge )
+        else:#graph2.number_of_edges() < graph1.number_of_edges
+            prob_cut = float(1.0) - prob_add
+            cuttable = bridge_index(graph1).nonbridge_count()#we pick uniformly among the non-bridges of graph1
+            prob_edge = (float(1.0) / cuttable) if cuttable > 0 else 0
+            return ( prob_cut * prob_edge )
+
+    def state_key(self, graph=None):
+        '''The key our states histogram uses for the given graph (our current graph by default). new_edge() and cut_edge() keep it up to date as they go, so this is O(1). See graphmcmc.states.'''
+        graph = self.graph if graph is None else graph
+        return state_of(graph, self.codec).key
+
+    def decode_state(self, key):
+        '''The sorted edge list of the state with this key.'''
+        return self.codec.decode(key)
+
+    def record_state(self):
+        '''This tracks the states the Markov Chain has visited so far, and keeps a running count of them. The counts will be used for statistics at the end.'''
+        #the edge set is all a state is, and its running key stands in for it:
+        hashable = self.state_key()
+        packed = None#the edge set, if we had to pack it for decoding later
+        if(isinstance(self.states, SpillingHistogram)):
+            #no lookups here, they'd go to disk; the histogram keeps the edge set with each key it hasn't got in memory
+            if self.keep_states and self.states.add(hashable) and not self.codec.masked:
+                packed = self.states.extra[hashable] = self.codec.pack(self.graph)
+        elif(self.keep_states):
+            if(hashable not in self.states):
+                self.states[hashable] = 1#initialize a new entry, with one count
+            else:
+                self.states[hashable] += 1#add one to the existing entry
+            packed = self.codec.remember(hashable, self.states[hashable], self.graph)#so get_top_percent() can decode it later, if it's among the most visited
+        if self.pending is not None and self.keep_states:
+            entry = self.pending.get(hashable)
+            if entry is None:
+                self.pending[hashable] = [1, packed]
+            else:
+                entry[0] += 1
+                entry[1] = entry[1] if entry[1] is not None else packed
+        if self.hitters is not None and self.hitters.add(hashable) and not self.codec.masked:
+            self.hitters.extra[hashable] = self.codec.pack(self.graph)#decodable for as long as it's tracked
+        if self.codec.audit:
+            self.codec.check(hashable, self.graph)
+
+    def get_longest_shortest(self, graph):
+        '''This gets the length of the longest-shortest path in the given graph. Used for statistics in assignment.'''
+        #the graph's Energy keeps the distance from 0 to everything up to date:
+        return self._energy(graph).longest()
+
+    def get_theta(self, graph):
+        '''This calculates the theta of a given graph based on the Boltzmann-style formula given in the assignment. Both of its sums are running totals kept by the graph's Energy.'''
+        return self._energy(graph).theta()
+
+    def get_pi_frac(self, graph1=None, graph2=None, T=None):
+        '''This gets the pi_j/pi_i term for the Metropolis-Hastings update step, defaulting to our own graph, the pending proposal and our temperature. For the pending proposal we only need the change in theta that one move makes.'''
+        T = self.T if T is None else T
+        if(self.proposal is not None and graph1 in (None, self.graph) and graph2 in (None, self.prop_graph)):
+            return(math.exp(self._delta_theta(self.proposal)/T))
+        th1 = self.get_theta(graph1)
+        th2 = self.get_theta(graph2)
+        return(math.exp(-(th1 - th2)/T))
+
+    def log_pi(self, theta, T=None):
+        '''The log of our (unnormalised) target density at a graph with the given theta, in the same convention as get_pi_frac(): pi_j/pi_i == exp(log_pi(theta_j) - log_pi(theta_i)).'''
+        T = self.T if T is None else T
+        return theta / T
+
+    def update(self, forward):
+        '''This settles the pending proposal: if forward is True the move is made on graph, and otherwise it's dropped (and prop_graph, if we're mirroring, reverts to graph). A compound proposal that accept_move() left half made on graph is either finished or undone.'''
+        move = self.proposal
+        self.proposal = None#whichever way it goes, the proposal is settled now
+        if move is None:
+            return
+        steps = parts(move)
+        made = len(steps) - 1 if self.halfway is not None else 0#already on graph
+        self.halfway = None
+        if(forward == True):
+            for part in steps[made:]:#graph catches up with the proposal
+                self._make(self.graph, part)
+            return
+        for part in reversed(steps[:made]):
+            self._make(self.graph, _undo(part))
+        if(self.mirror):
+            for part in reversed(steps):#prop_graph goes back to graph
+                self._make(self.prop_graph, _undo(part))
+
+    def accept_move(self, graph1=None, graph2=None):
+        '''This is the Metropolis-Hastings acceptance/rejection step for the pending proposal (or, given two graphs, for moving from graph1 to graph2): the move is accepted with probability min(1, pi_j q(i|j) / (pi_i q(j|i))). For the pending proposal, the kernel gives the q terms as log q(i|j) - log q(j|i); a proposal to stay put is never "accepted", since there's nothing to make.'''
+        if graph1 is None and graph2 is None:
+            move = self.proposal
+            if move is None:
+                return False
+            log_q_ratio = self.kernel.log_q_ratio(self, move)#asked of graph i, before _delta_theta() starts making a compound move
+            log_ratio = self._delta_theta(move) / self.T + log_q_ratio
+            return self.rng.random() < math.exp(min(log_ratio, 0.0))
+        pi_frac = self.get_pi_frac(graph1, graph2)
+        q_ij = self.get_q(graph1, graph2)
+        q_ji = self.get_q(graph2, graph1)
+        a_ij = min((pi_frac * q_ji/q_ij), 1) if q_ij > 0 else 1
+        rand = self.rng.random()
+        if(rand < a_ij):
+            return(True)
+        else:
+            return(False)
+
+    def step(self, record=True):
+        '''This is the step-maker. Called once each timestep, it calls propose_new(), determines whether the move is acceptable with accept_move(), then update()s appropriately. It also records the state we've now moved to, and adds to our running statistic totals with tally() after it finishes stepping, unless record is False, in which case the chain moves on without anything being counted. With a profiler attached, it tells the profiler as each of those phases finishes, so it can time them.'''
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.begin(self)
+        self.steps += 1
+        self.propose_new()
+        kind = self.proposal.kind if self.proposal is not None else None
+        if profiler is not None:
+            profiler.phase('propose')
+        forward = self.accept_move()
+        if profiler is not None:
+            profiler.phase('accept')
+        self.update(forward)
+        if profiler is not None:
+            profiler.phase('update')
+        if record:
+            self.record_state()
+            if profiler is not None:
+                profiler.phase('record')
+            self.tally(kind, forward)
+            if profiler is not None:
+                profiler.phase('stats')
+        if profiler is not None:
+            profiler.end(self, kind, forward)
+
+    def tally(self, move=None, accepted=False):
+        '''Adds the current graph to the running totals behind get_stats(), to the convergence monitor if we have one, and to the trace if we're keeping one, along with the kind of move that was proposed to get here (None for the starting graph, or a proposal to stay put) and whether it was accepted.'''
+        graph = self.graph
+        energy = self._energy(graph)#what get_longest_shortest() and get_theta() ask
+        longest = energy.longest()
+        degree = graph.degree(0)
+        edges = graph.number_of_edges()
+        self.long_short_sum += longest
+        self.zero_degree_sum += degree
+        self.edge_sum += edges
+        self.samples += 1
+        if self.monitor is not None:
+            self.monitor.add((degree, edges, longest), accepted)
+        if self.trace is not None:
+            self.trace.write(energy.theta(), edges, degree, longest, accepted, move)
+
+    def close(self):
+        '''Flushes and closes the trace, if we're keeping one.'''
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+
+    def get_stats(self, nsteps=None):
+        '''Returns [expected degree of vertex 0, expected edge count, expected longest shortest path] over the states tally()'d since make_graph(), or over nsteps states if given.'''
+        nsteps = self.samples if nsteps is None else nsteps
+        stats = []
+        stats.append(float(self.zero_degree_sum)/float(nsteps))
+        stats.append(float(self.edge_sum)/float(nsteps))
+        stats.append(float(self.long_short_sum)/float(nsteps))
+        return(stats)
+
+    def run(self, nsteps, checkpoint=None, checkpoint_every=CHECKPOINT_EVERY, profile_to=None, burn_in=0, thin=1):
+        '''Takes burn_in steps without recording anything, then nsteps more recording only every thin-th state, and returns get_stats() (which covers every state recorded since make_graph(), including the starting one). Unrecorded steps skip the histogram, the running sums, the longest shortest path and the trace, so they cost only the move itself. Give checkpoint a path to save the chain there every checkpoint_every steps (burn-in included) and at the end; graphmcmc.checkpoint.resume() picks it back up. Give profile_to a path to dump the profiler's report there as JSON at the end, if we have a profiler.'''
+        if checkpoint is not None:
+            from graphmcmc import checkpoint as checkpoints
+        if thin < 1:
+            raise ValueError('thin must be at least 1, not {}'.format(thin))
+        if self.trace is not None:
+            self.trace.reserve(self.trace.length + nsteps // thin)#so the trace needn't grow as we go
+        total = burn_in + nsteps
+        for i in range(total):
+            self.step(i >= burn_in and (i - burn_in + 1) % thin == 0)
+            if checkpoint is not None and (i + 1) % checkpoint_every == 0:
+                checkpoints.save(self, checkpoint)
+        if checkpoint is not None and total % checkpoint_every:
+            checkpoints.save(self, checkpoint)
+        if profile_to is not None and self.profiler is not None:
+            self.profiler.dump(profile_to)
+        if self.trace is not None:
+            self.trace.flush()
+        return self.get_stats()
+
+    def run_until(self, target_ess=diagnostics.TARGET_ESS, max_steps=diagnostics.MAX_STEPS, max_rhat=diagnostics.MAX_RHAT, min_steps=diagnostics.MIN_STEPS, check_every=diagnostics.CHECK_EVERY):
+        '''Steps until the get_stats() quantities have target_ess effective samples each and a split-R-hat of at most max_rhat, or until max_steps; see diagnostics.run_until(), which this is for a single chain. The diagnostics cover the states from here on (or since the monitor was attached). Returns the diagnostics summary, whose 'converged' says which way it ended and whose 'mean' is the estimate of each quantity.'''
+        return diagnostics.run_until([self], target_ess, max_steps, max_rhat, min_steps, check_every)
+
+    def top_states(self, k):
+        '''The k most visited states, most visited first, as (edge list, count) pairs. Counts come from the states histogram, or from the heavy hitters summary (as estimates) when we aren't keeping the histogram. Past the codec's keep there may be fewer; see get_top_percent().'''
+        if self.keep_states:
+            top = top_states(self.states, self._decodable(self.states, k))
+            extra = self._extra(self.states, top)
+        else:
+            top = self.hitters.top(k)
+            extra = self.hitters.extra
+        return [(self.codec.decode(key, extra.get(key)), count) for key, count in top]
+
+    def get_top_percent(self, graph_dict=None):
+        '''This treats our list of states and orders them by the number of times each has occurred, then outputs the top 1% of them in that ordering (at least one), each decoded back to its edge list. Without a full histogram it ranks the heavy hitters summary instead. With Zobrist keys and a plain dict histogram only the codec's keep most visited states can be decoded, so past 100 * keep states it outputs that many and warns.'''
+        if graph_dict is None and not self.keep_states:
+            graph_dict = self.hitters.counts
+        graph_dict = self.states if graph_dict is None else graph_dict
+        k = self._decodable(graph_dict, int(math.ceil(len(graph_dict) / 100)))
+        top = top_states(graph_dict, k)
+        extra = self.hitters.extra if graph_dict is getattr(self.hitters, 'counts', None) else self._extra(graph_dict, top)
+        return [self.codec.decode(key, extra.get(key)) for key, count in top]
+
+    def _decodable(self, graph_dict, k):
+        '''k, or as many of the k most visited states in graph_dict as we can decode if that's fewer, with a RuntimeWarning. A SpillingHistogram and the heavy hitters summary keep the edge set of every state they hold; a plain dict relies on the codec's side table.'''
+        if isinstance(graph_dict, SpillingHistogram) or graph_dict is getattr(self.hitters, 'counts', None):
+            return k
+        limit = self.codec.decodable(k)
+        if limit < k:
+            warnings.warn('Only the {} most visited states can be decoded, not {}; raise codec.keep before running to decode more'.format(limit, k), RuntimeWarning)
+        return limit
+
+    def _extra(self, graph_dict, top):
+        '''The packed edge sets a SpillingHistogram kept for the given (key, count) pairs; the codec's side table covers a plain dict.'''
+        if isinstance(graph_dict, SpillingHistogram):
+            return graph_dict.find_extra(key for key, count in top)
+        return {}
+
+    def _make(self, graph, move):
+        '''Makes a single ADD or CUT Move on graph.'''
+        if move.kind == ADD:
+            self.new_edge(graph, move.u, move.v)
+        else:
+            self.cut_edge(graph, move.u, move.v)
+
+    def _delta_theta(self, move):
+        '''theta(after the proposal) - theta(now). Energy weighs one move at a time, so a compound proposal's leading parts are made on graph to weigh its last part against, and stay made (as halfway says) until update() finishes or undoes them.'''
+        steps = parts(move)
+        if len(steps) == 1:
+            return self._energy(self.graph).delta_theta(move)
+        if self.halfway is None or self.halfway[0] is not move:
+            before = self.get_theta(self.graph)
+            for part in steps[:-1]:
+                self._make(self.graph, part)
+            self.halfway = (move, self.get_theta(self.graph) - before)
+        return self.halfway[1] + self._energy(self.graph).delta_theta(steps[-1])
+
+    def _energy(self, graph):
+        '''The graph's Energy, with our value of r and edge weights taken from our distance table.'''
+        energy = energy_of(graph, self.distances)
+        energy.r = self.r
+        return energy
+
+
+_ADD_CUT = AddCutKernel()#move_q()'s
+
+
+def _undo(move):
+    '''The single Move that takes one back.'''
+    return Move(CUT if move.kind == ADD else ADD, move.u, move.v)
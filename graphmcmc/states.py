@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+import heapq
+from operator import itemgetter
+import numpy as np
+
+'''Compact, incrementally updated keys for the states histogram. A state is just an edge set over nodes 0..n-1, so we number the n(n-1)/2 possible edges and give each one a code; a graph's key is the XOR of the codes of its edges, so adding or cutting an edge updates the key in O(1). While there are at most MASK_PAIRS possible edges, edge k's code is the bit 1 << k and the key is a plain bitmask that decodes straight back to an edge list. Beyond that each edge gets a 128-bit Zobrist code drawn from a fixed hash of its number, so every chain on the same nodes agrees on it; those keys are decoded through a side table of edge sets, which the codec only keeps for the most visited states: every visit to a state is made while the graph is in it, so a state's edge set can be packed the moment its count puts it among them.
+
+Ranking states by visits is here too: top_states() pulls the most visited out of a finished histogram in one pass, and SpaceSaving follows the most visited approximately while the chain runs, in fixed memory.'''
+
+MASK_PAIRS = 1 << 16#bitmask keys are at most 8 KB each up to here
+KEEP = 1000#Zobrist-keyed states to keep decodable, by default: get_top_percent() of up to 100000 states, and the top 1000 of more
+ZOBRIST_SEED = 0x5851F42D4C957F2D#fixed, so keys from different processes can be pooled
+_MASK64 = (1 << 64) - 1
+
+
+class StateCodec(object):
+    '''Codes and keys for graphs on n nodes, and the decoding of keys back to edge lists. Zobrist keys can be decoded for the keep most visited states (by count, then key, as top_states() ranks them), or for every state given keep=None. Set audit to True to have the sampler check every key it records against the full edge set (see check()), which is slow but catches Zobrist collisions and missed updates.'''
+
+    def __init__(self, n, mask_pairs=MASK_PAIRS, audit=False, keep=KEEP):
+        self.n = n
+        self.pairs = n * (n - 1) // 2
+        self.masked = self.pairs <= mask_pairs
+        self.audit = audit
+        self.keep = keep
+        self.edges = {}#Zobrist key: the state's edge numbers as int64 bytes
+        self.counts = {}#the visits behind each key in edges
+        self.heap = []#(count, key) for each key in edges; counts only grow, so stale entries are low and get fixed when they surface
+
+    def pair(self, u, v):
+        '''The number of the edge u-v, from 0 to n(n-1)/2 - 1.'''
+        if u > v:
+            u, v = v, u
+        return u * (2 * self.n - u - 1) // 2 + (v - u - 1)
+
+    def pair_array(self, edges):
+        '''The numbers of every edge in edges (pairs, or an m x 2 array), as a sorted int64 array.'''
+        edges = np.asarray(edges if isinstance(edges, np.ndarray) else list(edges), dtype=np.int64).reshape(-1, 2)
+        u, v = edges.min(axis=1), edges.max(axis=1)
+        return np.sort(u * (2 * self.n - u - 1) // 2 + (v - u - 1))
+
+    def unpair(self, numbers):
+        '''The edges (u, v), u < v, with the given numbers.'''
+        numbers = np.asarray(numbers, dtype=np.int64)
+        n = self.n
+        #u is the last row whose first number is <= the edge number
+        firsts = np.arange(n, dtype=np.int64)
+        firsts = firsts * (2 * n - firsts - 1) // 2
+        u = np.searchsorted(firsts, numbers, side='right') - 1
+        v = numbers - firsts[u] + u + 1
+        return list(zip(u.tolist(), v.tolist()))
+
+    def code(self, u, v):
+        '''The code of the edge u-v: what adding or cutting it XORs into a key.'''
+        number = self.pair(u, v)
+        if self.masked:
+            return 1 << number
+        return _mix(ZOBRIST_SEED ^ (2 * number)) << 64 | _mix(ZOBRIST_SEED ^ (2 * number + 1))
+
+    def key(self, graph):
+        '''The key for the graph's current edge set, worked out from scratch.'''
+        numbers = self.pair_array(_edges(graph))
+        if self.masked:
+            bits = np.zeros(self.pairs, dtype=np.uint8)
+            bits[numbers] = 1
+            return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+        seed = np.uint64(ZOBRIST_SEED)
+        high = np.bitwise_xor.reduce(_mix_array(seed ^ (2 * numbers).astype(np.uint64)))
+        low = np.bitwise_xor.reduce(_mix_array(seed ^ (2 * numbers + 1).astype(np.uint64)))
+        return int(high) << 64 | int(low)
+
+    def pack(self, graph):
+        '''The graph's edge numbers as bytes: what a Zobrist key needs to be decoded.'''
+        return self.pair_array(_edges(graph)).tobytes()
+
+    def remember(self, key, count, graph):
+        '''Notes that the state with this key, which graph is in, has now been visited count times, and keeps its edge set in the side table if that puts it among the keep most visited. Returns the edge set if it has just been packed, and None otherwise.'''
+        if self.masked:
+            return None
+        if key in self.edges:
+            self.counts[key] = count
+            return None
+        if self.keep is not None and len(self.edges) >= self.keep:
+            heap, counts = self.heap, self.counts
+            while heap and heap[0][0] != counts[heap[0][1]]:
+                heapq.heapreplace(heap, (counts[heap[0][1]], heap[0][1]))
+            if not heap or (count, key) < heap[0]:
+                return None
+            least, evicted = heapq.heappop(heap)
+            del self.edges[evicted]
+            del counts[evicted]
+        packed = self.edges[key] = self.pack(graph)
+        self.counts[key] = count
+        if self.keep is not None:
+            heapq.heappush(self.heap, (count, key))
+        return packed
+
+    def trim(self, counts):
+        '''Follows the histogram counts from here on: keeps the keep keys in the side table with the highest counts there (every key in the side table must be in counts) and drops the rest. Used once the side table has been refilled from a checkpoint's log.'''
+        kept = heapq.nlargest(len(self.edges) if self.keep is None else self.keep, ((counts[key], key) for key in self.edges))
+        self.edges = dict((key, self.edges[key]) for count, key in kept)
+        self.counts = dict((key, count) for count, key in kept)
+        self.heap = sorted(kept)
+
+    def decode(self, key, packed=None):
+        '''The sorted edge list of the state with this key. A Zobrist key is looked up in the side table unless its pack() is passed in. Old-style frozenset keys come back sorted, as they are.'''
+        if isinstance(key, frozenset):
+            return sorted(key)
+        if not self.masked:
+            packed = self.edges.get(key) if packed is None else packed
+            if packed is None:
+                raise KeyError('State {:x} is not among the {} most visited, whose edge sets are kept; raise the codec\'s keep to decode more'.format(key, self.keep))
+            return self.unpair(np.frombuffer(packed, dtype=np.int64))
+        numbers = np.flatnonzero(np.unpackbits(np.frombuffer(key.to_bytes((self.pairs + 7) // 8, 'little'), dtype=np.uint8), bitorder='little'))
+        return self.unpair(numbers)
+
+    def decodable(self, k):
+        '''How many of the k most visited states decode() can decode from the side table alone: all k with bitmask keys or keep=None, and at most keep otherwise.'''
+        if self.masked or self.keep is None:
+            return k
+        return min(k, self.keep)
+
+    def check(self, key, graph):
+        '''Raises ValueError unless key is the key of graph's edge set and decodes back to it (when its edge set is kept).'''
+        if key != self.key(graph):
+            raise ValueError('The running state key has drifted from the graph it belongs to')
+        if not self.masked and key not in self.edges:
+            return#no edge set kept under key to collide with
+        if self.decode(key) != self.unpair(self.pair_array(graph.edges())):
+            raise ValueError('State key collision: two different edge sets share a key')
+
+    def absorb(self, other):
+        '''Adds another codec's side table to ours, for pooling the states of chains run elsewhere. Each chain's most visited states stay decodable, however many that comes to.'''
+        self.edges.update(other.edges)
+        for key in other.counts:
+            self.counts[key] = max(self.counts.get(key, 0), other.counts[key])
+        self.heap = sorted((count, key) for key, count in self.counts.items())
+
+
+def top_states(states, k):
+    '''The k (key, count) pairs with the highest counts in the histogram states, highest first, from one pass over it. Equal counts go by key, so however the histogram is stored the answer is the same.'''
+    return heapq.nlargest(k, states.items(), key=itemgetter(1, 0))
+
+
+class SpaceSaving(object):
+    '''The Space-Saving summary of Metwally, Agrawal and El Abbadi: approximate counts for the most frequent keys of a stream, in at most capacity slots. A new key takes the slot of the least-counted one and inherits its count as error, so each tracked count overestimates the true count by at most errors[key], and every key seen more than total/capacity times is sure to be tracked. extra holds whatever the caller wants to keep alongside a tracked key, and is dropped with it.'''
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.extra = {}
+        self.heap = []#one (count, key) per tracked key; counts only grow, so stale entries are low and get fixed when they surface
+        self.total = 0
+
+    def __contains__(self, key):
+        return key in self.counts
+
+    def __len__(self):
+        return len(self.counts)
+
+    def add(self, key, count=1):
+        '''Counts count more sightings of key. Returns True if key wasn't being tracked before.'''
+        self.total += count
+        if key in self.counts:
+            self.counts[key] += count
+            return False
+        floor = 0
+        if len(self.counts) >= self.capacity:
+            while self.heap[0][0] != self.counts[self.heap[0][1]]:
+                heapq.heapreplace(self.heap, (self.counts[self.heap[0][1]], self.heap[0][1]))
+            floor, evicted = heapq.heappop(self.heap)
+            del self.counts[evicted]
+            del self.errors[evicted]
+            self.extra.pop(evicted, None)
+        self.counts[key] = floor + count
+        self.errors[key] = floor
+        heapq.heappush(self.heap, (floor + count, key))
+        return True
+
+    def top(self, k):
+        '''The k (key, estimated count) pairs with the highest estimates, highest first.'''
+        return top_states(self.counts, k)
+
+
+class StateKey(object):
+    '''The running key of one graph. toggle() must be called for every edge added or cut, before the graph itself is edited.'''
+
+    def __init__(self, graph, codec):
+        self.graph = graph
+        self.codec = codec
+        self.rebuild()
+
+    def rebuild(self):
+        self.key = self.codec.key(self.graph)
+        self.edge_count = self.graph.number_of_edges()
+
+    def toggle(self, u, v, added):
+        '''Flip the edge u-v into (added=True) or out of the key.'''
+        self.key ^= self.codec.code(u, v)
+        self.edge_count += 1 if added else -1
+
+
+def state_of(graph, codec):
+    '''Returns the StateKey attached to graph, building it if there isn't one for this codec yet, or if the graph has been edited without a toggle(). Like the bridge index and the energy, it lives on the graph object itself.'''
+    state = getattr(graph, '_state_key', None)
+    if state is None or state.codec is not codec:
+        state = graph._state_key = StateKey(graph, codec)
+    elif state.edge_count != graph.number_of_edges():
+        state.rebuild()
+    return state
+
+
+def forget(graph):
+    '''Drop the StateKey attached to graph; used when a graph is rebuilt wholesale.'''
+    graph.__dict__.pop('_state_key', None)
+
+
+def _edges(graph):
+    '''The graph's edges, as one array if it's an array backend that can give them that way (see graphmcmc.backends).'''
+    edge_array = getattr(graph, 'edge_array', None)
+    return graph.edges() if edge_array is None else edge_array()
+
+
+def _mix(x):
+    '''splitmix64's finaliser, on Python ints.'''
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def _mix_array(x):
+    '''_mix() over a uint64 array; the products wrap mod 2**64 just as the masks above do.'''
+    with np.errstate(over='ignore'):
+        x = x + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
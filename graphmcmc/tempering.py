@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+import math
+import random
+from graphmcmc.sampler import GraphMCMCSampler
+from graphmcmc.parallel import chain_seeds
+
+'''Parallel tempering (replica exchange). One replica per temperature on a ladder, each an ordinary GraphMCMCSampler, all stepped together in this process. Every few steps neighbouring replicas propose to trade graphs, accepted with the usual replica-exchange probability worked out from the theta each replica already has on hand, so hot replicas that roam freely can hand good graphs down to the cold ones that would otherwise sit near the starting line graph.'''
+
+
+class ReplicaExchange(object):
+    '''A ladder of replicas at the given temperatures (coldest first is customary but not required). Each replica keeps its own state counts and running sums, which always belong to its temperature: on a swap we trade graphs, not temperatures. swap_every is the number of steps between swap rounds, and backend is handed to each GraphMCMCSampler.'''
+
+    def __init__(self, temperatures, nodes=None, infile=None, r=0.0, seed=None, swap_every=10, backend='networkx'):
+        entropy, seeds = chain_seeds(len(temperatures) + 1, seed)
+        self.seed = entropy#pass this back as seed to replay the same run
+        self.rng = random.Random(seeds[-1])#just for the swap decisions
+        self.temperatures = list(temperatures)
+        self.swap_every = swap_every
+        self.replicas = []
+        for T, replica_seed in zip(self.temperatures, seeds):
+            replica = GraphMCMCSampler(r=r, T=T, seed=replica_seed, backend=backend)
+            if not self.replicas:
+                if nodes is None:
+                    replica.read_file(infile)
+                else:
+                    replica.set_nodes(nodes)
+            else:
+                replica.share_nodes(self.replicas[0])#one distance table for the whole ladder
+            replica.make_graph()
+            self.replicas.append(replica)
+        self.swap_attempts = [0] * (len(self.replicas) - 1)#per neighbouring pair (k, k+1)
+        self.swap_accepts = [0] * (len(self.replicas) - 1)
+        self.steps = 0
+        self.rounds = 0
+
+    def step(self):
+        '''Advance every replica by one step, then hold a swap round if one is due.'''
+        for replica in self.replicas:
+            replica.step()
+        self.steps += 1
+        if self.swap_every and self.steps % self.swap_every == 0:
+            self.swap()
+
+    def swap(self):
+        '''One round of swap proposals. Rounds alternate between the even pairs (0,1), (2,3), ... and the odd pairs (1,2), (3,4), ..., so every pair is tried every other round and no replica is in two pairs at once.'''
+        for k in range(self.rounds % 2, len(self.replicas) - 1, 2):
+            cold, hot = self.replicas[k], self.replicas[k+1]
+            theta_cold = cold.get_theta(cold.graph)#running totals, so these are free
+            theta_hot = hot.get_theta(hot.graph)
+            #pi_cold(hot graph) * pi_hot(cold graph) / (pi_cold(cold graph) * pi_hot(hot graph))
+            log_ratio = (cold.log_pi(theta_hot) + hot.log_pi(theta_cold)) - (cold.log_pi(theta_cold) + hot.log_pi(theta_hot))
+            self.swap_attempts[k] += 1
+            if log_ratio >= 0 or self.rng.random() < math.exp(log_ratio):
+                self.swap_accepts[k] += 1
+                _trade_graphs(cold, hot)
+        self.rounds += 1
+
+    def run(self, nsteps):
+        '''Takes nsteps steps on every replica and returns the report().'''
+        for i in range(nsteps):
+            self.step()
+        return self.report()
+
+    def swap_rates(self):
+        '''The fraction of swaps accepted between each neighbouring pair of temperatures.'''
+        return [(self.swap_accepts[k] / self.swap_attempts[k]) if self.swap_attempts[k] else float('nan') for k in range(len(self.swap_attempts))]
+
+    def report(self):
+        '''A dict with each temperature's statistics (as get_stats() reports them) and the swap acceptance rates.'''
+        return {'temperatures': list(self.temperatures),
+                'stats': [replica.get_stats() for replica in self.replicas],
+                'swap_rates': self.swap_rates(),
+                'seed': self.seed}
+
+
+def _trade_graphs(first, second):
+    '''Swap the current graphs (and their proposal graphs, if they're mirroring, with the indices that live on them) between two replicas. Both must be between steps, with no proposal pending.'''
+    first.graph, second.graph = second.graph, first.graph
+    first.prop_graph, second.prop_graph = second.prop_graph, first.prop_graph
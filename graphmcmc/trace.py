@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+import struct
+import numpy as np
+from graphmcmc.energy import ADD, CUT
+from graphmcmc.kernels import REWIRE
+
+'''Per-step traces of a chain's observables, for variances, autocorrelations and effective sample sizes after the fact. A trace is one binary file: a small header, then one column per observable, each a plain little-endian array with room for the same number of rows. The file is sized up front (in whole chunks of CHUNK rows) and memory-mapped, so recording a step is a handful of stores into the mapping, with nothing allocated; when it fills up it's doubled, moving the columns apart. load_trace() maps it back and hands out the columns as NumPy arrays over the mapping itself, without copying them.'''
+
+CHUNK = 1 << 16#rows; capacities are whole chunks, which also keeps every column 8-byte aligned
+COLUMNS = (('theta', '<f8'),
+           ('edges', '<i8'),
+           ('degree0', '<i4'),#the degree of node 0
+           ('longest', '<f8'),#the longest shortest path out of node 0
+           ('accepted', '|b1'),
+           ('move', '|u1'))#see MOVES
+MOVES = {None: 0, ADD: 1, CUT: 2, REWIRE: 3}#0 is the starting state, which no move led to, or a step whose kernel proposed staying put
+OTHER = 255#any other kind of move a kernel proposes
+MAGIC = b'GMCTRACE'
+VERSION = 1
+_HEADER = struct.Struct('<8sIQQ')#magic, version, capacity, length
+_HEADER_BYTES = 64
+
+
+class TraceWriter(object):
+    '''Records one row per call to write() into the trace file at path, which is created (or overwritten) with room for capacity rows. Call flush() to make the rows so far readable by load_trace(), and close() when done.'''
+
+    def __init__(self, path, capacity=CHUNK):
+        self.path = path
+        self.length = 0
+        self.capacity = 0
+        self.file = open(path, 'w+b')
+        self.data = None
+        self.columns = {}
+        self.reserve(capacity)
+
+    def reserve(self, capacity):
+        '''Makes room for at least capacity rows in all, so that many can be written without the file growing.'''
+        if capacity <= self.capacity:
+            return
+        capacity = -(-capacity // CHUNK) * CHUNK
+        old = self.capacity
+        self.data = None
+        self.columns = {}
+        self.file.truncate(_HEADER_BYTES + capacity * _ROW_BYTES)
+        self.data = np.memmap(self.file, dtype=np.uint8, mode='r+')
+        #spread the columns out to their new places, last first, so none is overwritten before it has moved
+        for name, dtype, offset in reversed(_layout(old)):
+            new_offset = _layout(capacity, name)
+            width = self.length * np.dtype(dtype).itemsize
+            self.data[new_offset:new_offset + width] = self.data[offset:offset + width]
+        for name, dtype, offset in _layout(capacity):
+            self.columns[name] = np.ndarray(capacity, dtype=dtype, buffer=self.data, offset=offset)
+        self.capacity = capacity
+        self._write_header()
+
+    def write(self, theta, edges, degree0, longest, accepted, move):
+        '''Records one step. move is the kind of move proposed (see MOVES), or None for the starting state or a proposal to stay put.'''
+        row = self.length
+        if row == self.capacity:
+            self.reserve(2 * self.capacity)
+        columns = self.columns
+        columns['theta'][row] = theta
+        columns['edges'][row] = edges
+        columns['degree0'][row] = degree0
+        columns['longest'][row] = longest
+        columns['accepted'][row] = accepted
+        columns['move'][row] = MOVES.get(move, OTHER)
+        self.length = row + 1
+
+    def flush(self):
+        '''Writes the row count into the header and the mapping out to disk.'''
+        self._write_header()
+        self.data.flush()
+
+    def close(self):
+        if self.data is not None:
+            self.flush()
+            self.columns = {}
+            self.data = None
+            self.file.close()
+
+    def _write_header(self):
+        self.data[:_HEADER.size] = np.frombuffer(_HEADER.pack(MAGIC, VERSION, self.capacity, self.length), dtype=np.uint8)
+
+
+def load_trace(path):
+    '''The columns of the trace at path as a dict of read-only NumPy arrays, each one row per recorded step, all views of a single memory mapping of the file.'''
+    with open(path, 'rb') as f:
+        magic, version, capacity, length = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != MAGIC:
+        raise ValueError('{} is not a graphmcmc trace'.format(path))
+    if version != VERSION:
+        raise ValueError('{} is a version {} trace; this is version {}'.format(path, version, VERSION))
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    return dict((name, np.ndarray(length, dtype=dtype, buffer=data, offset=offset)) for name, dtype, offset in _layout(capacity))
+
+
+_ROW_BYTES = sum(np.dtype(dtype).itemsize for name, dtype in COLUMNS)
+
+
+def _layout(capacity, name=None):
+    '''(name, dtype, byte offset) for every column of a file with room for capacity rows, or just the offset of the named one.'''
+    layout = []
+    offset = _HEADER_BYTES
+    for column, dtype in COLUMNS:
+        if column == name:
+            return offset
+        layout.append((column, dtype, offset))
+        offset += capacity * np.dtype(dtype).itemsize
+    return layout
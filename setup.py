@@ -11,14 +11,14 @@ with open('HISTORY.rst') as history_file:
 
 requirements = [
     'Click>=6.0',
-    'graphviz>=0.5.1',
-    'networkx>=1.11'
+    'networkx>=1.11',
+    'numpy>=1.17'
     # TODO: put package requirements here
 ]
 
 test_requirements = [
-    'graphviz>=0.5.1',
-    'networkx>=1.11'
+    'networkx>=1.11',
+    'numpy>=1.17'
     # TODO: put package test requirements here
 ]
 
@@ -50,14 +50,14 @@ setup(
         'Intended Audience :: Developers',
         'License :: OSI Approved :: GNU General Public License v3 (GPLv3)',
         'Natural Language :: English',
-        "Programming Language :: Python :: 2",
-        'Programming Language :: Python :: 2.6',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
+        'Programming Language :: Python :: 3 :: Only',
         'Programming Language :: Python :: 3.5',
+        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
     ],
+    python_requires='>=3.5',
     test_suite='tests',
     tests_require=test_requirements
 )
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_backends
+----------------------------------
+
+Tests for `graphmcmc.backends` module.
+"""
+
+from __future__ import division
+import unittest
+import random
+
+from graphmcmc import backends
+from graphmcmc.sampler import GraphMCMCSampler
+from graphmcmc.states import StateCodec
+import networkx as nx
+import numpy as np
+
+
+def unit(u, v):
+    return 1.0
+
+
+class TestBackends(unittest.TestCase):
+
+    def check_against_networkx(self, graph):
+        '''Random adds and removes should leave the backend agreeing with a networkx.Graph on every query.'''
+        rng = random.Random(2)
+        truth = nx.Graph()
+        truth.add_nodes_from(range(graph.n))
+        for i in range(2000):
+            u, v = rng.sample(range(graph.n), 2)
+            if truth.has_edge(u, v):
+                truth.remove_edge(u, v)
+                graph.remove_edge(u, v)
+            else:
+                truth.add_edge(u, v)
+                graph.add_edge(u, v)
+            assert graph.has_edge(u, v) == truth.has_edge(u, v)
+            assert graph.number_of_edges() == truth.number_of_edges()
+            assert graph.degree(u) == truth.degree(u)
+        for node in range(graph.n):
+            assert sorted(graph.neighbors(node)) == sorted(truth.neighbors(node))
+        assert sorted(graph.edges()) == sorted(tuple(sorted(edge)) for edge in truth.edges())
+        assert graph.edge_array().dtype == np.int64 and [tuple(edge) for edge in graph.edge_array().tolist()] == graph.edges()
+        codec = StateCodec(graph.n, mask_pairs=0)
+        assert codec.pack(graph) == codec.pack(truth) and codec.key(graph) == codec.key(truth)
+        converted = graph.to_networkx()
+        assert converted.number_of_edges() == truth.number_of_edges()
+
+    def check_clear(self, graph):
+        graph.clear()
+        assert graph.number_of_edges() == 0 and graph.neighbors(0) == []
+
+    def test_bitset(self):
+        graph = backends.BitsetGraph(37, unit)
+        self.check_against_networkx(graph)
+        self.check_clear(graph)
+
+    def test_csr(self):
+        '''Small starting blocks make sure the grow-and-recycle path gets plenty of use.'''
+        graph = backends.CSRGraph(37, unit, capacity=1)
+        self.check_against_networkx(graph)
+        assert graph.free#blocks were moved and recycled
+        self.check_clear(graph)
+
+    def test_sampler_backends_agree(self):
+        '''The same seed should drive the same chain on every backend.'''
+        results = []
+        for backend in ('networkx', 'bitset', 'csr'):
+            sampler = GraphMCMCSampler(seed=8, r=0.4, backend=backend)
+            sampler.read_file('test_infile.txt')
+            sampler.make_graph()
+            stats = sampler.run(300)
+            edges = sorted(tuple(sorted(edge)) for edge in sampler.to_networkx().edges())
+            results.append((stats, edges))
+            assert isinstance(sampler.to_networkx(), nx.Graph)
+        for stats, edges in results[1:]:
+            assert edges == results[0][1]
+            for i in range(3):
+                assert abs(stats[i] - results[0][0][i]) < 1e-9
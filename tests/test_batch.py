@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_batch
+----------------------------------
+
+Tests for `graphmcmc.batch` module.
+"""
+
+from __future__ import division
+import unittest
+
+from graphmcmc.batch import BatchSampler
+from graphmcmc.bridges import bridge_index
+from graphmcmc.sampler import GraphMCMCSampler
+import networkx as nx
+import numpy as np
+
+
+class TestBatch(unittest.TestCase):
+
+    def test_arrays_match_the_graphs(self):
+        '''After a run every chain is connected, and its theta, longest shortest path and non-bridges are what the ordinary machinery makes of the same graph.'''
+        batch = BatchSampler(40, infile='test_infile.txt', r=0.5, seed=1)
+        batch.run(60)
+        sampler = GraphMCMCSampler(r=0.5)
+        sampler.read_file('test_infile.txt')
+        pairs = list(zip(*[side.tolist() for side in batch.pairs]))
+        for chain in range(batch.n_chains):
+            graph = batch.to_networkx(chain)
+            assert nx.is_connected(graph)
+            assert graph.number_of_edges() == batch.edge_count[chain]
+            assert set(bridge_index(graph).cuttable) == set(pair for pair, cuttable in zip(pairs, batch.nonbridges[chain]) if cuttable)
+            assert abs(sampler.get_theta(graph) - batch.theta[chain]) < 1e-9
+            assert abs(sampler.get_longest_shortest(graph) - batch.longest[chain]) < 1e-9
+
+    def test_sweep_and_seed(self):
+        '''r and T broadcast to one setting per chain, and the same seed replays the same batch.'''
+        r, T = np.meshgrid([0.0, 0.5, 1.0], [0.5, 2.0])
+        first = BatchSampler(infile='input.txt', r=r, T=T, seed=5)
+        assert first.n_chains == 6
+        assert list(first.r) == [0.0, 0.5, 1.0] * 2
+        again = BatchSampler(infile='input.txt', r=r, T=T, seed=first.seed)
+        assert (first.run(50) == again.run(50)).all()
+        assert (first.adjacency == again.adjacency).all()
+
+    def test_same_distribution(self):
+        '''Averaged over many chains, a batch gives the same statistics as one long ordinary chain.'''
+        sampler = GraphMCMCSampler(seed=0, r=0.3, T=0.5)
+        sampler.read_file('q_forward_test.txt')
+        sampler.make_graph()
+        expected = sampler.run(10000)
+        batch = BatchSampler(2000, infile='q_forward_test.txt', r=0.3, T=0.5, seed=0)
+        batch.run(100)#burn in
+        start = batch.get_stats(1)
+        found = ((batch.run(100) * 100 - start) / 100).mean(axis=0)
+        for i in range(3):
+            assert abs(found[i] - expected[i]) < 0.08
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_benchmark
+----------------------------------
+
+Tests for `graphmcmc.benchmark` module.
+"""
+
+from __future__ import division
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from click.testing import CliRunner
+
+from graphmcmc import benchmark
+import networkx as nx
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_synthetic(self):
+        '''Synthetic chains are connected and grown to the mean degree asked for, short of the complete graph.'''
+        sampler = benchmark.synthetic(50, 6, seed=2)
+        assert sampler.graph.number_of_edges() == 150
+        assert nx.is_connected(sampler.graph)
+        assert benchmark.synthetic(5, 16).graph.number_of_edges() == 10
+
+    def test_suite_and_compare(self):
+        '''A small suite times every phase of every distinct case, survives a trip through JSON, and compares against itself.'''
+        suite = benchmark.run_suite(nodes=(8, 30), degrees=(2, 4, 10, 12), min_time=0.001)
+        assert [(result['nodes'], result['degree']) for result in suite['results']] == [(8, 2), (8, 4), (8, 10), (30, 2), (30, 4), (30, 10), (30, 12)]
+        for result in suite['results']:
+            assert sorted(result['phases']) == sorted(benchmark.PHASES)
+            assert result['steps_per_sec'] > 0
+            assert result['peak_bytes'] > 0
+        suite = json.loads(json.dumps(suite))
+        rows = benchmark.compare(suite, suite)
+        assert len(rows) == 7 * len(benchmark.PHASES)
+        assert all(row[-1] == 1.0 for row in rows)
+
+    def test_command_line(self):
+        '''The command line saves its results and compares against a saved run.'''
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'bench.json')
+            runner = CliRunner()
+            result = runner.invoke(benchmark.main, ['-n', '10', '-d', '4', '--min-time', '0.001', '-o', path])
+            assert result.exit_code == 0
+            assert '10 nodes' in result.output
+            result = runner.invoke(benchmark.main, ['-n', '10', '-d', '4', '--min-time', '0.001', '--compare', path])
+            assert result.exit_code == 0
+            assert 'record_state' in result.output
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_bridges
+----------------------------------
+
+Tests for `graphmcmc.bridges` module.
+"""
+
+from __future__ import division
+import unittest
+import random
+
+from graphmcmc import bridges
+import networkx as nx
+
+
+def brute_bridges(graph):
+    '''An edge is a bridge if taking it out leaves more components than before.'''
+    found = set()
+    base = nx.number_connected_components(graph)
+    for edge in graph.edges():
+        graph.remove_edge(*edge)
+        if nx.number_connected_components(graph) > base:
+            found.add(frozenset(edge))
+        graph.add_edge(*edge)
+    return found
+
+
+class TestBridges(unittest.TestCase):
+
+    def test_small_graph(self):
+        '''A triangle with a tail: only the tail is a bridge.'''
+        testgraph = nx.Graph()
+        testgraph.add_edge(0,1)
+        testgraph.add_edge(0,2)
+        testgraph.add_edge(1,2)
+        testgraph.add_edge(0,3)
+        index = bridges.BridgeIndex(testgraph)
+        assert index.is_bridge(0,3)
+        assert index.is_bridge(3,0)
+        assert not index.is_bridge(1,2)
+        assert index.nonbridge_count() == 3
+        assert index.nonbridge_count_after_insert(2,3) == 5
+
+    def test_matches_brute_force(self):
+        '''Random adds and cuts on a connected graph should leave the index agreeing with the definition of a bridge.'''
+        rng = random.Random(7)
+        testgraph = nx.path_graph(12)
+        index = bridges.bridge_index(testgraph)
+        for i in range(300):
+            u, v = rng.sample(range(12), 2)
+            if testgraph.has_edge(u, v):
+                if not index.is_bridge(u, v):
+                    testgraph.remove_edge(u, v)
+                    index.delete(u, v)
+            else:
+                expected = index.nonbridge_count_after_insert(u, v)
+                testgraph.add_edge(u, v)
+                index.insert(u, v)
+                assert index.nonbridge_count() == expected
+            truth = brute_bridges(testgraph)
+            assert set(frozenset(edge) for edge in index.bridges()) == truth
+            assert index.nonbridge_count() == testgraph.number_of_edges() - len(truth)
+            assert set(frozenset(edge) for edge in index.cuttable) == set(frozenset(edge) for edge in testgraph.edges()) - truth
+            assert len(index.cuttable) == index.nonbridge_count()
+            assert nx.is_connected(testgraph)
+
+    def test_replaces_tree_edges(self):
+        '''Cutting a tree edge that isn't a bridge swaps an edge across into the forest rather than rebuilding it, and leaves the same covers as an index restored from the new forest.'''
+        rng = random.Random(11)
+        testgraph = nx.cycle_graph(30)
+        for i in range(40):
+            u, v = rng.sample(range(30), 2)
+            testgraph.add_edge(u, v)
+        index = bridges.bridge_index(testgraph)
+        rebuilds = []
+        rebuild = index.rebuild
+        index.rebuild = lambda: rebuilds.append(1) or rebuild()
+        cut = 0
+        for i in range(400):
+            u, v = rng.choice(testgraph.edges())
+            if index.is_bridge(u, v):
+                continue
+            cut += index.parent.get(u) == v or index.parent.get(v) == u
+            testgraph.remove_edge(u, v)
+            index.delete(u, v)
+            u, v = rng.sample(range(30), 2)
+            if not testgraph.has_edge(u, v):
+                testgraph.add_edge(u, v)
+                index.insert(u, v)
+            assert all(up is None or testgraph.has_edge(node, up) for node, up in index.parent.items())
+            copy = bridges.BridgeIndex(testgraph)
+            copy.restore(index.parent, list(index.cuttable))
+            assert copy.cover == index.cover and copy.nontree == index.nontree and copy.bridge_count == index.bridge_count
+            assert set(index.cuttable) == set(bridges.BridgeIndex(testgraph).cuttable)
+        assert cut - len(rebuilds) > 50
+
+    def test_replace_stays_linear(self):
+        '''Cutting a tree edge that many long tree paths cross walks no more of the tree than rebuilding would: a path of 200 nodes with a chord from each node in its first half to one in its second has 100 edges across the middle, 100 tree edges long on average.'''
+        n = 200
+        testgraph = nx.path_graph(n)
+        testgraph.add_edges_from((i, n - 1 - i) for i in range(n // 2 - 1))
+        index = bridges.bridge_index(testgraph)
+        assert index.parent[n // 2] == n // 2 - 1
+        walked = []
+        path = index._path
+        index._path = lambda u, v: walked.append(len(path(u, v))) or path(u, v)
+        testgraph.remove_edge(n // 2 - 1, n // 2)
+        index.delete(n // 2 - 1, n // 2)
+        assert sum(walked) <= 2 * (n + testgraph.number_of_edges())
+        assert set(frozenset(edge) for edge in index.bridges()) == brute_bridges(testgraph)
+        assert set(index.cuttable) == set(bridges.BridgeIndex(testgraph).cuttable)
+
+    def test_restore(self):
+        '''An index restored from another's forest and non-bridge order answers, and draws, exactly as the original does.'''
+        rng = random.Random(3)
+        testgraph = nx.path_graph(10)
+        index = bridges.bridge_index(testgraph)
+        for i in range(60):
+            u, v = rng.sample(range(10), 2)
+            if not testgraph.has_edge(u, v):
+                testgraph.add_edge(u, v)
+                index.insert(u, v)
+        copy = bridges.BridgeIndex(testgraph)
+        copy.restore(index.parent, list(index.cuttable))
+        assert copy.cover == index.cover and copy.depth == index.depth and copy.nontree == index.nontree
+        assert copy.bridge_count == index.bridge_count
+        assert [copy.random_nonbridge(random.Random(i)) for i in range(10)] == [index.random_nonbridge(random.Random(i)) for i in range(10)]
+
+    def test_stale_index_rebuilds(self):
+        '''Editing the graph without telling the index should not leave stale answers.'''
+        testgraph = nx.path_graph(4)
+        assert bridges.bridge_index(testgraph).nonbridge_count() == 0
+        testgraph.add_edge(0,3)
+        assert bridges.bridge_index(testgraph).nonbridge_count() == 4
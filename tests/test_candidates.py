@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_candidates
+----------------------------------
+
+Tests for `graphmcmc.candidates` module.
+"""
+
+from __future__ import division
+import random
+import unittest
+
+from graphmcmc.candidates import candidate_edges, nearest_neighbours, nearest_pairs, radius_pairs
+from graphmcmc.edgesets import edge_sets
+from graphmcmc.energy import ADD, CUT, Move
+from graphmcmc.sampler import GraphMCMCSampler
+import networkx as nx
+import numpy as np
+
+
+class TestCandidates(unittest.TestCase):
+
+    def test_grid_matches_brute_force(self):
+        '''The grid finds exactly the pairs within a radius and the k nearest neighbours that comparing every pair does, in one, two and three dimensions.'''
+        rng = np.random.RandomState(0)
+        for dim in (1, 2, 3):
+            coords = rng.random_sample((200, dim))
+            distance = np.sqrt(((coords[:, None] - coords[None]) ** 2).sum(axis=-1))
+            found = set(zip(*[side.tolist() for side in radius_pairs(coords, 0.15)]))
+            assert found == set((u, v) for u in range(200) for v in range(u + 1, 200) if distance[u, v] <= 0.15)
+            expected = set()
+            table = nearest_neighbours(coords, 4)
+            for u in range(200):
+                nearest = [v for v in np.argsort(distance[u], kind='stable') if v != u][:4]
+                assert table[u].tolist() == nearest
+                expected.update((min(u, v), max(u, v)) for v in nearest)
+            assert set(zip(*[side.tolist() for side in nearest_pairs(coords, 4)])) == expected
+        assert len(nearest_pairs(np.zeros((5, 2)), 2)[0]) > 0#all in one spot
+
+    def test_candidate_edges(self):
+        '''The candidates take in the starting line, and draw uniformly.'''
+        coords = np.random.RandomState(1).random_sample((50, 2))
+        candidates = candidate_edges(coords, neighbours=3, radius=0.1)
+        pairs = list(candidates)
+        assert pairs == sorted(set(pairs))
+        assert all((i, i + 1) in candidates for i in range(49))
+        assert all(pair in candidates for pair in zip(*[side.tolist() for side in radius_pairs(coords, 0.1)]))
+        assert len(pairs) < 50 * 49 // 4
+        for node in (0, 17, 49):
+            assert sorted(candidates.neighbours(node).tolist()) == sorted(v if u == node else u for u, v in pairs if node in (u, v))
+        rng = random.Random(2)
+        hits = dict.fromkeys(pairs, 0)
+        for i in range(100 * len(pairs)):
+            hits[candidates.random(rng)] += 1
+        assert min(hits.values()) > 50 and max(hits.values()) < 150
+        with self.assertRaises(ValueError):
+            candidate_edges(coords)
+
+    def test_restricted_chain(self):
+        '''A restricted chain only adds candidate edges and stays connected, with Nmax counting the candidates.'''
+        sampler = GraphMCMCSampler(seed=5, r=-0.5, neighbours=2)
+        sampler.read_file('input.txt')
+        assert sampler.Nmax == len(sampler.candidates) < len(sampler.nodes) * (len(sampler.nodes) - 1) / 2
+        sampler.make_graph()
+        sampler.run(3000)
+        assert all((min(u, v), max(u, v)) in sampler.candidates for u, v in sampler.graph.edges())
+        assert nx.is_connected(sampler.graph)
+        while sampler.graph.number_of_edges() <= 0.8 * sampler.Nmax:#on to the kept non-edges
+            u, v = edge_sets(sampler.graph).random_missing(sampler.rng)
+            sampler.new_edge(sampler.graph, u, v)
+        assert set(edge_sets(sampler.graph).missing) == set(pair for pair in sampler.candidates if not sampler.graph.has_edge(*pair))
+
+    def test_q_counts_candidates(self):
+        '''The q terms are the probabilities of what propose_new() actually does on a restricted chain, both ways.'''
+        sampler = GraphMCMCSampler(seed=7, neighbours=2)
+        sampler.read_file('test_infile.txt')
+        sampler.make_graph()
+        sampler.run(40)
+        counts = {}
+        draws = 20000
+        for i in range(draws):
+            sampler.propose_new()
+            counts[sampler.proposal] = counts.get(sampler.proposal, 0) + 1
+            sampler.update(False)
+        total = 0.0
+        for move, count in counts.items():
+            q = sampler.move_q(move)
+            total += q
+            assert abs(count / draws - q) < 4 * np.sqrt(q / draws) + 1e-3
+        assert abs(total - 1.0) < 1e-9#every move that can be proposed was
+        for move in counts:
+            reverse = sampler.move_q(move, reverse=True)
+            sampler.proposal = move
+            sampler.update(True)
+            back = Move(CUT if move.kind == ADD else ADD, move.u, move.v)
+            assert abs(sampler.move_q(back) - reverse) < 1e-12
+            sampler.proposal = back
+            sampler.update(True)
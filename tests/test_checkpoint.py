@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_checkpoint
+----------------------------------
+
+Tests for `graphmcmc.checkpoint` module.
+"""
+
+from __future__ import division
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from graphmcmc import checkpoint
+from graphmcmc.edgesets import edge_sets
+from graphmcmc.sampler import GraphMCMCSampler
+from graphmcmc.states import StateCodec
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'chain.ckpt')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make(self, **kwargs):
+        sampler = GraphMCMCSampler(seed=11, r=0.7, T=1.5, **kwargs)
+        sampler.read_file('test_infile.txt')
+        sampler.make_graph()
+        return sampler
+
+    def check_same(self, first, second):
+        assert first.states == second.states
+        assert first.get_stats(first.steps + 1) == second.get_stats(second.steps + 1)
+        assert first.state_key() == second.state_key()#the same edge set, whatever order networkx lists it in
+        assert first.rng.getstate() == second.rng.getstate()
+        assert first.get_theta(first.graph) == second.get_theta(second.graph)
+
+    def test_resume_is_exact(self):
+        '''A chain checkpointed along the way and resumed from its last checkpoint ends exactly where an uninterrupted one does.'''
+        straight = self.make()
+        straight.run(600)
+        interrupted = self.make()
+        interrupted.run(450, checkpoint=self.path, checkpoint_every=100)#the last save is at step 450
+        interrupted.run(50)#these steps are lost in the 'crash'
+        resumed = checkpoint.resume(self.path)
+        assert resumed.steps == 450
+        resumed.run(150, checkpoint=self.path, checkpoint_every=100)
+        self.check_same(straight, resumed)
+        again = checkpoint.resume(self.path)#the log kept growing through the second run
+        self.check_same(straight, again)
+        assert len([name for name in os.listdir(self.directory) if '.states-' in name]) == 1
+        assert len([name for name in os.listdir(self.directory) if '.nodes-' in name]) == 1
+
+    def test_nodes_written_once(self):
+        '''The nodes go to their own file with the first save, which later saves leave alone; making a new graph starts a new one.'''
+        sampler = self.make()
+        sampler.run(100, checkpoint=self.path, checkpoint_every=50)
+        nodes = [name for name in os.listdir(self.directory) if '.nodes-' in name]
+        written = os.path.getmtime(os.path.join(self.directory, nodes[0]))
+        os.utime(os.path.join(self.directory, nodes[0]), (written - 100, written - 100))
+        sampler.run(100, checkpoint=self.path, checkpoint_every=50)
+        assert os.path.getmtime(os.path.join(self.directory, nodes[0])) == written - 100
+        with np.load(self.path) as data:
+            assert 'coords' not in data.files
+        sampler.make_graph()
+        sampler.run(10, checkpoint=self.path)
+        assert [name for name in os.listdir(self.directory) if '.nodes-' in name] not in ([], nodes)
+
+    def test_resume_dense(self):
+        '''A chain dense enough to draw its additions from the kept non-edges resumes exactly, though they aren't saved.'''
+        straight = GraphMCMCSampler(seed=6, r=3.0, T=0.2)
+        straight.read_file('test_infile.txt')
+        straight.make_graph()
+        straight.run(400)
+        interrupted = GraphMCMCSampler(seed=6, r=3.0, T=0.2)
+        interrupted.read_file('test_infile.txt')
+        interrupted.make_graph()
+        interrupted.run(300, checkpoint=self.path, checkpoint_every=300)
+        assert edge_sets(interrupted.graph).missing is not None
+        resumed = checkpoint.resume(self.path)
+        assert edge_sets(resumed.graph).missing is not None
+        resumed.run(100)
+        self.check_same(straight, resumed)
+        assert resumed.get_longest_shortest(resumed.graph) == straight.get_longest_shortest(straight.graph)
+
+    def test_torn_log_tail(self):
+        '''Bytes appended to the log by a save that never finished are ignored and cut off.'''
+        sampler = self.make()
+        sampler.run(200, checkpoint=self.path, checkpoint_every=200)
+        log = os.path.join(self.directory, sampler.checkpoint_log)
+        size = os.path.getsize(log)
+        with open(log, 'ab') as f:
+            f.write(b'\x01\x02\x03')
+        resumed = checkpoint.resume(self.path)
+        assert resumed.states == sampler.states
+        assert os.path.getsize(log) == size
+
+    def test_zobrist_and_spilled_histograms(self):
+        '''Zobrist keys come back decodable, whether the histogram was a dict or spilled to disk, and a dict's codec goes on keeping the same most visited edge sets.'''
+        for budget in (None, 8):
+            straight = GraphMCMCSampler(seed=2, state_budget=budget)
+            straight.read_file('test_infile.txt')
+            straight.codec = StateCodec(len(straight.nodes), mask_pairs=0, keep=5)
+            straight.make_graph()
+            straight.run(300, checkpoint=self.path, checkpoint_every=70)
+            resumed = checkpoint.resume(self.path, state_budget=budget)
+            assert not resumed.codec.masked and resumed.codec.keep == 5
+            assert dict(resumed.states.items()) == dict(straight.states.items())
+            assert resumed.top_states(3) == straight.top_states(3)
+            if not budget:
+                assert resumed.codec.edges == straight.codec.edges#just the five most visited, as before
+                resumed.run(100)
+                straight.run(100)
+                assert resumed.codec.edges == straight.codec.edges and resumed.top_states(5) == straight.top_states(5)
+            if budget:
+                straight.states.clear()
+                resumed.states.clear()
+
+    def test_resume_mirrored(self):
+        '''A sampler that keeps prop_graph comes back with it, in step with graph.'''
+        straight = self.make(mirror=True)
+        straight.run(300)
+        interrupted = self.make(mirror=True)
+        interrupted.run(200, checkpoint=self.path, checkpoint_every=200)
+        resumed = checkpoint.resume(self.path)
+        assert resumed.mirror
+        resumed.run(100)
+        self.check_same(straight, resumed)
+        assert resumed.state_key(resumed.prop_graph) == resumed.state_key()
+
+    def test_resume_restricted(self):
+        '''A chain restricted to candidate edges comes back restricted to the same ones.'''
+        straight = self.make(neighbours=2)
+        straight.run(300)
+        interrupted = self.make(neighbours=2)
+        interrupted.run(200, checkpoint=self.path, checkpoint_every=200)
+        resumed = checkpoint.resume(self.path)
+        assert list(resumed.candidates) == list(straight.candidates)
+        assert resumed.Nmax == straight.Nmax
+        resumed.run(100)
+        self.check_same(straight, resumed)
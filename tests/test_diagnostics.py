@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_diagnostics
+----------------------------------
+
+Tests for `graphmcmc.diagnostics` module.
+"""
+
+from __future__ import division
+import math
+import random
+import unittest
+import warnings
+
+from graphmcmc import diagnostics
+from graphmcmc.diagnostics import ChainMonitor, Welford, split_rhat
+from graphmcmc.sampler import GraphMCMCSampler
+import numpy as np
+
+
+class TestDiagnostics(unittest.TestCase):
+
+    def test_welford(self):
+        '''Running means and variances come out as NumPy's.'''
+        rng = np.random.RandomState(0)
+        data = rng.normal(1e6, 3.0, size=(500, 3))
+        welford = Welford(3)
+        for row in data:
+            welford.add(row)
+        assert np.allclose(welford.mean, data.mean(axis=0))
+        assert np.allclose(welford.variance(), data.var(axis=0, ddof=1))
+
+    def test_batches_stay_bounded(self):
+        '''Merging batches keeps their number between BATCHES and 2 * BATCHES, and loses none of the samples.'''
+        monitor = ChainMonitor(width=1)
+        for i in range(10000):
+            monitor.add((i,))
+        assert diagnostics.BATCHES <= len(monitor.batches) < 2 * diagnostics.BATCHES
+        full = len(monitor.batches) * monitor.size
+        assert sum(batch[0][0] * monitor.size for batch in monitor.batches) == sum(range(full))
+        pooled = monitor.halves()
+        first = np.arange(len(monitor.batches) // 2 * monitor.size)
+        assert pooled[0][1][0] == first.mean() and abs(pooled[0][2][0] - first.var(ddof=1)) < 1e-9 * first.var()
+
+    def test_ess(self):
+        '''Independent samples are worth about as many as there are, a sticky chain far fewer, and a constant one all of them if the chain moves, but none if it's stuck.'''
+        rng = random.Random(1)
+        independent, sticky, constant, stuck = ChainMonitor(width=1), ChainMonitor(width=1), ChainMonitor(width=1), ChainMonitor(width=1)
+        x = 0.0
+        for i in range(20000):
+            independent.add((rng.gauss(0, 1),), True)
+            x = 0.99 * x + rng.gauss(0, 1)
+            sticky.add((x,), True)
+            constant.add((0.1,), i % 7 == 0)
+            stuck.add((0.1,))
+        assert 0.6 < independent.ess()[0] / 20000 < 1.6
+        assert sticky.ess()[0] < 0.05 * 20000
+        assert constant.ess() == [20000.0]
+        assert constant.halves() is not None and split_rhat([constant]) == [1.0]
+        assert math.isnan(stuck.ess()[0]) and math.isnan(split_rhat([stuck])[0])
+        assert not diagnostics.converged(diagnostics.summary([stuck]))
+
+    def test_split_rhat(self):
+        '''Chains sampling the same thing agree, and one that drifts doesn't.'''
+        rng = random.Random(2)
+        same = [ChainMonitor(width=1) for i in range(2)]
+        drifting = ChainMonitor(width=1)
+        for i in range(4000):
+            for monitor in same:
+                monitor.add((rng.gauss(0, 1),))
+            drifting.add((rng.gauss(i / 1000, 1),))
+        assert split_rhat(same)[0] < 1.01
+        assert split_rhat([drifting])[0] > 1.1
+        assert split_rhat([ChainMonitor(width=1)]) != split_rhat([ChainMonitor(width=1)])#nan
+
+    def test_run_until(self):
+        '''A chain run until convergence stops when the targets are met, well before max_steps.'''
+        sampler = GraphMCMCSampler(seed=0)
+        sampler.read_file('test_infile.txt')
+        sampler.make_graph()
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            report = sampler.run_until(target_ess=100, max_rhat=1.05, max_steps=200000)
+        assert report['converged']
+        assert report['steps'] < 200000
+        assert report['steps'] % diagnostics.CHECK_EVERY == 0
+        assert min(report['ess']) >= 100
+        assert max(report['rhat']) <= 1.05
+        assert report['samples'] == [sampler.monitor.samples]
+
+    def test_run_until_gives_up(self):
+        '''Running out of steps says so.'''
+        sampler = GraphMCMCSampler(seed=0)
+        sampler.read_file('input.txt')
+        sampler.make_graph()
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            report = sampler.run_until(max_steps=500)
+        assert not report['converged']
+        assert report['steps'] == 500
+        assert any(issubclass(warning.category, RuntimeWarning) for warning in caught)
+
+    def test_several_chains(self):
+        '''Several chains are stepped alike and pooled.'''
+        samplers = []
+        for seed in range(3):
+            sampler = GraphMCMCSampler(seed=seed)
+            sampler.read_file('test_infile.txt')
+            sampler.make_graph()
+            samplers.append(sampler)
+        report = diagnostics.run_until(samplers, target_ess=50, max_rhat=1.1, max_steps=100000)
+        assert report['converged']
+        assert report['samples'] == [sampler.monitor.samples for sampler in samplers]
+        assert len(set(sampler.steps for sampler in samplers)) == 1
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_distances
+----------------------------------
+
+Tests for `graphmcmc.distances` module.
+"""
+
+from __future__ import division
+import os
+import shutil
+import tempfile
+import unittest
+import math
+import tracemalloc
+
+from graphmcmc import graphmcmc
+from graphmcmc import distances
+import numpy as np
+
+
+class TestDistances(unittest.TestCase):
+
+    def test_dense_and_lazy_agree(self):
+        '''The dense matrix and the lazy cache should hand back the very same floats.'''
+        coords = np.random.RandomState(5).uniform(-10, 10, size=(40, 3))
+        dense = distances.DistanceTable(coords)
+        lazy = distances.DistanceTable(coords, dense_bytes=0, cache_size=16)
+        assert dense.dense and not lazy.dense
+        for i in range(40):
+            for j in range(40):
+                assert dense(i, j) == lazy(j, i)
+                assert isinstance(lazy(i, j), float)
+        assert len(lazy._cache) <= 16#the cache stays within its budget
+
+    def test_pairwise_blocks(self):
+        '''pairwise() comes to the same floats however small its blocks, and its temporaries stay within block_bytes however many dimensions there are.'''
+        coords = np.random.RandomState(6).uniform(-10, 10, size=(300, 64))
+        whole = distances.pairwise(coords, block_bytes=1 << 30)
+        for block_bytes in (1 << 20, 1 << 16):#several rows at a time, and part of one (a row is 150 KB)
+            tracemalloc.start()
+            try:
+                blocked = distances.pairwise(coords, block_bytes=block_bytes)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            assert (blocked == whole).all()
+            assert peak < whole.nbytes + 4 * block_bytes#the matrix, a block's differences and their squares, and some slack
+
+    def test_higher_dimensions(self):
+        '''Distances work the same in 3-D (and beyond) as in 2-D.'''
+        table = distances.DistanceTable([(0.0, 0.0, 0.0), (1.0, 2.0, 2.0), (1.0, 1.0, 1.0)])
+        assert table(0, 1) == 3.0
+        assert table(0, 2) == math.sqrt(3)
+        assert graphmcmc.distance((0.0, 0.0, 0.0), (1.0, 2.0, 2.0)) == 3.0
+
+    def test_read_file_builds_table(self):
+        '''read_file() should leave a coordinate array and a distance table behind, for 3-D input too.'''
+        tmpdir = tempfile.mkdtemp()
+        try:
+            infile = os.path.join(tmpdir, 'nodes3d.txt')
+            with open(infile, 'w') as f:
+                f.write('0.0,0.0,0.0\n0.0,3.0,4.0\n1.0,0.0,0.0\n')
+            graphmcmc.read_file(infile)
+            assert graphmcmc.coords.shape == (3, 3)
+            assert graphmcmc.coords.dtype == np.float64
+            graphmcmc.make_graph()
+            assert graphmcmc.graph[0][1]['weight'] == 5.0
+        finally:
+            shutil.rmtree(tmpdir)
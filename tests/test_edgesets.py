@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_edgesets
+----------------------------------
+
+Tests for `graphmcmc.edgesets` module.
+"""
+
+from __future__ import division
+import random
+import unittest
+
+import networkx as nx
+from graphmcmc import edgesets
+from graphmcmc.edgesets import IndexedSet, RankedSet, edge_sets
+from graphmcmc.sampler import GraphMCMCSampler
+
+
+class TestEdgeSets(unittest.TestCase):
+
+    def test_indexed_set(self):
+        '''Adds and removes keep the list and the index in step, and choice() covers every item evenly.'''
+        rng = random.Random(0)
+        items = IndexedSet()
+        truth = set()
+        for i in range(2000):
+            item = rng.randrange(50)
+            if item in truth:
+                items.remove(item)
+                truth.remove(item)
+            else:
+                items.add(item)
+                truth.add(item)
+            assert len(items) == len(truth)
+        assert set(items) == truth
+        for item in items:
+            assert items.items[items.index[item]] == item
+        self.assertRaises(KeyError, items.remove, 1000)
+        items.discard(1000)
+        hits = dict.fromkeys(truth, 0)
+        for i in range(200 * len(truth)):
+            hits[items.choice(rng)] += 1
+        assert min(hits.values()) > 100 and max(hits.values()) < 300
+
+    def test_ranked_set(self):
+        '''Adds and removes keep the tree in step with the items, choice() covers every item evenly, and what it draws depends only on the items, not the order they came in.'''
+        rng = random.Random(0)
+        items = RankedSet(50, lambda item: item - 100, lambda place: place + 100)
+        truth = set()
+        for i in range(2000):
+            item = 100 + rng.randrange(50)
+            if item in truth:
+                items.remove(item)
+                truth.remove(item)
+            else:
+                items.add(item)
+                truth.add(item)
+            assert len(items) == len(truth)
+        assert list(items) == sorted(truth)
+        self.assertRaises(KeyError, items.remove, 100 + next(place for place in range(50) if 100 + place not in truth))
+        again = RankedSet(50, items.place, items.item, sorted(truth, reverse=True))
+        assert [again.choice(random.Random(i)) for i in range(50)] == [items.choice(random.Random(i)) for i in range(50)]
+        hits = dict.fromkeys(truth, 0)
+        for i in range(200 * len(truth)):
+            hits[items.choice(rng)] += 1
+        assert min(hits.values()) > 100 and max(hits.values()) < 300
+
+    def test_sparse_and_dense(self):
+        '''Missing pairs are drawn correctly either side of the density switch, and the switch happens where it should.'''
+        rng = random.Random(1)
+        graph = nx.path_graph(8)
+        sets = edge_sets(graph)
+        pairs = 8 * 7 // 2
+        while graph.number_of_edges() < pairs:
+            u, v = sets.random_missing(rng)
+            assert u != v and not graph.has_edge(u, v)
+            sets.add(u, v)
+            graph.add_edge(u, v)
+            assert (sets.missing is not None) == (graph.number_of_edges() > edgesets.DENSE * pairs)
+            if sets.missing is not None:
+                assert set(sets.missing) == set((u, v) for u in range(8) for v in range(u + 1, 8) if not graph.has_edge(u, v))
+        while graph.number_of_edges() > 10:
+            u, v = sets.random_edge(rng)
+            sets.remove(u, v)
+            graph.remove_edge(u, v)
+        assert sets.missing is None
+        assert set(sets.edges) == set(tuple(sorted(edge)) for edge in graph.edges())
+
+    def test_proposals_near_full(self):
+        '''A chain pushed up against the complete graph still proposes additions quickly, and stays connected.'''
+        sampler = GraphMCMCSampler(seed=6, r=3.0, T=0.2)#theta grows with every edge, so this chain piles them on
+        sampler.read_file('test_infile.txt')
+        sampler.make_graph()
+        sampler.run(300)
+        assert sampler.graph.number_of_edges() > edgesets.DENSE * sampler.Nmax
+        assert edge_sets(sampler.graph).missing is not None
+        assert nx.is_connected(sampler.graph)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_energy
+----------------------------------
+
+Tests for `graphmcmc.energy` module.
+"""
+
+from __future__ import division
+import unittest
+import random
+
+from graphmcmc import graphmcmc
+from graphmcmc import energy
+import networkx as nx
+
+
+def full_theta(graph, r):
+    '''theta the long way: every weight and every Dijkstra distance summed from scratch.'''
+    weights = sum(nx.get_edge_attributes(graph, 'weight').values())
+    lengths = sum(nx.single_source_dijkstra_path_length(graph, 0, weight='weight').values())
+    return r * weights + lengths
+
+
+class TestEnergy(unittest.TestCase):
+
+    def test_delta_theta_matches_recomputation(self):
+        '''Every proposed move's delta_theta should equal theta(after) - theta(before), recomputed in full, whether or not we then take the move.'''
+        rng = random.Random(11)
+        graphmcmc.read_file('test_infile.txt')
+        graphmcmc.make_graph()
+        graphmcmc.r = 0.7
+        try:
+            for i in range(200):
+                graphmcmc.propose_new()
+                move = graphmcmc.proposal
+                before = full_theta(graphmcmc.graph, graphmcmc.r)
+                after = full_theta(graphmcmc.prop_graph, graphmcmc.r)
+                delta = graphmcmc._energy(graphmcmc.graph).delta_theta(move)
+                assert abs(delta - (after - before)) < 1e-9
+                assert abs(graphmcmc.get_theta(graphmcmc.prop_graph) - after) < 1e-9
+                graphmcmc.update(rng.random() < 0.5)
+                assert abs(graphmcmc.get_theta(graphmcmc.graph) - full_theta(graphmcmc.graph, graphmcmc.r)) < 1e-9
+        finally:
+            graphmcmc.r = 0.0
+
+    def test_apply_keeps_totals(self):
+        '''Applying moves one after another should keep theta equal to a from-scratch Energy.'''
+        graph = nx.Graph()
+        for i in range(5):
+            graph.add_edge(i, i+1, weight=1.0 + i)
+        tracked = energy.Energy(graph, r=2.0, edge_weight=lambda u, v: 3.0)
+        for move in [energy.Move(energy.ADD, 0, 5), energy.Move(energy.ADD, 2, 4), energy.Move(energy.CUT, 0, 1)]:
+            before = tracked.theta()
+            delta = tracked.delta_theta(move)
+            tracked.apply(move)
+            if move.kind == energy.ADD:
+                graph.add_edge(move.u, move.v, weight=3.0)
+            else:
+                graph.remove_edge(move.u, move.v)
+            assert abs(tracked.theta() - full_theta(graph, 2.0)) < 1e-9
+            assert abs(tracked.theta() - (before + delta)) < 1e-9
+            assert abs(energy.Energy(graph, r=2.0).theta() - tracked.theta()) < 1e-9
@@ -17,7 +17,6 @@ from click.testing import CliRunner
 from graphmcmc import graphmcmc
 from graphmcmc import cli
 import networkx as nx
-import graphviz as gv
 import math
 import copy
 
@@ -128,12 +127,43 @@ class TestGraphmcmc(unittest.TestCase):
         
     def test_command_line_interface(self):
         runner = CliRunner()
-        result = runner.invoke(cli.main)
-        assert result.exit_code == 0
-        assert 'graphmcmc.cli.main' in result.output
         help_result = runner.invoke(cli.main, ['--help'])
         assert help_result.exit_code == 0
         assert '--help  Show this message and exit.' in help_result.output
+        assert 'run' in help_result.output
+        result = runner.invoke(cli.main, ['run', self.test_infile, '--steps', '200', '--seed', '3'])
+        assert result.exit_code == 0
+        assert 'expected number of edges' in result.output
+        again = runner.invoke(cli.main, ['run', self.test_infile, '--steps', '200', '--seed', '3'])
+        assert again.output == result.output
+
+    def test_command_line_formats(self):
+        '''run prints JSON and CSV too, pooling several chains, and rejects bad values before running anything.'''
+        import json
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ['run', self.test_infile, '-n', '100', '-c', '3', '-w', '1', '--seed', '5', '-r', '0.5', '-T', '2', '-f', 'json'])
+        assert result.exit_code == 0
+        summary = json.loads(result.output)
+        assert summary['seed'] == 5 and summary['chains'] == 3 and summary['T'] == 2.0
+        assert summary['samples'] == 3 * 101
+        assert sorted(summary['stats']) == sorted(cli.QUANTITIES)
+        assert all(summary['stderr'][quantity] is not None for quantity in cli.QUANTITIES)
+        rows = runner.invoke(cli.main, ['run', self.test_infile, '-n', '100', '--seed', '5', '-f', 'csv']).output.splitlines()
+        assert rows[0] == 'quantity,mean,stderr'
+        assert [row.split(',')[0] for row in rows[1:]] == list(cli.QUANTITIES)
+        assert rows[1].endswith(',')#no spread to measure with one chain
+        result = runner.invoke(cli.main, ['run', self.test_infile, '-n', '100', '--seed', '5', '-r', '1', '--kernel', 'rewire', '-f', 'json'])
+        assert result.exit_code == 0 and json.loads(result.output)['kernel'] == 'rewire'
+        assert runner.invoke(cli.main, ['run', self.test_infile, '--chains', '0']).exit_code != 0
+        assert runner.invoke(cli.main, ['run', self.test_infile, '--kernel', 'swap']).exit_code != 0
+        result = runner.invoke(cli.main, ['run', self.test_infile, '--seed', '-1'])
+        assert result.exit_code == 2 and 'Invalid value' in result.output#a usage error, not SeedSequence's traceback
+
+    def test_command_line_imports_lazily(self):
+        '''Loading the command line doesn't load the sampler or what it needs.'''
+        import subprocess
+        script = 'import sys, graphmcmc.cli; print(" ".join(sorted(m for m in ("networkx", "numpy", "graphmcmc.sampler") if m in sys.modules)))'
+        assert subprocess.check_output([sys.executable, '-c', script]).decode().strip() == ''
 
 
         
@@ -184,7 +214,7 @@ class TestGraphmcmc(unittest.TestCase):
             graphmcmc.new_edge(graphmcmc.prop_graph, 0, 2)
             graphmcmc.propose_new()#this changes only the proposal graph in a predictable way
             prob_forward = graphmcmc.get_q(graphmcmc.graph, graphmcmc.prop_graph)
-            assert prob_forward == 1#this should be our only choice.
+            assert abs(prob_forward - float(1.0)/float(3.0)) < 1 * 10 **-7#three edges on the triangle we could cut
 
         testfile2 = 'q_forward_test.txt'#a second check
         for i in range(100):
@@ -204,7 +234,7 @@ class TestGraphmcmc(unittest.TestCase):
             graphmcmc.make_graph()
             graphmcmc.propose_new()#this changes only the proposal graph in a predictable way
             prob_forward = graphmcmc.get_q(graphmcmc.prop_graph, graphmcmc.graph)
-            assert prob_forward == 1#this should be our only choice.
+            assert abs(prob_forward - float(1.0)/float(3.0)) < 1 * 10 **-7#the triangle has three cuttable edges to come back through
 
         testfile2 = 'q_forward_test.txt'#a second check
         for i in range(100):
@@ -243,11 +273,11 @@ class TestGraphmcmc(unittest.TestCase):
         #pretend we stayed at this state for testing
         graphmcmc.record_state()
         assert len(graphmcmc.states) == 1
-        assert graphmcmc.states[frozenset(nx.get_edge_attributes(graphmcmc.graph, 'weight'))] == 2
+        assert graphmcmc.states[graphmcmc.state_key(graphmcmc.graph)] == 2
         graphmcmc.new_edge(graphmcmc.graph, 0,2)
         graphmcmc.record_state()
         assert len(graphmcmc.states) == 2
-        assert graphmcmc.states[frozenset(nx.get_edge_attributes(graphmcmc.graph, 'weight'))] == 1
+        assert graphmcmc.states[graphmcmc.state_key(graphmcmc.graph)] == 1
 
     def test_get_theta(self):
         '''This checks that the calculated value for theta is accurate for a small control graph.'''
@@ -343,7 +373,11 @@ class TestGraphmcmc(unittest.TestCase):
         orig_zero_sum = copy.deepcopy(graphmcmc.zero_degree_sum)
         orig_edge_sum = copy.deepcopy(graphmcmc.edge_sum)
         orig_long_sum = copy.deepcopy(graphmcmc.long_short_sum)
-        graphmcmc.step()
+        graphmcmc.r = 1.0#with r = 0 the only move, adding 0-2, is accepted with probability 1 * q(i|j)/q(j|i) = (1/3)/1; weighting edges makes it certain
+        try:
+            graphmcmc.step()
+        finally:
+            graphmcmc.r = 0.0
         assert graphmcmc.graph.number_of_edges() == 3
         assert graphmcmc.prop_graph.number_of_edges() == 3#should have made a move
         assert graphmcmc.zero_degree_sum > orig_zero_sum
@@ -353,7 +387,7 @@ class TestGraphmcmc(unittest.TestCase):
         assert graphmcmc.long_short_sum > orig_long_sum
         assert graphmcmc.long_short_sum == 4
         #also need to make sure the number of states in states has increased.
-        assert (len(graphmcmc.states) == 2 or graphmcmc.states[frozenset(nx.get_edge_attributes(graphmcmc.graph, 'weight'))] == 2)
+        assert (len(graphmcmc.states) == 2 or graphmcmc.states[graphmcmc.state_key(graphmcmc.graph)] == 2)
 
     def test_track_zero_degree(self):
         '''This makes sure that we're keeping track of the degree of the 0-node at each step.'''
@@ -388,7 +422,11 @@ class TestGraphmcmc(unittest.TestCase):
         testfile = 'next_test.txt'
         graphmcmc.read_file(testfile)
         graphmcmc.make_graph()
-        graphmcmc.run(2)#run only 2 steps
+        graphmcmc.r = 1.0#so the first step is sure to move (see test_step)
+        try:
+            graphmcmc.run(2)#run only 2 steps
+        finally:
+            graphmcmc.r = 0.0
         #either we went forward one and then back, or we saw two new states
         assert len(graphmcmc.states) == 2 or len(graphmcmc.states) == 3
 
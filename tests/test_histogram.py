@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_histogram
+----------------------------------
+
+Tests for `graphmcmc.histogram` module.
+"""
+
+from __future__ import division
+import gc
+import os
+import random
+import unittest
+
+from graphmcmc import histogram
+from graphmcmc.histogram import SpillingHistogram
+from graphmcmc.sampler import GraphMCMCSampler
+from graphmcmc.states import StateCodec
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_matches_dict(self):
+        '''With spills (and a compaction) along the way, the histogram reads back exactly like a dict of the same counts.'''
+        rng = random.Random(0)
+        spilling = SpillingHistogram(budget=50)
+        true = {}
+        old_max = histogram.MAX_RUNS
+        histogram.MAX_RUNS = 5
+        try:
+            for i in range(5000):
+                key = rng.getrandbits(rng.choice((3, 9, 70, 130)))
+                spilling.add(key)
+                true[key] = true.get(key, 0) + 1
+        finally:
+            histogram.MAX_RUNS = old_max
+        assert spilling.spills > 5 and 0 < len(spilling.runs) <= 6
+        assert len(spilling.counts) <= 50
+        assert dict(spilling.items()) == true
+        assert len(spilling) == len(true)
+        assert sorted(spilling) == sorted(true)
+        for key in list(true)[:20]:
+            assert key in spilling and spilling[key] == true[key]
+        assert (1 << 200) not in spilling
+        self.assertRaises(KeyError, spilling.__getitem__, 1 << 200)
+        directory = spilling.directory
+        spilling.clear()
+        assert not os.path.exists(directory)
+        assert len(spilling) == 0
+
+    def test_extra_survives_spills(self):
+        '''Bytes kept with a key come back after it has been spilled, whichever run they landed in.'''
+        spilling = SpillingHistogram(budget=4)
+        for key in range(10):
+            if spilling.add(key) and key % 3 == 0:
+                spilling.extra[key] = str(key).encode()
+        spilling.add(3)
+        assert spilling.find_extra([0, 3, 4, 9]) == {0: b'0', 3: b'3', 9: b'9'}
+        spilling.clear()
+
+    def test_cleanup(self):
+        '''The scratch directory goes with close(), or with the histogram itself if nobody calls it; the distinct count stays right as keys come in.'''
+        spilling = SpillingHistogram(budget=4)
+        for key in range(10):
+            spilling.add(key)
+        assert len(spilling) == 10
+        spilling.add(9)
+        assert len(spilling) == 10 and spilling.length == 10#9 was in memory, so nothing needed counting again
+        spilling.add(0)
+        assert spilling.length is None and len(spilling) == 10
+        directory = spilling.directory
+        spilling.close()
+        assert not os.path.exists(directory) and len(spilling) == 0
+        dropped = SpillingHistogram(budget=4)
+        for key in range(10):
+            dropped.add(key)
+        directory = dropped.directory
+        assert os.path.exists(directory)
+        del dropped
+        gc.collect()
+        assert not os.path.exists(directory)
+
+    def test_sampler_with_budget(self):
+        '''A chain with a small state budget records the same states, and picks the same top states, as one with a plain dict.'''
+        plain = GraphMCMCSampler(seed=4)
+        plain.read_file('test_infile.txt')
+        budgeted = GraphMCMCSampler(seed=4, state_budget=8)
+        budgeted.share_nodes(plain)
+        for sampler in (plain, budgeted):
+            sampler.codec = StateCodec(len(sampler.nodes), mask_pairs=0)#Zobrist keys, so decoding needs the kept edge sets
+            sampler.make_graph()
+            sampler.run(400)
+        assert budgeted.states.runs
+        assert dict(budgeted.states.items()) == plain.states
+        assert budgeted.top_states(3) == plain.top_states(3)
+        assert budgeted.get_top_percent() == plain.get_top_percent()
+        budgeted.states.clear()
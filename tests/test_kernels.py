@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_kernels
+----------------------------------
+
+Tests for `graphmcmc.kernels` module.
+"""
+
+from __future__ import division
+import itertools
+import math
+import os
+import shutil
+import tempfile
+import unittest
+
+from graphmcmc import trace
+from graphmcmc.energy import ADD, CUT, Move
+from graphmcmc.kernels import AddCutKernel, LocalKernel, MixtureKernel, REWIRE, RewireKernel, make_kernel
+from graphmcmc.sampler import GraphMCMCSampler
+import networkx as nx
+import numpy as np
+
+NODES = [(0.0, 0.0), (1.0, 0.0), (0.0, 1.0), (1.0, 1.5)]
+
+
+def exact(sampler):
+    '''pi over every connected graph the sampler can reach, by enumeration, keyed by sorted edge list.'''
+    n = len(sampler.nodes)
+    pairs = list(sampler.candidates) if sampler.candidates is not None else list(itertools.combinations(range(n), 2))
+    weights = {}
+    for mask in range(1 << len(pairs)):
+        graph = nx.Graph()
+        graph.add_nodes_from(range(n))
+        graph.add_weighted_edges_from((u, v, sampler.distances(u, v)) for bit, (u, v) in enumerate(pairs) if mask >> bit & 1)
+        if nx.is_connected(graph):
+            theta = sampler.r * graph.size(weight='weight') + sum(nx.single_source_dijkstra_path_length(graph, 0).values())
+            weights[tuple(sorted(graph.edges()))] = math.exp(theta / sampler.T)
+    total = sum(weights.values())
+    return dict((edges, weight / total) for edges, weight in weights.items())
+
+
+class TestKernels(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_add_cut_is_the_default(self):
+        '''Without a kernel a sampler proposes with an AddCutKernel, whose q terms are move_q()'s.'''
+        default = GraphMCMCSampler(NODES, seed=3)
+        given = GraphMCMCSampler(NODES, seed=3, kernel=AddCutKernel())
+        assert isinstance(default.kernel, AddCutKernel)
+        default.make_graph()
+        given.make_graph()
+        assert default.run(500) == given.run(500)
+        assert default.states == given.states
+        default.propose_new()
+        move = default.proposal
+        assert default.kernel.q(default, move) == default.move_q(move)
+        assert abs(default.kernel.log_q_ratio(default, move) - math.log(default.move_q(move, reverse=True) / default.move_q(move))) < 1e-12
+
+    def test_exact_distribution(self):
+        '''Every kernel's chain visits each graph about as often as pi says, unrestricted and restricted alike; a wrong Hastings term puts the visits several times further off than this allows.'''
+        for kernel, restrict in ((AddCutKernel(), {}),
+                                 (make_kernel('rewire'), {}),
+                                 (LocalKernel(2, 0.6), {}),
+                                 (MixtureKernel([AddCutKernel(), RewireKernel()], [1, 2]), {'neighbours': 2}),
+                                 (LocalKernel(3, 0.5), {'neighbours': 2})):
+            sampler = GraphMCMCSampler(NODES, r=-0.5, T=3.0, seed=1, kernel=kernel, **restrict)
+            pi = exact(sampler)
+            sampler.make_graph()
+            sampler.run(20000)
+            visits = dict((tuple(sampler.decode_state(key)), count) for key, count in sampler.states.items())
+            assert set(visits) <= set(pi)
+            distance = 0.5 * sum(abs(visits.get(edges, 0) / sampler.samples - p) for edges, p in pi.items())
+            assert distance < 0.12, (kernel, distance)
+
+    def test_local_q(self):
+        '''LocalKernel's q terms are the probabilities of what it actually proposes, both ways.'''
+        sampler = GraphMCMCSampler(NODES + [(2.0, 0.5), (0.5, 2.0)], seed=6, kernel=LocalKernel(2, 0.7))
+        sampler.make_graph()
+        sampler.run(30)
+        kernel = sampler.kernel
+        counts = {}
+        draws = 20000
+        for i in range(draws):
+            sampler.propose_new()
+            move = sampler.proposal
+            move = move if move is None else Move(move.kind, min(move.u, move.v), max(move.u, move.v))#either way round is the same move
+            counts[move] = counts.get(move, 0) + 1
+            sampler.update(False)
+        total = counts.get(None, 0) / draws
+        for move, count in counts.items():
+            if move is not None:
+                q = kernel.q(sampler, move)
+                total += q
+                assert abs(count / draws - q) < 4 * np.sqrt(q / draws) + 1e-3
+        assert abs(total - 1.0) < 0.01
+        for move in [move for move in counts if move is not None]:
+            reverse = kernel.q(sampler, move, reverse=True)
+            sampler.proposal = move
+            sampler.update(True)
+            back = Move(CUT if move.kind == ADD else ADD, move.u, move.v)
+            assert abs(kernel.q(sampler, back) - reverse) < 1e-12
+            sampler.proposal = back
+            sampler.update(True)
+
+    def test_rewire(self):
+        '''A rewiring keeps the edge count and the graph connected, stays among the candidates, and is counted and traced as its own kind; picking a bridge proposes staying put.'''
+        path = os.path.join(self.directory, 'trace.bin')
+        sampler = GraphMCMCSampler(seed=2, r=1.0, T=2.0, neighbours=3, profile=True, trace=path, kernel=make_kernel('rewire'))
+        sampler.read_file('input.txt')
+        sampler.make_graph()
+        kernel = RewireKernel()
+        assert all(kernel.propose(sampler, sampler.rng) is None for i in range(20))#a tree is all bridges
+        for i in range(500):
+            sampler.step()
+            edges = sampler.graph.number_of_edges()
+            sampler.propose_new()
+            move = sampler.proposal
+            if move is not None and move.kind == REWIRE:
+                assert sampler.kernel.log_q_ratio(sampler, move) == 0.0
+                accepted = sampler.accept_move()
+                sampler.update(accepted)
+                assert sampler.graph.number_of_edges() == edges
+            else:
+                sampler.update(False)
+        assert nx.is_connected(sampler.graph)
+        assert all((min(u, v), max(u, v)) in sampler.candidates for u, v in sampler.graph.edges())
+        report = sampler.profiler.report()
+        assert report['proposed'][REWIRE] > 0 and report['stays'] > 0
+        assert report['steps'] == report['stays'] + sum(report['proposed'].values())
+        sampler.close()
+        moves = trace.load_trace(path)['move']
+        assert (moves == trace.MOVES[REWIRE]).any()
+
+    def test_bad_kernels(self):
+        '''Mixtures of kernels proposing the same kind, a LocalKernel that never cuts and unknown names are refused.'''
+        with self.assertRaises(ValueError):
+            MixtureKernel([AddCutKernel(), LocalKernel()])
+        with self.assertRaises(ValueError):
+            MixtureKernel([AddCutKernel(), RewireKernel()], [1, 0])
+        with self.assertRaises(ValueError):
+            LocalKernel(local=1.0)
+        with self.assertRaises(ValueError):
+            make_kernel('swap')
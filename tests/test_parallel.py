@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_parallel
+----------------------------------
+
+Tests for `graphmcmc.parallel` module.
+"""
+
+from __future__ import division
+import unittest
+
+from graphmcmc import graphmcmc
+from graphmcmc import parallel
+
+
+class TestParallel(unittest.TestCase):
+
+    def test_pool_matches_serial(self):
+        '''The same master seed should give the same chains whether they run in a pool or one after another.'''
+        pooled = parallel.run_chains(4, 50, workers=2, infile='test_infile.txt', r=0.5, seed=123)
+        serial = parallel.run_chains(4, 50, workers=1, infile='test_infile.txt', r=0.5, seed=pooled['seed'])
+        assert pooled['stats'] == serial['stats']
+        assert pooled['states'] == serial['states']
+        assert [chain['seed'] for chain in pooled['chains']] == [chain['seed'] for chain in serial['chains']]
+
+    def test_merged_counts(self):
+        '''The merged histogram and sums should add up over every chain.'''
+        result = parallel.run_chains(3, 40, workers=1, infile='test_infile.txt', seed=9)
+        assert len(set(chain['seed'] for chain in result['chains'])) == 3
+        assert sum(result['states'].values()) == 3 * 41
+        assert result['samples'] == 3 * 41
+        assert abs(result['stats'][1] - result['sums'][1] / (3 * 41)) < 1e-12
+        pooled_edges = sum(chain['stats'][1] for chain in result['chains']) / 3
+        assert abs(result['stats'][1] - pooled_edges) < 1e-9#equal-length chains, so the pooled mean is the mean of means
+        assert result['stderr'][1] >= 0
+
+    def test_module_wrapper(self):
+        '''run_chains() on the module uses the nodes from read_file().'''
+        graphmcmc.read_file('next_test.txt')
+        result = graphmcmc.run_chains(2, 10, workers=1, seed=0)
+        for key in result['states']:
+            assert len(result['codec'].decode(key)) in (2, 3)#every state of a 3-node graph has 2 or 3 edges
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_paths
+----------------------------------
+
+Tests for `graphmcmc.paths` module.
+"""
+
+from __future__ import division
+import unittest
+import random
+
+from graphmcmc import paths
+import networkx as nx
+
+
+class TestPaths(unittest.TestCase):
+
+    def check(self, engine, graph):
+        '''The engine should agree with a from-scratch Dijkstra, node for node.'''
+        truth = nx.single_source_dijkstra_path_length(graph, 0, weight='weight')
+        assert set(engine.dist) == set(truth)
+        for node in truth:
+            assert abs(engine.dist[node] - truth[node]) < 1e-9
+        assert abs(engine.total - sum(truth.values())) < 1e-9
+        assert engine.longest() == max(engine.dist.values())
+
+    def test_matches_dijkstra(self):
+        '''Random adds and removes, each proposed first and then committed, should track networkx exactly.'''
+        rng = random.Random(3)
+        graph = nx.Graph()
+        for i in range(14):
+            graph.add_edge(i, i+1, weight=rng.uniform(0.1, 2.0))
+        engine = paths.ShortestPaths(graph)
+        for i in range(400):
+            u, v = rng.sample(range(15), 2)
+            before = engine.total
+            if graph.has_edge(u, v):
+                changes = engine.propose_delete(u, v)
+                assert engine.total == before#proposing must not change anything
+                delta = engine.delta(changes)
+                graph.remove_edge(u, v)
+                engine.apply(changes)
+            else:
+                w = rng.uniform(0.1, 2.0)
+                changes = engine.propose_insert(u, v, w)
+                assert engine.total == before
+                delta = engine.delta(changes)
+                graph.add_edge(u, v, weight=w)
+                engine.apply(changes)
+            assert abs(engine.total - (before + delta)) < 1e-9
+            self.check(engine, graph)
+
+    def test_disconnecting_cut(self):
+        '''Removing a bridge drops the far side from the distances, as networkx does.'''
+        graph = nx.Graph()
+        graph.add_edge(0, 1, weight=1.0)
+        graph.add_edge(1, 2, weight=1.0)
+        engine = paths.ShortestPaths(graph)
+        assert engine.longest() == 2.0
+        graph.remove_edge(1, 2)
+        engine.delete(1, 2)
+        self.check(engine, graph)
+        assert engine.longest() == 1.0
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_points
+----------------------------------
+
+Tests for `graphmcmc.points` module.
+"""
+
+from __future__ import division
+import os
+import shutil
+import tempfile
+import unittest
+
+from graphmcmc.points import PointList, load_points, parse_points, save_points
+from graphmcmc.sampler import GraphMCMCSampler
+import numpy as np
+
+
+class TestPoints(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_text_as_before(self):
+        '''The bulk parser reads a text file to exactly the floats the line-at-a-time one did.'''
+        with open('input.txt') as f:
+            expected = [tuple(map(float, line.split(','))) for line in f]
+        coords = load_points('input.txt')
+        assert coords.dtype == np.float64 and coords.flags['C_CONTIGUOUS']
+        assert [tuple(point) for point in coords.tolist()] == expected
+        assert parse_points(b'1.5,-2\r\n3,4e-3\r\n\n').tolist() == [[1.5, -2.0], [3.0, 0.004]]
+        assert parse_points(b'0.25,0.5,1').shape == (1, 3)
+
+    def test_bad_text(self):
+        '''Ragged, blank or unreadable lines are refused, not misread.'''
+        for text in (b'1,2\n3,4,5\n6', b'1,2\n\n3,4', b'1,x\n3,4', b'1,,2\n3,4,5'):
+            with self.assertRaises(ValueError):
+                parse_points(text)
+
+    def test_binary(self):
+        '''.npy and raw files are memory-mapped, and a sampler reading one runs the same chain as it does from the text.'''
+        coords = load_points('test_infile.txt')
+        npy = os.path.join(self.directory, 'points.npy')
+        raw = os.path.join(self.directory, 'points.f64')
+        save_points(npy, coords)
+        coords.astype('<f8').tofile(raw)
+        for path in (npy, raw):
+            mapped = load_points(path)
+            assert isinstance(mapped, np.memmap)
+            assert (mapped == coords).all()
+        assert load_points(raw, dim=3).shape == (4, 3)
+        with self.assertRaises(ValueError):
+            load_points(raw, dim=5)
+        text = GraphMCMCSampler(seed=2)
+        text.read_file('test_infile.txt')
+        binary = GraphMCMCSampler(seed=2)
+        binary.read_file(npy)
+        assert binary.Nmin == text.Nmin and binary.Nmax == text.Nmax
+        text.make_graph()
+        binary.make_graph()
+        assert text.run(200) == binary.run(200)
+        assert text.states == binary.states
+
+    def test_point_list(self):
+        '''nodes still looks like a list of tuples of floats, over the sampler's own array.'''
+        sampler = GraphMCMCSampler()
+        nodes = sampler.nodes
+        assert len(nodes) == 0 and not nodes
+        sampler.read_file('next_test.txt')
+        assert sampler.nodes is nodes and nodes.coords is sampler.coords
+        assert len(nodes) == 3
+        assert all(isinstance(point, tuple) and all(isinstance(x, float) for x in point) for point in nodes)
+        assert nodes[1] == tuple(sampler.coords[1].tolist())
+        assert nodes[1:] == list(nodes)[1:]
+        assert nodes == PointList(sampler.coords.copy())
+        coords = np.zeros((4, 2))
+        sampler.set_nodes(coords)
+        assert sampler.coords is coords#already float64, so used as it is
+        assert sampler.Nmax == 6
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_profiling
+----------------------------------
+
+Tests for `graphmcmc.profiling` module.
+"""
+
+from __future__ import division
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from graphmcmc.energy import ADD, CUT
+from graphmcmc.profiling import PHASES, StepStats
+from graphmcmc.sampler import GraphMCMCSampler
+
+
+class TestProfiling(unittest.TestCase):
+
+    def make(self, **kwargs):
+        sampler = GraphMCMCSampler(seed=21, r=0.4, **kwargs)
+        sampler.read_file('test_infile.txt')
+        sampler.make_graph()
+        return sampler
+
+    def test_same_chain(self):
+        '''Profiling doesn't change the chain, and counts every proposal and acceptance.'''
+        plain = self.make()
+        profiled = self.make(profile=True)
+        assert plain.run(400) == profiled.run(400)
+        assert plain.states == profiled.states
+        report = profiled.profiler.report()
+        assert report['steps'] == profiled.steps == 400
+        assert report['proposed'][ADD] + report['proposed'][CUT] == 400
+        assert 0 < report['accepted'][ADD] <= report['proposed'][ADD]
+        assert 0 < report['accepted'][CUT] <= report['proposed'][CUT]
+        rate = (report['accepted'][ADD] + report['accepted'][CUT]) / 400
+        assert report['acceptance_rate']['all'] == rate
+        assert report['histogram_size'] == len(profiled.states)
+        assert report['retries'] > 0#six nodes stay sparse enough to draw pairs that are already edges
+
+    def test_phase_times(self):
+        '''Each phase is timed between its own two clock readings.'''
+        sampler = self.make()
+        ticks = itertools.count()
+        sampler.profiler = StepStats(sampler, clock=lambda: next(ticks))
+        sampler.run(25)
+        assert sampler.profiler.seconds == dict.fromkeys(PHASES, 25)
+        sampler.make_graph()
+        assert sampler.profiler.steps == 0
+
+    def test_hooks(self):
+        '''step() calls the profiler's hooks around its phases, recorded or not, and the chain is the same with or without one.'''
+        class Hooks(object):
+            def __init__(self):
+                self.calls = []
+
+            def begin(self, sampler):
+                self.calls.append('begin')
+
+            def phase(self, name):
+                self.calls.append(name)
+
+            def end(self, sampler, kind, forward):
+                self.calls.append('end')
+        plain = self.make()
+        hooked = self.make()
+        hooked.profiler = Hooks()
+        hooked.step()
+        hooked.step(record=False)
+        assert hooked.profiler.calls == ['begin'] + list(PHASES) + ['end', 'begin'] + list(PHASES[:3]) + ['end']
+        plain.step()
+        plain.step(record=False)
+        assert plain.run(200, burn_in=20, thin=3) == hooked.run(200, burn_in=20, thin=3)
+        assert plain.states == hooked.states
+
+    def test_dump_at_end_of_run(self):
+        '''run() dumps the report where it's told to.'''
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'profile.json')
+            sampler = self.make(profile=True, heavy_hitters=10, keep_states=False)
+            sampler.run(50, profile_to=path)
+            with open(path) as f:
+                report = json.load(f)
+            assert report['steps'] == 50
+            assert report['histogram_size'] == len(sampler.hitters)
+            assert set(report['seconds']) == set(PHASES)
+        finally:
+            shutil.rmtree(directory)
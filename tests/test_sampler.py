@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_sampler
+----------------------------------
+
+Tests for `graphmcmc.sampler` module.
+"""
+
+from __future__ import division
+import unittest
+
+from graphmcmc import graphmcmc
+from graphmcmc.bridges import bridge_index
+from graphmcmc.sampler import CountingGraph, GraphMCMCSampler
+import networkx as nx
+
+
+class TestSampler(unittest.TestCase):
+    test_infile = 'test_infile.txt'
+
+    def make(self, seed, **kwargs):
+        sampler = GraphMCMCSampler(seed=seed, **kwargs)
+        sampler.read_file(self.test_infile)
+        sampler.make_graph()
+        return sampler
+
+    def test_same_seed_same_chain(self):
+        '''Two samplers with the same seed should visit exactly the same states.'''
+        first = self.make(42)
+        second = self.make(42)
+        assert first.run(300) == second.run(300)
+        assert first.states == second.states
+        assert sorted(first.graph.edges()) == sorted(second.graph.edges())
+
+    def test_chains_are_independent(self):
+        '''Interleaving two chains shouldn't change either one, and they shouldn't touch the module's default chain.'''
+        graphmcmc.read_file('next_test.txt')
+        graphmcmc.make_graph()
+        alone = self.make(1, r=0.5, T=2.0)
+        alone.run(200)
+        first = self.make(1, r=0.5, T=2.0)
+        second = self.make(2, r=0.0, T=0.5)
+        for i in range(200):
+            first.step()
+            second.step()
+        assert first.states == alone.states
+        assert first.get_stats(201) == alone.get_stats(201)
+        assert first.graph is not second.graph
+        assert nx.is_connected(first.graph) and nx.is_connected(second.graph)
+        assert len(graphmcmc.states) == 1#the default chain hasn't moved
+        assert graphmcmc.graph.number_of_edges() == 2
+
+    def test_module_parameters_reach_sampler(self):
+        '''Setting r and T on the module should still steer the default chain.'''
+        graphmcmc.read_file('next_test.txt')
+        graphmcmc.make_graph()
+        graphmcmc.r = 3.0
+        try:
+            assert abs(graphmcmc.get_theta(graphmcmc.graph) - (3.0 * 2.0 + 3.0)) < 1e-9
+        finally:
+            graphmcmc.r = 0.0
+
+    def test_moves_without_mirror(self):
+        '''A sampler that weighs Moves against its one graph runs the same chain as one that keeps prop_graph, and its q terms agree with the two-graph ones.'''
+        single = self.make(9, r=0.5)
+        mirrored = self.make(9, r=0.5, mirror=True)
+        assert single.prop_graph is None
+        for i in range(300):
+            single.propose_new()
+            mirrored.propose_new()
+            assert single.proposal == mirrored.proposal
+            assert single.move_q(single.proposal) == mirrored.move_q(mirrored.proposal)
+            reverse = single.move_q(single.proposal, reverse=True)
+            mirrored.proposal, move = None, mirrored.proposal#so get_q() counts on the graphs themselves
+            assert abs(mirrored.get_q(mirrored.prop_graph, mirrored.graph) - reverse) < 1e-12
+            mirrored.proposal = move
+            accepted = single.accept_move()
+            assert mirrored.accept_move() == accepted
+            single.update(accepted)
+            mirrored.update(accepted)
+            single.record_state()
+            mirrored.record_state()
+        assert single.states == mirrored.states
+        assert sorted(mirrored.graph.edges()) == sorted(mirrored.prop_graph.edges())
+
+    def test_burn_in_and_thin(self):
+        '''Burn-in and thinning move the chain just as recording every step does, but only every thin-th state after the burn-in is counted, and get_stats() averages over those.'''
+        every = self.make(4, r=0.5)
+        thinned = self.make(4, r=0.5)
+        every.run(50)
+        seen = []
+        for i in range(300):
+            every.step()
+            if (i + 1) % 3 == 0:
+                seen.append((every.graph.degree(0), every.graph.number_of_edges(), every.get_longest_shortest(every.graph)))
+        stats = thinned.run(300, burn_in=50, thin=3)
+        assert sorted(thinned.graph.edges()) == sorted(every.graph.edges())
+        assert thinned.steps == 350
+        assert thinned.samples == 101#the starting state and every third after the burn-in
+        assert sum(thinned.states.values()) == 101
+        start = self.make(4).get_stats()
+        for i in range(3):
+            expected = (sum(state[i] for state in seen) + start[i]) / 101
+            assert abs(stats[i] - expected) < 1e-9
+        with self.assertRaises(ValueError):
+            thinned.run(10, thin=0)
+
+    def test_counting_graph(self):
+        '''A CountingGraph's edge count agrees with networkx's through every way of adding and removing edges, and the indices still notice edits made behind their backs.'''
+        graph = CountingGraph(nx.path_graph(5))
+        assert graph.number_of_edges() == 4
+        graph.add_edge(0, 1)
+        graph.add_edge(0, 2)
+        graph.add_edges_from([(2, 3), (3, 4), (4, 0), (0, 4)])
+        graph.add_weighted_edges_from([(1, 3, 2.0)])
+        assert graph.number_of_edges() == nx.Graph(graph).number_of_edges() == 7
+        graph.remove_edges_from([(0, 1), (0, 1), (2, 4)])
+        graph.remove_edge(1, 2)
+        assert graph.number_of_edges() == nx.Graph(graph).number_of_edges() == 5
+        assert graph.subgraph([0, 2, 3]).number_of_edges() == 2
+        assert graph.copy().number_of_edges() == 5
+        graph.remove_node(3)
+        assert graph.number_of_edges() == nx.Graph(graph).number_of_edges() == 2
+        graph.remove_nodes_from([0, 4, 9])
+        assert graph.number_of_edges() == 0 and graph.size() == 0
+        sampler = self.make(5)
+        assert isinstance(sampler.graph, CountingGraph)
+        sampler.run(100)
+        assert sampler.graph.number_of_edges() == nx.Graph(sampler.graph).number_of_edges()
+        u, v = next((u, v) for u in range(len(sampler.nodes)) for v in range(u + 1, len(sampler.nodes)) if not sampler.graph.has_edge(u, v))
+        before = bridge_index(sampler.graph).nonbridge_count()
+        sampler.graph.add_edge(u, v)
+        assert bridge_index(sampler.graph).nonbridge_count() > before
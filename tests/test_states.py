@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_states
+----------------------------------
+
+Tests for `graphmcmc.states` module.
+"""
+
+from __future__ import division
+import random
+import unittest
+import warnings
+
+import networkx as nx
+from graphmcmc.states import StateCodec, SpaceSaving, top_states
+from graphmcmc.sampler import GraphMCMCSampler
+
+
+class TestStates(unittest.TestCase):
+
+    def random_graph(self, n, edges, seed):
+        rng = random.Random(seed)
+        graph = nx.Graph()
+        graph.add_nodes_from(range(n))
+        while graph.number_of_edges() < edges:
+            u, v = rng.randrange(n), rng.randrange(n)
+            if u != v:
+                graph.add_edge(u, v)
+        return graph
+
+    def check_round_trip(self, codec, n):
+        for seed in range(20):
+            graph = self.random_graph(n, n + seed, seed)
+            key = codec.key(graph)
+            codec.remember(key, 1, graph)
+            assert codec.decode(key) == sorted(tuple(sorted(edge)) for edge in graph.edges())
+            same = nx.Graph()
+            same.add_edges_from((v, u) for u, v in reversed(graph.edges()))
+            assert codec.key(same) == key#edge order and orientation don't matter
+            running = 0
+            for u, v in graph.edges():
+                running ^= codec.code(u, v)
+            assert running == key#the codes XOR up to the key
+
+    def test_pair_numbers(self):
+        '''Every possible edge gets its own number, and unpair() inverts pair().'''
+        codec = StateCodec(7)
+        pairs = [(u, v) for u in range(7) for v in range(u + 1, 7)]
+        assert [codec.pair(u, v) for u, v in pairs] == list(range(21))
+        assert codec.unpair(range(21)) == pairs
+        assert codec.pair(5, 2) == codec.pair(2, 5)
+
+    def test_bitmask_keys(self):
+        '''Small graphs are keyed on an integer bitmask.'''
+        codec = StateCodec(12)
+        assert codec.masked
+        self.check_round_trip(codec, 12)
+        assert isinstance(codec.key(self.random_graph(12, 15, 0)), int)
+        assert not codec.edges
+
+    def test_zobrist_keys(self):
+        '''Past mask_pairs the keys are 128-bit Zobrist hashes, decoded through the side table.'''
+        codec = StateCodec(12, mask_pairs=10)
+        assert not codec.masked
+        self.check_round_trip(codec, 12)
+        key = codec.key(self.random_graph(12, 15, 0))
+        assert 0 < key < 1 << 128
+        assert StateCodec(12, mask_pairs=10).key(self.random_graph(12, 15, 0)) == key#the same codes everywhere
+
+    def test_running_keys_audit(self):
+        '''The keys new_edge() and cut_edge() keep up to date match the edge sets, step after step, under either kind of code.'''
+        for mask_pairs in (1 << 16, 0):
+            sampler = GraphMCMCSampler(seed=5, r=0.5)
+            sampler.read_file('test_infile.txt')
+            sampler.codec = StateCodec(len(sampler.nodes), mask_pairs=mask_pairs, audit=True)
+            sampler.make_graph()
+            sampler.run(300)#check() raises on the first bad key
+            assert sum(sampler.states.values()) == 301
+            assert sampler.state_key() == sampler.codec.key(sampler.graph)
+
+    def test_audit_catches_collisions(self):
+        '''check() notices when two edge sets end up with the same key.'''
+        codec = StateCodec(5, mask_pairs=0, audit=True)
+        first, second = self.random_graph(5, 4, 0), self.random_graph(5, 4, 1)
+        key = codec.key(first)
+        codec.remember(key, 1, first)
+        codec.check(key, first)
+        codec.edges[codec.key(second)] = codec.edges[key]#forge a collision
+        self.assertRaises(ValueError, codec.check, codec.key(second), second)
+
+    def test_top_states(self):
+        '''top_states() picks the biggest counts, biggest first.'''
+        counts = dict((key, (key * 37) % 101) for key in range(101))
+        assert top_states(counts, 3) == [(30, 100), (60, 99), (90, 98)]
+        assert top_states(counts, 0) == []
+        assert len(top_states(counts, 500)) == 101
+
+    def test_space_saving(self):
+        '''The Space-Saving bounds hold on a skewed stream: counts never undershoot, overshoot by at most the error, and frequent keys are never lost.'''
+        rng = random.Random(0)
+        stream = [min(int(rng.paretovariate(1.2)), 500) for i in range(20000)]
+        summary = SpaceSaving(50)
+        true = {}
+        for key in stream:
+            summary.add(key)
+            true[key] = true.get(key, 0) + 1
+        assert len(summary) == 50
+        assert summary.total == len(stream)
+        for key in summary.counts:
+            assert true[key] <= summary.counts[key] <= true[key] + summary.errors[key]
+        for key in true:
+            if true[key] > len(stream) / 50:
+                assert key in summary
+        assert [key for key, count in summary.top(3)] == [key for key, count in top_states(true, 3)]
+
+    def test_heavy_hitters_only(self):
+        '''A sampler can follow its most visited states without keeping the histogram; with a slot for every state it visits, the summary is exact.'''
+        full = GraphMCMCSampler(seed=8)
+        full.read_file('test_infile.txt')
+        light = GraphMCMCSampler(seed=8, heavy_hitters=1000, keep_states=False)
+        light.share_nodes(full)
+        tiny = GraphMCMCSampler(seed=8, heavy_hitters=20, keep_states=False)
+        tiny.share_nodes(full)
+        for sampler in (full, light, tiny):
+            sampler.codec = StateCodec(len(sampler.nodes), mask_pairs=0)#Zobrist keys, so decoding needs the tracked edge sets
+            sampler.make_graph()
+            sampler.run(1000)#long enough to visit more states than tiny has slots
+        assert not light.states
+        assert light.hitters.counts == full.states
+        assert light.top_states(5) == full.top_states(5)
+        assert light.get_top_percent()
+        assert len(tiny.hitters) == 20 < len(full.states)
+        for edges, count in tiny.top_states(20):
+            assert count >= full.states[tiny.state_key(nx.Graph(edges))]
+
+    def test_top_percent_decodes(self):
+        '''get_top_percent() hands back edge lists, not keys.'''
+        sampler = GraphMCMCSampler(seed=3)
+        sampler.read_file('test_infile.txt')
+        sampler.make_graph()
+        sampler.run(300)
+        for edges in sampler.get_top_percent():
+            graph = nx.Graph(edges)
+            assert sampler.state_key(graph) in sampler.states
+
+    def test_keeps_most_visited(self):
+        '''Only the keep most visited states' edge sets are kept, and those are exactly the ones top_states() ranks highest.'''
+        full = GraphMCMCSampler(seed=4)
+        full.read_file('test_infile.txt')
+        kept = GraphMCMCSampler(seed=4)
+        kept.share_nodes(full)
+        full.codec = StateCodec(len(full.nodes), mask_pairs=0, keep=None)
+        kept.codec = StateCodec(len(kept.nodes), mask_pairs=0, keep=10)
+        for sampler in (full, kept):
+            sampler.make_graph()
+            sampler.run(1000)
+        assert len(kept.codec.edges) == 10 < len(full.codec.edges) == len(full.states)
+        assert set(kept.codec.edges) == set(key for key, count in top_states(kept.states, 10))
+        assert kept.top_states(10) == full.top_states(10)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            assert kept.top_states(11) == full.top_states(10)
+        assert len(caught) == 1 and issubclass(caught[0].category, RuntimeWarning)
+
+    def test_top_percent_past_keep(self):
+        '''With more than 100 * keep states, get_top_percent() decodes the keep most visited, the same as a codec keeping everything does, and warns that it stopped there.'''
+        rng = random.Random(8)
+        nodes = [(rng.random(), rng.random()) for i in range(12)]
+        full = GraphMCMCSampler(nodes, seed=4)
+        kept = GraphMCMCSampler(nodes, seed=4)
+        full.codec = StateCodec(len(full.nodes), mask_pairs=0, keep=None)
+        kept.codec = StateCodec(len(kept.nodes), mask_pairs=0, keep=5)
+        for sampler in (full, kept):
+            sampler.make_graph()
+            sampler.run(3000)
+        assert len(kept.states) > 100 * 5
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            top = kept.get_top_percent()
+        assert len(caught) == 1 and issubclass(caught[0].category, RuntimeWarning)
+        assert top == full.get_top_percent()[:5]
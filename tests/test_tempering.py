@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_tempering
+----------------------------------
+
+Tests for `graphmcmc.tempering` module.
+"""
+
+from __future__ import division
+import unittest
+
+from graphmcmc import tempering
+import networkx as nx
+
+
+class TestTempering(unittest.TestCase):
+
+    def test_ladder_runs_and_swaps(self):
+        '''Every replica stays a connected graph on its own temperature, and swaps get attempted and reported between every neighbouring pair.'''
+        ladder = tempering.ReplicaExchange([0.5, 1.0, 2.0, 4.0], infile='test_infile.txt', r=0.5, seed=17, swap_every=5)
+        report = ladder.run(200)
+        assert report['temperatures'] == [0.5, 1.0, 2.0, 4.0]
+        assert len(report['stats']) == 4
+        assert len(report['swap_rates']) == 3
+        for k in range(3):
+            assert ladder.swap_attempts[k] > 0
+            assert 0.0 <= report['swap_rates'][k] <= 1.0
+        for replica in ladder.replicas:
+            assert nx.is_connected(replica.graph)
+            assert sum(replica.states.values()) == 201
+            assert replica.distances is ladder.replicas[0].distances
+            assert replica.prop_graph is None#replicas weigh moves against their one graph
+
+    def test_reproducible(self):
+        '''The same seed replays the same swaps and statistics.'''
+        first = tempering.ReplicaExchange([1.0, 3.0], infile='test_infile.txt', seed=5, swap_every=2).run(60)
+        second = tempering.ReplicaExchange([1.0, 3.0], infile='test_infile.txt', seed=first['seed'], swap_every=2).run(60)
+        assert first == second
+
+    def test_equal_temperatures_always_swap(self):
+        '''At equal temperatures the swap ratio is exactly 1.'''
+        ladder = tempering.ReplicaExchange([1.0, 1.0], infile='test_infile.txt', r=0.3, seed=1, swap_every=1)
+        ladder.run(20)
+        assert ladder.swap_rates() == [1.0]
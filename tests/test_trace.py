@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_trace
+----------------------------------
+
+Tests for `graphmcmc.trace` module.
+"""
+
+from __future__ import division
+import os
+import shutil
+import tempfile
+import unittest
+
+from graphmcmc import trace
+from graphmcmc.energy import ADD, CUT
+from graphmcmc.sampler import GraphMCMCSampler
+import numpy as np
+
+
+class TestTrace(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'chain.trace')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_growth(self):
+        '''Rows written past the first chunk survive the columns being moved apart, and come back as views of the file.'''
+        writer = trace.TraceWriter(self.path)
+        rows = trace.CHUNK + 10
+        for row in range(rows):
+            writer.write(row * 0.5, row, row % 7, row * 0.25, row % 2 == 0, (None, ADD, CUT)[row % 3])
+        assert writer.capacity == 2 * trace.CHUNK
+        writer.close()
+        columns = trace.load_trace(self.path)
+        expected = np.arange(rows)
+        assert (columns['theta'] == expected * 0.5).all()
+        assert (columns['edges'] == expected).all()
+        assert (columns['degree0'] == expected % 7).all()
+        assert (columns['longest'] == expected * 0.25).all()
+        assert (columns['accepted'] == (expected % 2 == 0)).all()
+        assert (columns['move'] == expected % 3).all()
+        assert isinstance(columns['theta'].base, np.memmap)#no copy
+        assert not columns['theta'].flags.writeable
+
+    def test_sampler_trace(self):
+        '''A traced chain's columns add up to its running sums, and every row follows from the one before by the move it records.'''
+        sampler = GraphMCMCSampler(seed=13, r=0.6, trace=self.path)
+        sampler.read_file('test_infile.txt')
+        sampler.make_graph()
+        sampler.run(300)
+        columns = trace.load_trace(self.path)#readable after run() without closing
+        assert len(columns['theta']) == 301#the starting state too
+        assert columns['degree0'].sum() == sampler.zero_degree_sum
+        assert columns['edges'].sum() == sampler.edge_sum
+        assert abs(columns['longest'].sum() - sampler.long_short_sum) < 1e-9
+        assert columns['theta'][-1] == sampler.get_theta(sampler.graph)
+        assert columns['move'][0] == trace.MOVES[None]
+        steps = np.diff(columns['edges'])
+        moves, accepted = columns['move'][1:], columns['accepted'][1:]
+        assert (steps[~accepted] == 0).all()
+        assert (steps[accepted & (moves == trace.MOVES[ADD])] == 1).all()
+        assert (steps[accepted & (moves == trace.MOVES[CUT])] == -1).all()
+        sampler.close()
+        assert sampler.trace is None
+
+    def test_not_a_trace(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'\0' * 128)
+        self.assertRaises(ValueError, trace.load_trace, self.path)